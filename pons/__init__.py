@@ -11,9 +11,13 @@ from .net import (
 )
 from .routing import Router, EpidemicRouter
 from .mobility import (
+    MovementTrace,
     Ns2Movement,
     OneMovement,
     OneMovementManager,
+    OneMovementReader,
+    RandomWaypointMovement,
+    extract_contact_plan,
     generate_randomwaypoint_movement,
 )
 from .apps import PingApp, App
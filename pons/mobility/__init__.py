@@ -1,2 +1,11 @@
-from .movement import OneMovement, OneMovementManager, generate_randomwaypoint_movement
-from .ns2_parser import Ns2Movement
\ No newline at end of file
+from .trace import MovementSource, MovementTrace, MOVE_DTYPE
+from .movement import (
+    OneMovement,
+    OneMovementManager,
+    OneMovementReader,
+    generate_randomwaypoint_movement,
+)
+from .ns2_parser import Ns2Movement
+from .waypoint import RandomWaypointMovement
+from .linear import LinearTrajectories, predict_contacts
+from .contacts import extract_contact_plan
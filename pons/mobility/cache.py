@@ -0,0 +1,100 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from pons.mobility.trace import MOVE_DTYPE, MovementTrace
+
+logger = logging.getLogger(__name__)
+
+# increase whenever parsing a movement file gives different moves
+CACHE_VERSION = 1
+
+
+def cache_dir() -> Optional[str]:
+    """Returns the directory of the trace cache or None if caching is disabled."""
+    return os.getenv("PONS_CACHE_DIR")
+
+
+def cache_key(filename: str, kind: str, **params) -> str:
+    """
+    Returns a key for the parsed moves of a movement file, which depends on
+    the content of the file, the kind of parser and its parameters.
+    """
+    digest = hashlib.sha256()
+    digest.update(
+        json.dumps([CACHE_VERSION, kind, params], sort_keys=True).encode("utf-8")
+    )
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_trace(directory: str, key: str) -> Optional[Tuple[MovementTrace, dict]]:
+    """
+    Returns the cached trace, memory-mapped read-only, and its info or None
+    if the key is not cached.
+    """
+    path = os.path.join(directory, key)
+    try:
+        with open(path + ".json", "r") as f:
+            info = json.load(f)
+        data = np.load(path + ".npy", mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    if data.dtype != MOVE_DTYPE:
+        return None
+    return MovementTrace(data), info
+
+
+def store_trace(directory: str, key: str, trace: MovementTrace, info: dict):
+    """
+    Stores a trace and its info. Both files are written to temporary files
+    first and then renamed, so concurrent workers never read partial files.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, key)
+    # the info is written last, it marks the entry as complete
+    for suffix, write in (
+        (".npy", lambda f: np.save(f, trace.data, allow_pickle=False)),
+        (".json", lambda f: f.write(json.dumps(info).encode("utf-8"))),
+    ):
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=suffix + ".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp, path + suffix)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+
+def cached_trace(
+    filename: str,
+    kind: str,
+    parse: Callable[[], Tuple[MovementTrace, dict]],
+    **params,
+) -> Tuple[MovementTrace, dict]:
+    """
+    Returns the parsed trace and info of a movement file. If PONS_CACHE_DIR
+    is set, the result of parse() is stored there as raw numpy file, and
+    later calls memory-map it instead of parsing the file again. All
+    processes using the same cache share one copy of the trace in memory.
+    """
+    directory = cache_dir()
+    if directory is None:
+        return parse()
+    key = cache_key(filename, kind, **params)
+    cached = load_trace(directory, key)
+    if cached is not None:
+        logger.debug("Loaded cached trace %s for %s", key, filename)
+        return cached
+    trace, info = parse()
+    store_trace(directory, key, trace, info)
+    logger.debug("Cached trace %s for %s", key, filename)
+    return trace, info
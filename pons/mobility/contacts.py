@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from typing import Iterable, List, Optional
+
+from pons.mobility.linear import LinearTrajectories, predict_contacts
+from pons.net.plans import Contact, ContactPlan
+
+
+def extract_contact_plan(
+    moves,
+    range: float,
+    end: float,
+    start: float = 0.0,
+    node_ids: Optional[Iterable[int]] = None,
+    bandwidth: int = 54000000,
+    loss: float = 0.0,
+    delay: float = 0.05,
+) -> ContactPlan:
+    """
+    Runs a movement through the range model once and returns the contact
+    windows of all node pairs as symmetric ContactPlan.
+
+    The movement can be anything LinearTrajectories.from_moves accepts. The
+    contacts get the bandwidth, loss and delay (in seconds) of the network
+    they replace, like the arguments of NetworkSettings. Contacts that are
+    still active at end are closed at end. Later runs can use the plan with
+    NetworkSettings(contactplan=...) instead of replaying the movement.
+    """
+    trajectories = LinearTrajectories.from_moves(moves)
+    if node_ids is None:
+        node_ids = sorted(trajectories.breakpoints)
+    predicted = predict_contacts(trajectories, list(node_ids), range, start, end)
+    contacts: List[Contact] = []
+    for c_start, c_end, a, b in predicted.tolist():
+        contacts.append(
+            Contact(
+                timespan=(c_start, min(c_end, end)),
+                nodes=(a, b),
+                bw=bandwidth,
+                loss=loss,
+                # contact plans store the delay in milliseconds
+                delay=delay * 1000,
+            )
+        )
+    return ContactPlan(contacts, symmetric=True)
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from pons.mobility.trace import MovementSource, MovementTrace
+from pons.mobility.waypoint import RandomWaypointMovement
+
+if TYPE_CHECKING:
+    from pons import Node
+
+# predicted contacts between two nodes a < b (in the order of the node list)
+CONTACT_DTYPE = np.dtype([("start", "f8"), ("end", "f8"), ("a", "i8"), ("b", "i8")])
+
+
+class LinearTrajectories(object):
+    """
+    Piecewise-linear trajectories of a set of nodes.
+
+    Every node has sorted breakpoints (time, x, y, z) and moves with constant
+    velocity between two of them. Before its first and after its last
+    breakpoint a node stays where it is.
+    """
+
+    def __init__(self, breakpoints: Dict[int, Tuple[np.ndarray, np.ndarray]]):
+        self.breakpoints = breakpoints
+
+    def __str__(self):
+        return "LinearTrajectories(%d nodes, %d breakpoints)" % (
+            len(self.breakpoints),
+            sum(len(t) for t, _ in self.breakpoints.values()),
+        )
+
+    @classmethod
+    def from_moves(
+        cls,
+        moves,
+        nodes: Optional[Iterable[Node]] = None,
+        max_step: float = 1.0,
+    ) -> LinearTrajectories:
+        """
+        Builds trajectories from position samples (time, node_id, x, y, z),
+        given as list, MovementTrace or MovementSource. The legs of a
+        RandomWaypointMovement are used directly.
+
+        Consecutive samples of a node are connected by straight lines. If two
+        samples are more than max_step apart, the node waits at the first one
+        until max_step before the second one. This matches the movements of
+        generate_randomwaypoint_movement and Ns2Movement, which sample moving
+        nodes once per second. Nodes without samples stay at their position.
+        """
+        breakpoints = {}
+        if isinstance(moves, RandomWaypointMovement):
+            for node_id, (times, points) in moves.breakpoints().items():
+                breakpoints[node_id] = cls._with_pauses(times, points, np.inf)
+            moves = []
+        elif isinstance(moves, MovementSource):
+            moves = MovementTrace.from_chunks(moves.chunks())
+        if isinstance(moves, MovementTrace):
+            data = moves.data
+            samples = np.column_stack(
+                (data["time"], data["node"], data["x"], data["y"], data["z"])
+            )
+        else:
+            samples = np.asarray(moves, dtype=float).reshape(-1, 5)
+        if len(samples) > 0:
+            samples = samples[np.lexsort((samples[:, 0], samples[:, 1]))]
+            node_ids = samples[:, 1].astype(np.int64)
+            splits = np.flatnonzero(node_ids[1:] != node_ids[:-1]) + 1
+            for group in np.split(samples, splits):
+                breakpoints[int(group[0, 1])] = cls._with_pauses(
+                    group[:, 0], group[:, 2:5], max_step
+                )
+        if nodes is not None:
+            for n in nodes:
+                if n.node_id not in breakpoints:
+                    breakpoints[n.node_id] = (
+                        np.zeros(1),
+                        np.array([[n.x, n.y, n.z]], dtype=float),
+                    )
+        return cls(breakpoints)
+
+    @staticmethod
+    def _with_pauses(times: np.ndarray, points: np.ndarray, max_step: float):
+        # the last sample at a time wins, just like when replaying the moves
+        last = np.append(times[1:] != times[:-1], True)
+        times = times[last]
+        points = points[last]
+        gaps = np.flatnonzero(np.diff(times) > max_step)
+        if len(gaps) > 0:
+            times = np.insert(times, gaps + 1, times[gaps + 1] - max_step)
+            points = np.insert(points, gaps + 1, points[gaps], axis=0)
+        return times, points
+
+    def breakpoint_times(self, start: float, end: float) -> np.ndarray:
+        """Returns the sorted times in [start, end] at which any node changes direction."""
+        times = np.concatenate(
+            [t for t, _ in self.breakpoints.values()] + [np.array([start, end])]
+        )
+        times = np.unique(times)
+        return times[(times >= start) & (times <= end)]
+
+    def positions(self, node_ids: List[int], times: np.ndarray) -> np.ndarray:
+        """Returns the positions of the given nodes as array (time, node, axis)."""
+        result = np.empty((len(times), len(node_ids), 3))
+        for k, node_id in enumerate(node_ids):
+            t, points = self.breakpoints[node_id]
+            for axis in range(3):
+                result[:, k, axis] = np.interp(times, t, points[:, axis])
+        return result
+
+
+def predict_contacts(
+    trajectories: LinearTrajectories,
+    node_ids: List[int],
+    range: float,
+    start: float,
+    end: float,
+    window: int = 32,
+    block_size: int = 1000000,
+    merge_gap: float = 1e-6,
+) -> np.ndarray:
+    """
+    Computes the exact times at which pairs of nodes are in range of each other.
+
+    Between two breakpoints the distance of a pair is a quadratic function of
+    time, so entering and leaving the range are the roots of a quadratic
+    equation. Pairs are pruned per window of breakpoints by the bounding boxes
+    of the nodes. At the breakpoints the result is exactly the same as a
+    range check with NetworkSettings.has_contact.
+
+    Returns a CONTACT_DTYPE array sorted by start time. Contacts that are
+    still active at end have an infinite end time.
+    """
+    node_ids = list(node_ids)
+    times = trajectories.breakpoint_times(start, end)
+    range_sq = range * range
+    pieces = []
+    # the positions of all nodes are computed for blocks of breakpoints
+    block = max(window, block_size // max(len(node_ids), 1))
+    for b in np.arange(0, len(times) - 1, block):
+        block_times = times[b : b + block + 1]
+        pos = trajectories.positions(node_ids, block_times)
+        for w in np.arange(0, len(block_times) - 1, window):
+            pieces.append(
+                _window_contacts(
+                    block_times[w : w + window + 1],
+                    pos[w : w + window + 1],
+                    range,
+                    range_sq,
+                    merge_gap,
+                )
+            )
+
+    contacts = np.zeros(0, dtype=CONTACT_DTYPE)
+    if len(pieces) > 0:
+        i, j, starts, ends = (np.concatenate(p) for p in zip(*pieces))
+        order = np.lexsort((starts, j, i))
+        i, j, starts, ends = _merge(
+            i[order], j[order], starts[order], ends[order], merge_gap
+        )
+        # contacts where the nodes only touch the range
+        real = ends > starts
+        ids = np.array(node_ids, dtype=np.int64)
+        contacts = np.zeros(np.count_nonzero(real), dtype=CONTACT_DTYPE)
+        contacts["start"] = starts[real]
+        contacts["end"] = np.where(ends[real] >= end, np.inf, ends[real])
+        contacts["a"] = ids[i[real]]
+        contacts["b"] = ids[j[real]]
+        contacts = contacts[
+            np.lexsort((contacts["b"], contacts["a"], contacts["start"]))
+        ]
+    return contacts
+
+
+def _window_contacts(
+    times: np.ndarray,
+    pos: np.ndarray,
+    range: float,
+    range_sq: float,
+    merge_gap: float,
+):
+    """Contact pieces of all pairs within one window of breakpoints."""
+    # pairs whose bounding boxes in this window come within range
+    lo = pos.min(axis=0)
+    hi = pos.max(axis=0)
+    overlap = np.all(
+        (lo[:, None] - range <= hi[None, :]) & (lo[None, :] - range <= hi[:, None]),
+        axis=2,
+    )
+    i, j = np.nonzero(np.triu(overlap, 1))
+
+    # distance at the breakpoints d and per segment d(u) = d0 + u * delta, u in [0, 1]
+    d = pos[:, i] - pos[:, j]
+    dist_sq = (d * d).sum(axis=2) - range_sq
+    d0 = d[:-1]
+    delta = d[1:] - d0
+    a = (delta * delta).sum(axis=2)
+    b = 2 * (d0 * delta).sum(axis=2)
+    c = dist_sq[:-1]
+    c1 = dist_sq[1:]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        disc = b * b - 4 * a * c
+        q = -0.5 * (b + np.copysign(np.sqrt(np.maximum(disc, 0.0)), b))
+        u1 = q / a
+        u2 = c / q
+    u_lo = np.minimum(u1, u2)
+    u_hi = np.maximum(u1, u2)
+    # both nodes move in parallel, the distance does not change
+    still = a == 0
+    inside = np.where(still, c <= 0, disc >= 0)
+    # in range at a breakpoint exactly when a range check would say so
+    u_lo = np.where((c <= 0) | still, 0.0, np.maximum(u_lo, 0.0))
+    u_hi = np.where((c1 <= 0) | still, 1.0, np.minimum(u_hi, 1.0))
+    inside &= u_lo <= u_hi
+
+    # pieces ordered by pair and then by time
+    k, s = np.nonzero(inside.T)
+    t0 = times[:-1][s]
+    t1 = times[1:][s]
+    u_lo = u_lo[s, k]
+    u_hi = u_hi[s, k]
+    starts = np.where(u_lo == 0.0, t0, t0 + u_lo * (t1 - t0))
+    ends = np.where(u_hi == 1.0, t1, t0 + u_hi * (t1 - t0))
+    return _merge(i[k], j[k], starts, ends, merge_gap)
+
+
+def _merge(i, j, starts, ends, merge_gap: float):
+    """Merges touching pieces of the same pair, the pieces must be sorted by pair and time."""
+    if len(starts) == 0:
+        return i, j, starts, ends
+    new = np.ones(len(starts), dtype=bool)
+    new[1:] = (
+        (i[1:] != i[:-1]) | (j[1:] != j[:-1]) | (starts[1:] > ends[:-1] + merge_gap)
+    )
+    first = np.flatnonzero(new)
+    return i[first], j[first], starts[first], np.maximum.reduceat(ends, first)
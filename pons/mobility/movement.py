@@ -1,8 +1,12 @@
-import random
-import math
-from typing import Dict
+from itertools import islice
+from typing import Dict, Iterator, Optional, Tuple
 from dataclasses import dataclass
 
+import numpy as np
+
+from pons.mobility.cache import cached_trace
+from pons.mobility.trace import MovementSource, MovementTrace
+from pons.mobility.waypoint import RandomWaypointMovement
 from pons.node import Node
 from pons.simulation import event_log
 
@@ -19,7 +23,7 @@ class OneMovement(object):
         self.width = width
         self.height = height
         if moves is None:
-            moves = []
+            moves = MovementTrace()
         self.moves = moves
 
     def __str__(self):
@@ -33,80 +37,143 @@ class OneMovement(object):
 
     @classmethod
     def from_file(cls, filename):
+        def parse():
+            reader = OneMovementReader(filename)
+            moves = MovementTrace.from_chunks(reader.chunks())
+            info = {
+                "duration": reader.duration,
+                "num_nodes": moves.num_nodes,
+                "width": reader.width,
+                "height": reader.height,
+            }
+            return moves, info
+
+        moves, info = cached_trace(filename, "one", parse)
+        return cls(
+            info["duration"], info["num_nodes"], info["width"], info["height"], moves
+        )
+
+
+class OneMovementReader(MovementSource):
+    """
+    Streams a The ONE movement file in chunks of moves.
+
+    Only the header is read up front, so a reader can be passed as movements
+    to the simulation and the moves are parsed while simulated time advances.
+    """
+
+    def __init__(self, filename, chunk_size: int = 65536):
+        self.filename = filename
+        self.chunk_size = chunk_size
         with open(filename, "r") as f:
-            lines = f.readlines()
-            first_line = lines[0].split()
-            duration = float(first_line[1])
-            num_nodes = 0
-            width = float(first_line[3])
-            height = float(first_line[5])
-            moves = []
-            for line in lines[1:]:
-                time, node_id, x, y = line.split()
-                time = float(time)
-                node_id = int(node_id)
-                num_nodes = max(num_nodes, node_id + 1)
-                x = float(x)
-                y = float(y)
-                z = 0.0
-                moves.append((time, node_id, x, y, z))
-            return cls(duration, num_nodes, width, height, moves)
+            first_line = f.readline().split()
+        self.duration = float(first_line[1])
+        self.width = float(first_line[3])
+        self.height = float(first_line[5])
+
+    def __str__(self):
+        return "OneMovementReader(%s, %d, %d, %d)" % (
+            self.filename,
+            self.duration,
+            self.width,
+            self.height,
+        )
+
+    def chunks(self) -> Iterator[MovementTrace]:
+        """Parses the moves of the file, at most chunk_size moves at a time."""
+        with open(self.filename, "r") as f:
+            f.readline()
+            while True:
+                lines = list(islice(f, self.chunk_size))
+                if len(lines) == 0:
+                    return
+                # time node_id x y
+                columns = np.loadtxt(lines, ndmin=2).reshape(-1, 4)
+                if len(columns) > 0:
+                    yield MovementTrace.from_columns(
+                        columns[:, 0],
+                        columns[:, 1],
+                        columns[:, 2],
+                        columns[:, 3],
+                        0.0,
+                        sort=False,
+                    )
 
 
 class OneMovementManager(object):
     """A The ONE movement manager."""
 
-    def __init__(self, env, nodes: Dict[int, Node], moves):
+    def __init__(self, env, nodes: Dict[int, Node], moves, neighbor_service=None):
         self.env = env
         self.nodes = nodes
         self.moves = moves
-        self.move_idx = 0
-
-    def start(self):
-        if self.move_idx <= len(self.moves):
-            time = 0.0
-            while time == 0.0:
-                time, node_id, x, y, z = self.moves[self.move_idx]
-                self.move_idx += 1
-                node = self.nodes[node_id]
-                node.x = x
-                node.y = y
-                node.z = z
+        # moves are pulled chunk by chunk while the simulation advances
+        if isinstance(moves, MovementSource):
+            self.chunks = moves.chunks()
+        else:
+            self.chunks = iter([MovementTrace.from_list(moves)])
+        self.chunk = []
+        self.cursor = 0
+        self.neighbor_service = neighbor_service
+
+    def _next_move(self) -> Optional[Tuple[float, int, float, float, float]]:
+        """Returns the next move or None if all moves have been replayed."""
+        while self.cursor >= len(self.chunk):
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                return None
+            self.chunk = chunk.data.tolist()
+            self.cursor = 0
+        move = self.chunk[self.cursor]
+        self.cursor += 1
+        return move
+
+    def _set_position(self, node: Node, x: float, y: float, z: float):
+        node.x = x
+        node.y = y
+        node.z = z
+        if self.neighbor_service is not None:
+            self.neighbor_service.node_moved(node)
 
+    def _update_neighbors(self, time: float):
+        if self.neighbor_service is not None:
+            self.neighbor_service.update(time)
+        else:
             for n in self.nodes.values():
                 n.calc_neighbors(time, self.nodes.values())
-            self.env.process(self.move_next(time, node_id, x, y, z))
 
-    def move_next(self, time, node_id, x, y, z):
-        yield self.env.timeout(time - self.env.now)
-        node = self.nodes[node_id]
-        node.x = x
-        node.y = y
-        node.z = z
-        event_log(time, "MOVE", {"event": "SET", "id": node_id, "x": x, "y": y, "z": z})
-
-        # move all nodes with same timestamp
-        while self.move_idx < len(self.moves):
-            next_time, node_id, x, y, z = self.moves[self.move_idx]
-            self.move_idx += 1
-
-            if time == next_time:
-                node = self.nodes[node_id]
-                node.x = x
-                node.y = y
-                node.z = z
+    def start(self):
+        move = self._next_move()
+        if move is not None:
+            time = 0.0
+            while time == 0.0 and move is not None:
+                time, node_id, x, y, z = move
+                self._set_position(self.nodes[node_id], x, y, z)
+                if time == 0.0:
+                    move = self._next_move()
+
+            self._update_neighbors(time)
+            if move is not None:
+                self.env.process(self.replay(move))
+
+    def replay(self, move):
+        """Replays all moves in one process, one step per distinct timestamp."""
+        while move is not None:
+            time = move[0]
+            yield self.env.timeout(time - self.env.now)
+
+            # move all nodes with same timestamp
+            while move is not None and move[0] == time:
+                _, node_id, x, y, z = move
+                self._set_position(self.nodes[node_id], x, y, z)
                 event_log(
                     time,
                     "MOVE",
                     {"event": "SET", "id": node_id, "x": x, "y": y, "z": z},
                 )
-            else:
-                self.env.process(self.move_next(next_time, node_id, x, y, z))
-                break
+                move = self._next_move()
 
-        now = self.env.now
-        for n in self.nodes.values():
-            n.calc_neighbors(now, self.nodes.values())
+            self._update_neighbors(self.env.now)
 
 
 def generate_randomwaypoint_movement(
@@ -118,34 +185,20 @@ def generate_randomwaypoint_movement(
     max_speed=5.0,
     min_pause=0,
     max_pause=120,
-):
-    """Generate random waypoint movement for a number of nodes."""
-    moves = []
-    for i in range(num_nodes):
-        cur_time = 0.0
-        x = random.randint(0, width)
-        y = random.randint(0, height)
-        z = 0.0
-        moves.append((cur_time, i, x, y, z))
-        while cur_time < duration:
-            way_x = random.randint(0, width)
-            way_y = random.randint(0, height)
-            speed = random.random() * (max_speed - min_speed) + min_speed
-            pause = random.randint(min_pause, max_pause)
-            cur_time += pause
-            dist = math.sqrt((way_x - x) ** 2 + (way_y - y) ** 2)
-            time = dist / speed
-            step_x = (way_x - x) / time
-            step_y = (way_y - y) / time
-            for j in range(int(time)):
-                if cur_time + j >= duration:
-                    break
-                cur_time += 1
-                x += step_x
-                y += step_y
-                moves.append((cur_time, i, x, y, z))
-
-    # sort moves by time and node id
-    moves.sort(key=lambda x: (x[0], x[1]))
-
-    return moves
+) -> MovementTrace:
+    """
+    Generate random waypoint movement for a number of nodes.
+
+    Only the legs are drawn one after the other, the per-second moves of all
+    nodes are then computed in batch, see RandomWaypointMovement.trace.
+    """
+    return RandomWaypointMovement(
+        duration,
+        num_nodes,
+        width,
+        height,
+        min_speed,
+        max_speed,
+        min_pause,
+        max_pause,
+    ).trace()
@@ -1,33 +1,19 @@
 import math
+import re
 from dataclasses import dataclass
-from enum import Enum
-from string import digits
-from typing import List, Tuple, Union
+from typing import Dict, List, Tuple
 
-from pons.utils import Vector
+import numpy as np
 
+from pons.mobility.cache import cached_trace
+from pons.mobility.trace import MovementTrace
 
-class Token(Enum):
-    """enum for all tokens"""
-
-    NODE = "$node"
-    PARAN_LEFT = "("
-    PARAN_RIGHT = ")"
-    SET = "set"
-    X = "X"
-    Y = "Y"
-    Z = "Z"
-    UNDERLINE = "_"
-    NS = "$ns"
-    AT = "at"
-    QUOTE = '"'
-    SET_DEST = "setdest"
-    BACKSLASH = "\\"
-    NEWLINE = "\n"
-    HASH = "#"
-
-
-TOKENS = [e.value for e in Token]
+# $node_(<node_id>) set <coordinate>_ <value>
+INIT_ROW = re.compile(r"\$node_\(\s*(\d+)\s*\)\s+set\s+([XYZ])_\s+(\S+)\s*$")
+# $ns_ at <time> "$node_(<node_id>) setdest <x> <y> <speed>"
+DEST_ROW = re.compile(
+    r'\$ns_\s+at\s+(\S+)\s+"\s*\\?\$node_\(\s*(\d+)\s*\)\s+setdest\s+(\S+)\s+(\S+)\s+(\S+)\s*"\s*$'
+)
 
 
 @dataclass
@@ -43,186 +29,66 @@ class Ns2Entry:
 
 
 class Ns2Parser:
-    """ns2 parser"""
+    """ns2 parser, parsing the file line by line"""
 
     def __init__(self, content: str):
-        self._tokens = self._scan(content)
-        self._current_index = 0
-        self._current_token = self._tokens[0]
-        self._next_token = self._tokens[1]
-
-    @staticmethod
-    def _scan(text: str) -> List[str]:
-        """splits the ns2 file into tokens"""
-        tmp: List[str] = text.split(" ")
-        tokens: List[str] = []
-        for token in tmp:
-            substr_index = 0
-            for i in range(1, len(token)):
-                last_symbol = token[i - 1]
-                current_symbol = token[i]
-                if (
-                    (last_symbol in TOKENS and current_symbol in digits)
-                    or (last_symbol in digits and current_symbol in TOKENS)
-                    or (current_symbol in TOKENS)
-                    or (last_symbol in TOKENS)
-                ):
-                    tokens.append(token[substr_index:i])
-                    substr_index = i
-            tokens.append(token[substr_index:])
-        return list(filter(lambda tok: tok != "", tokens))
-
-    def _check(self, tokens: Union[Token, List[Token]]) -> bool:
-        """
-        checks if the current token is the given token(s) and returns true in that case
-        @param tokens: either a token or a list of tokens to check for
-        """
-        if not isinstance(tokens, list):
-            tokens = [tokens]
-        values = [t.value for t in tokens]
-        return self._current_token in values
-
-    def _accept(self, tokens: Union[Token, List[Token]] = None):
-        """
-        accepts the current token, optionally with a condition
-        @param tokens: either a token, a list of tokens or none if any token should be accepted
-        """
-        if tokens is not None:
-            if not isinstance(tokens, list):
-                tokens = [tokens]
-            if not self._check(tokens):
-                # if the current token is not one of the given tokens
-                raise Exception(
-                    f"expected {', '.join([token.value for token in tokens])} - got {self._current_token}"
-                )
-        # select new current token
-        self._current_index += 1
-        self._current_token = self._tokens[self._current_index]
-        next_index = self._current_index + 1
-        self._next_token = (
-            self._tokens[next_index] if next_index < len(self._tokens) else None
-        )
+        self._lines = content.splitlines()
 
     def parse(self) -> List[Ns2Entry]:
         """parses the file and returns a list of ns2 entries"""
-        # parse the first row
-        entries = [self._parse_row()]
-        # as long as a newline and a next token exists
-        while self._check(Token.NEWLINE) and self._next_token is not None:
-            self._accept()
-            # skip commented rows
-            if self._check(Token.HASH):
-                self._skip_until_newline()
+        entries = []
+        for number, line in enumerate(self._lines, 1):
+            line = line.strip()
+            # skip empty and commented rows
+            if line == "" or line.startswith("#"):
                 continue
-            # parse the row
-            entry = self._parse_row()
-            if entry is not None:
-                entries.append(entry)
+            match = DEST_ROW.match(line)
+            if match is not None:
+                time, node, x, y, speed = match.groups()
+                entries.append(
+                    Ns2Entry(
+                        node=int(node),
+                        time=float(time),
+                        x=float(x),
+                        y=float(y),
+                        speed=float(speed),
+                    )
+                )
+                continue
+            match = INIT_ROW.match(line)
+            if match is not None:
+                node, coordinate, value = match.groups()
+                value = float(value)
+                # rows setting the z coordinate are skipped
+                if coordinate == "X":
+                    entries.append(Ns2Entry(node=int(node), x=value, is_init=True))
+                elif coordinate == "Y":
+                    entries.append(Ns2Entry(node=int(node), y=value, is_init=True))
+                continue
+            raise Exception(
+                f"line {number}: entries either have to be of the form "
+                f'$node_(<id>) set <X|Y|Z>_ <value> or $ns_ at <time> "$node_(<id>) '
+                f'setdest <x> <y> <speed>" - got {line}'
+            )
         return entries
 
-    def _skip_until_newline(self):
-        while not self._check(Token.NEWLINE):
-            self._accept()
-
-    def _parse_row(self) -> Ns2Entry:
-        """parses a ns2 row"""
-        # row starts with $node
-        if self._check(Token.NODE):
-            return self._parse_init_row()
-        # row starts with $ns
-        if self._check(Token.NS):
-            return self._parse_default_row()
-        raise Exception(
-            f"entries either have to start with {Token.NODE.value} or {Token.NS.value}"
-        )
 
-    def _parse_init_row(self) -> Union[Ns2Entry, None]:
-        """parses a row of the form $node_(<node_id>) set <coordinate>_ <value>"""
-        # initialize entry with node number
-        entry = Ns2Entry(node=self._parse_node(), is_init=True)
-        self._accept(Token.SET)
-        # skip z row
-        if self._skip_row():
-            return None
-        # parse and set the coordinate
-        self._parse_coordinate(entry)
-        return entry
-
-    def _skip_row(self) -> bool:
-        """skips rows setting the z coordinate and returns True if the row has been skipped"""
-        if not self._check(Token.Z):
-            return False
-        # if row is skipped, accept all remaining tokens of the row
-        self._accept()
-        self._accept(Token.UNDERLINE)
-        self._parse_float()
-        return True
-
-    def _parse_default_row(self) -> Ns2Entry:
-        """parses a row of the format $ns_ at <time> "\$node_(<node_id>) setdest <x> <y> <speed>" """
-        self._accept(Token.NS)
-        self._accept(Token.UNDERLINE)
-        self._accept(Token.AT)
-        # parse the time
-        time = self._parse_float()
-        self._accept(Token.QUOTE)
-        # the one generated ns2 code uses a backslash here
-        if self._check(Token.BACKSLASH):
-            self._accept(Token.BACKSLASH)
-        # parse the node
-        node = self._parse_node()
-        self._accept(Token.SET_DEST)
-        # parse coordinates and the speed
-        x = self._parse_float()
-        y = self._parse_float()
-        speed = self._parse_float()
-        self._accept(Token.QUOTE)
-        # build and return an entry based on parsed data
-        return Ns2Entry(node=node, time=time, x=x, y=y, speed=speed)
-
-    def _parse_coordinate(self, entry: Ns2Entry):
-        """
-        parses a coordinate and sets it on an entry
-        @param entry: the entry to set the coordinate on
-        """
-        # check, if token is either x, y or z
-        if not self._check([Token.X, Token.Y, Token.Z]):
-            raise Exception(
-                f"expected {Token.X.value}, {Token.Y.value} or {Token.Z.value} - got {self._current_token}"
-            )
-        # save the coordinate (x,y,z)
-        coordinate = self._current_token
-        self._accept()
-        self._accept(Token.UNDERLINE)
-        # parse the coordinate value
-        value = self._parse_float()
-        # set either x or y value on entry - depending on the parsed coordinate
-        if coordinate == Token.X.value:
-            entry.x = value
-        else:
-            entry.y = value
-
-    def _parse_node(self) -> int:
-        """parses a node and returns the id"""
-        self._accept(Token.NODE)
-        self._accept(Token.UNDERLINE)
-        self._accept(Token.PARAN_LEFT)
-        # get node id
-        node = self._parse_int()
-        self._accept(Token.PARAN_RIGHT)
-        return node
-
-    def _parse_int(self) -> int:
-        """parses an integer"""
-        token = self._current_token
-        self._accept()
-        return int(token)
-
-    def _parse_float(self) -> float:
-        """parses a float"""
-        token = self._current_token
-        self._accept()
-        return float(token)
+class Ns2NodeMoves:
+    """the moves of a single node as columns"""
+
+    def __init__(self, node: int):
+        self.node = node
+        self.times = []
+        self.xs = []
+        self.ys = []
+
+    def append(self, time: float, x: float, y: float):
+        self.times.append(time)
+        self.xs.append(x)
+        self.ys.append(y)
+
+    def last(self) -> Tuple[float, float, float]:
+        return self.times[-1], self.xs[-1], self.ys[-1]
 
 
 class Ns2Movement:
@@ -236,41 +102,40 @@ class Ns2Movement:
 
     @classmethod
     def _get_init_coordinates(
-        cls, node: int, entries: List[Ns2Entry]
-    ) -> Tuple[float, float]:
+        cls, entries: List[Ns2Entry]
+    ) -> Dict[int, Tuple[float, float]]:
         """
-        returns the initial coordinates for a node set by the init entries
-        @param node: the node id
+        returns the initial coordinates of all nodes set by the init entries
         @param entries: entries to search in
         """
-        x = None
-        y = None
-        # get all init entries for the node
-        init_entries = list(filter(lambda e: e.is_init and e.node == node, entries))
-        for entry in init_entries:
-            # if entry has a x value, set x
-            if entry.x is not None:
-                x = entry.x
-            # if entry has a y value, set y
-            if entry.y is not None:
-                y = entry.y
-        return x, y
+        coordinates = {}
+        for entry in entries:
+            if entry.is_init:
+                x, y = coordinates.get(entry.node, (None, None))
+                # if entry has a x value, set x
+                if entry.x is not None:
+                    x = entry.x
+                # if entry has a y value, set y
+                if entry.y is not None:
+                    y = entry.y
+                coordinates[entry.node] = (x, y)
+        return coordinates
 
     @classmethod
     def _get_initial_until(
         cls,
+        node_moves: Ns2NodeMoves,
         start: int,
         until: float,
-        node: int,
         x: float,
         y: float,
         end_time: float = None,
-    ) -> List:
+    ):
         """
-        returns a list of initial moves from a start time until a given time
+        appends the initial moves from a start time until a given time
+        @param node_moves: the moves of the node
         @param start: start time
         @param until: time until the moves should be added
-        @param node: the node id
         @param x: the x coordinate
         @param y: the y coordinate
         @param end_time: the optional end time of the simulation
@@ -279,19 +144,17 @@ class Ns2Movement:
         if end_time is not None:
             until = min(until, end_time)
         if until < start:
-            return [(start, node, x, y)]
-        moves = [
-            (float(time), node, x, y) for time in range(start, math.floor(until) + 1)
-        ]
+            node_moves.append(start, x, y)
+            return
+        for time in range(start, math.floor(until) + 1):
+            node_moves.append(float(time), x, y)
         # add exact time until move
-        moves.append((until, node, x, y))
-        return moves
+        node_moves.append(until, x, y)
 
     @classmethod
     def _get_moves_for_entry(
         cls,
-        node: int,
-        node_moves,
+        node_moves: Ns2NodeMoves,
         entry: Ns2Entry,
         next_entry: Ns2Entry,
         start_time: float = None,
@@ -299,21 +162,29 @@ class Ns2Movement:
     ):
         """
         generates moves for an entry and appends it to node_moves
-        @param node: the node to generate for
-        @param node_moves: the already generated node_moves
+        @param node_moves: the already generated moves of the node
         @param entry: the ns2 entry to generate moves for
+        @param next_entry: the next entry of the node or None
+        @param start_time: the optional start time of the simulation
         @param end_time: the optional end time of the simulation
         """
         # only append moves if end_time is not surpassed
         if end_time is not None and entry.time >= end_time:
-            return node_moves
-        current_pos = Vector(node_moves[-1][2], node_moves[-1][3])
-        target = Vector(entry.x, entry.y)
+            return
+        _, current_x, current_y = node_moves.last()
+        delta_x = entry.x - current_x
+        delta_y = entry.y - current_y
+        distance = math.sqrt((delta_x**2) + (delta_y**2))
         # vector the simulation should move forward in one time step
-        direction = (target - current_pos).normalize() * entry.speed
+        if delta_x == 0 and delta_y == 0:
+            direction_x = delta_x * entry.speed
+            direction_y = delta_y * entry.speed
+        else:
+            direction_x = delta_x / distance * entry.speed
+            direction_y = delta_y / distance * entry.speed
 
         # time of arrival at target
-        target_time = abs(target - current_pos) / entry.speed
+        target_time = distance / entry.speed
 
         # first integer time
         first_full = math.ceil(entry.time)
@@ -322,9 +193,10 @@ class Ns2Movement:
         # step from entry start time until first integer time
         first_step = first_full - entry.time
         # calculate next position
-        next = current_pos + first_step * direction
+        next_x = current_x + direction_x * first_step
+        next_y = current_y + direction_y * first_step
         # append move
-        node_moves.append((first_full, node, next.x, next.y))
+        node_moves.append(first_full, next_x, next_y)
 
         # get last integer move
         # if no next entry, move until destination is reached
@@ -337,23 +209,35 @@ class Ns2Movement:
             until = min(until, end_time - 1)
         last_full = math.floor(until)
 
-        # for each time step from first int move to last int move
-        for time in range(first_full, last_full + 1):
-            # only move forward, if the time is not greater than the target time
-            if time < entry.time + target_time:
-                # calculate new position
-                current_pos = Vector(node_moves[-1][2], node_moves[-1][3])
-                next = current_pos + direction
-            # append move
-            node_moves.append((time, node, next.x, next.y))
-
-        current_pos = Vector(node_moves[-1][2], node_moves[-1][3])
+        # one move for each time step from first int move to last int move,
+        # moving forward as long as the time is before the target time
+        steps = last_full - first_full + 1
+        if steps > 0:
+            arrival = entry.time + target_time
+            moving = max(0, min(steps, math.ceil(arrival) - first_full))
+            xs = np.empty(steps + 1)
+            ys = np.empty(steps + 1)
+            xs[0] = next_x
+            ys[0] = next_y
+            xs[1 : moving + 1] = direction_x
+            ys[1 : moving + 1] = direction_y
+            np.add.accumulate(xs[: moving + 1], out=xs[: moving + 1])
+            np.add.accumulate(ys[: moving + 1], out=ys[: moving + 1])
+            xs[moving + 1 :] = xs[moving]
+            ys[moving + 1 :] = ys[moving]
+            node_moves.times.extend(range(first_full, last_full + 1))
+            node_moves.xs.extend(xs[1:].tolist())
+            node_moves.ys.extend(ys[1:].tolist())
+            next_x = node_moves.xs[-1]
+            next_y = node_moves.ys[-1]
+
         # step from start time of next entry until last integer time
         last_step = until - last_full
         if last_step != 0 and until >= start_time:
             # calculate next time and append move
-            next = current_pos + last_step * direction
-            node_moves.append((until, node, next.x, next.y))
+            next_x = next_x + direction_x * last_step
+            next_y = next_y + direction_y * last_step
+            node_moves.append(until, next_x, next_y)
 
         # fill up until end_time
         if (
@@ -363,18 +247,21 @@ class Ns2Movement:
             and end_time >= start_time
         ):
             for time in range(last_full + 1, end_time):
-                node_moves.append((time, node, next.x, next.y))
+                node_moves.append(time, next_x, next_y)
 
     @classmethod
-    def _fill_up_until_end(cls, nodes, moves, end_time: float):
-        for node in nodes:
-            node_moves = [move for move in moves if move[1] == node]
-            last_move = node_moves[-1]
-            last_int = math.floor(end_time)
-            for time in range(math.ceil(last_move[0]), last_int + 1):
-                moves.append((time, node, last_move[2], last_move[3]))
-            if last_int != end_time:
-                moves.append((end_time, node, last_move[2], last_move[3]))
+    def _fill_up_until_end(cls, node_moves: Ns2NodeMoves, end_time: float):
+        """
+        appends moves at the last position of a node until the end time
+        @param node_moves: the moves of the node
+        @param end_time: the end time
+        """
+        last_time, last_x, last_y = node_moves.last()
+        last_int = math.floor(end_time)
+        for time in range(math.ceil(last_time), last_int + 1):
+            node_moves.append(time, last_x, last_y)
+        if last_int != end_time:
+            node_moves.append(end_time, last_x, last_y)
 
     @classmethod
     def _get_moves(cls, entries, start_time: float = None, end_time: float = None):
@@ -389,51 +276,70 @@ class Ns2Movement:
             start_time = min(
                 0, math.floor(min(entry.time for entry in entries if not entry.is_init))
             )
-        # if end_time is None:
-        #    math.floor(max(entry.time for entry in entries if not entry.is_init))
         nodes = set(entry.node for entry in entries)
-        moves = []
 
-        # create dict assigning entries to nodes
+        # assign entries to nodes in a single pass
         non_init_entries = sorted(
             list(filter(lambda e: not e.is_init, entries)), key=lambda e: e.time
         )
         entry_dict = {node: [] for node in nodes}
         for entry in non_init_entries:
             entry_dict[entry.node].append(entry)
+        init_coordinates = cls._get_init_coordinates(entries)
 
         # for every node
+        all_moves = []
         for node in nodes:
-            node_moves = []
+            node_moves = Ns2NodeMoves(node)
             node_entries = entry_dict[node]
             # get initial coordinates
-            x, y = cls._get_init_coordinates(node, entries)
+            x, y = init_coordinates.get(node, (None, None))
             # fill moves with init coordinates until first entry
-            node_moves += cls._get_initial_until(
-                start_time, entry_dict[node][0].time, node, x, y, end_time
+            cls._get_initial_until(
+                node_moves, start_time, node_entries[0].time, x, y, end_time
             )
             # for every entry except last one
             for i in range(0, len(node_entries) - 1):
-                # get current and next entry
-                current_entry = node_entries[i]
-                next_entry = node_entries[i + 1]
-
                 cls._get_moves_for_entry(
-                    node, node_moves, current_entry, next_entry, start_time, end_time
+                    node_moves,
+                    node_entries[i],
+                    node_entries[i + 1],
+                    start_time,
+                    end_time,
                 )
-
-            last_entry = node_entries[-1]
             cls._get_moves_for_entry(
-                node, node_moves, last_entry, None, start_time, end_time
+                node_moves, node_entries[-1], None, start_time, end_time
             )
+            all_moves.append(node_moves)
 
-            moves += node_moves
-        # build class from num_nodes, moves, min and max time
-        max_time = max(move[0] for move in moves)
+        max_time = max(max(moves.times) for moves in all_moves)
         if end_time is not None:
             max_time = end_time - 1
-        cls._fill_up_until_end(nodes, moves, max_time)
-        return cls(len(nodes), sorted(moves, key=lambda m: m[0]), start_time, max_time)
+
+        # the fill up moves follow the moves of all nodes
+        fill_moves = []
+        for node_moves in all_moves:
+            fill = Ns2NodeMoves(node_moves.node)
+            fill.append(*node_moves.last())
+            cls._fill_up_until_end(fill, max_time)
+            fill.times.pop(0)
+            fill.xs.pop(0)
+            fill.ys.pop(0)
+            fill_moves.append(fill)
+
+        # stable sort by time, just like sorting the list of all moves
+        groups = all_moves + fill_moves
+        times = np.concatenate([np.array(m.times, dtype=float) for m in groups])
+        nodes_column = np.concatenate(
+            [np.full(len(m.times), m.node, dtype=np.int32) for m in groups]
+        )
+        xs = np.concatenate([np.array(m.xs, dtype=float) for m in groups])
+        ys = np.concatenate([np.array(m.ys, dtype=float) for m in groups])
+        order = np.argsort(times, kind="stable")
+        moves = MovementTrace.from_columns(
+            times[order], nodes_column[order], xs[order], ys[order], 0.0, sort=False
+        )
+        return cls(len(nodes), moves, start_time, max_time)
 
     @classmethod
     def from_file(cls, path: str, start_time: float = None, end_time: float = None):
@@ -444,12 +350,22 @@ class Ns2Movement:
         @param end_time: optional end time of the simulation
             (if none is given, the simulation runs until every nodes have reached their destination)
         """
-        # read and parse file
-        with open(path, "r") as file:
-            content = file.read()
-            entries = Ns2Parser(content).parse()
-        # get moves
-        moves = cls._get_moves(entries, start_time, end_time)
-        # append z = 0 to every move
-        moves.moves = [(time, node, x, y, 0) for time, node, x, y in moves.moves]
-        return moves
+
+        def parse():
+            # read and parse file
+            with open(path, "r") as file:
+                content = file.read()
+                entries = Ns2Parser(content).parse()
+            # get moves, every move has z = 0
+            movement = cls._get_moves(entries, start_time, end_time)
+            info = {
+                "num_nodes": movement.num_nodes,
+                "start": movement.start,
+                "end": movement.end,
+            }
+            return movement.moves, info
+
+        moves, info = cached_trace(
+            path, "ns2", parse, start_time=start_time, end_time=end_time
+        )
+        return cls(info["num_nodes"], moves, info["start"], info["end"])
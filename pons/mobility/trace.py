@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from typing import Iterable, Iterator, Tuple, Union
+
+import numpy as np
+
+MOVE_DTYPE = np.dtype(
+    [("time", "f8"), ("node", "i4"), ("x", "f8"), ("y", "f8"), ("z", "f8")]
+)
+
+Move = Tuple[float, int, float, float, float]
+
+
+class MovementTrace(object):
+    """
+    A compact, columnar movement trace.
+
+    The moves (time, node, x, y, z) are stored in a numpy structured array in
+    the order in which they are replayed (sorted by time). Indexing and
+    iterating still return tuples, so a trace can be used wherever a list of
+    moves is expected.
+    """
+
+    def __init__(self, data: np.ndarray = None):
+        if data is None:
+            data = np.zeros(0, dtype=MOVE_DTYPE)
+        self.data = data
+
+    def __str__(self):
+        return "MovementTrace(%d moves, %d nodes)" % (len(self), self.num_nodes)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, idx: Union[int, slice]) -> Union[Move, MovementTrace]:
+        if isinstance(idx, (int, np.integer)):
+            return self.data[idx].item()
+        return MovementTrace(self.data[idx])
+
+    def __iter__(self) -> Iterator[Move]:
+        # convert in chunks, so the whole trace never exists as tuples
+        chunk_size = 65536
+        for start in range(0, len(self.data), chunk_size):
+            yield from self.data[start : start + chunk_size].tolist()
+
+    @property
+    def num_nodes(self) -> int:
+        if len(self.data) == 0:
+            return 0
+        return int(self.data["node"].max()) + 1
+
+    @classmethod
+    def from_list(cls, moves: Iterable[Move]) -> MovementTrace:
+        """Creates a trace from (time, node, x, y, z) tuples, keeping their order."""
+        if isinstance(moves, MovementTrace):
+            return moves
+        return cls(np.array(list(moves), dtype=MOVE_DTYPE).reshape(-1))
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[MovementTrace]) -> MovementTrace:
+        """Concatenates the chunks of a streamed trace."""
+        data = [chunk.data for chunk in chunks]
+        if len(data) == 0:
+            return cls()
+        return cls(np.concatenate(data))
+
+    @classmethod
+    def from_columns(cls, time, node, x, y, z, sort: bool = True) -> MovementTrace:
+        """
+        Creates a trace from one sequence per column. If sort is True, the
+        moves are sorted by time and node.
+        """
+        data = np.zeros(len(time), dtype=MOVE_DTYPE)
+        data["time"] = time
+        data["node"] = node
+        data["x"] = x
+        data["y"] = y
+        data["z"] = z
+        if sort:
+            data = data[np.lexsort((data["node"], data["time"]))]
+        return cls(data)
+
+
+class MovementSource(object):
+    """
+    Base class for movements that produce their moves chunk by chunk while
+    the simulation advances, instead of holding a whole trace in memory.
+    """
+
+    def chunks(self) -> Iterator[MovementTrace]:
+        """Returns the moves as consecutive chunks in replay order."""
+        raise NotImplementedError()
+
+    def __iter__(self) -> Iterator[Move]:
+        for chunk in self.chunks():
+            yield from chunk
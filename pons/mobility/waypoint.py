@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import math
+import random
+from array import array
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from pons.mobility.trace import MovementSource, MovementTrace
+
+
+class RandomWaypointMovement(MovementSource):
+    """
+    Random waypoint movement that only stores the legs of every node.
+
+    Draws the same random numbers as generate_randomwaypoint_movement, so
+    with the same seed it replays exactly the same moves. Positions are only
+    computed when they are needed: chunk by chunk while the simulation
+    replays the movement, or for single nodes with position().
+    """
+
+    def __init__(
+        self,
+        duration,
+        num_nodes,
+        width,
+        height,
+        min_speed=1.0,
+        max_speed=5.0,
+        min_pause=0,
+        max_pause=120,
+        chunk_duration: float = 60.0,
+    ):
+        self.duration = duration
+        self.num_nodes = num_nodes
+        self.width = width
+        self.height = height
+        self.chunk_duration = chunk_duration
+
+        start_x = array("d")
+        start_y = array("d")
+        # the legs of all nodes, node by node: a leg starts at start_time at
+        # (x, y) after the pause and takes one step per second
+        leg_node = array("i")
+        leg_start = array("d")
+        leg_x = array("d")
+        leg_y = array("d")
+        leg_step_x = array("d")
+        leg_step_y = array("d")
+        leg_steps = array("i")
+        leg_end_x = array("d")
+        leg_end_y = array("d")
+        for i in range(num_nodes):
+            cur_time = 0.0
+            x = random.randint(0, width)
+            y = random.randint(0, height)
+            start_x.append(x)
+            start_y.append(y)
+            while cur_time < duration:
+                way_x = random.randint(0, width)
+                way_y = random.randint(0, height)
+                speed = random.random() * (max_speed - min_speed) + min_speed
+                pause = random.randint(min_pause, max_pause)
+                cur_time += pause
+                dist = math.sqrt((way_x - x) ** 2 + (way_y - y) ** 2)
+                time = dist / speed
+                steps = 0
+                if cur_time < duration:
+                    # the generator stops a leg once cur_time + j >= duration
+                    steps = min(int(time), math.ceil((duration - cur_time) / 2))
+                if steps == 0:
+                    continue
+                step_x = (way_x - x) / time
+                step_y = (way_y - y) / time
+                leg_node.append(i)
+                leg_start.append(cur_time)
+                leg_x.append(x)
+                leg_y.append(y)
+                leg_step_x.append(step_x)
+                leg_step_y.append(step_y)
+                leg_steps.append(steps)
+                x, y = _walk(x, y, step_x, step_y, steps)[-1].tolist()
+                leg_end_x.append(x)
+                leg_end_y.append(y)
+                cur_time += steps
+
+        self.start_x = np.array(start_x)
+        self.start_y = np.array(start_y)
+        self.leg_node = np.array(leg_node, dtype=np.int32)
+        self.leg_start = np.array(leg_start)
+        self.leg_x = np.array(leg_x)
+        self.leg_y = np.array(leg_y)
+        self.leg_step_x = np.array(leg_step_x)
+        self.leg_step_y = np.array(leg_step_y)
+        self.leg_steps = np.array(leg_steps, dtype=np.int64)
+        self.leg_end_x = np.array(leg_end_x)
+        self.leg_end_y = np.array(leg_end_y)
+        # legs of node i are leg_offsets[i]:leg_offsets[i + 1]
+        self.leg_offsets = np.searchsorted(self.leg_node, np.arange(num_nodes + 1))
+
+    def __str__(self):
+        return "RandomWaypointMovement(%d, %d, %d, %d, %d legs)" % (
+            self.duration,
+            self.num_nodes,
+            self.width,
+            self.height,
+            len(self.leg_start),
+        )
+
+    def _walk_leg(self, idx: int, steps: int) -> np.ndarray:
+        return _walk(
+            self.leg_x[idx],
+            self.leg_y[idx],
+            self.leg_step_x[idx],
+            self.leg_step_y[idx],
+            steps,
+        )
+
+    def position(self, node_id: int, time: float) -> Tuple[float, float, float]:
+        """Returns the position of a node at a time, as set by replaying the moves."""
+        first = self.leg_offsets[node_id]
+        last = self.leg_offsets[node_id + 1]
+        # the last leg whose first step was taken at or before time
+        idx = first + np.searchsorted(self.leg_start[first:last] + 1, time, "right")
+        if idx == first:
+            return float(self.start_x[node_id]), float(self.start_y[node_id]), 0.0
+        idx -= 1
+        steps = min(int(math.floor(time - self.leg_start[idx])), self.leg_steps[idx])
+        x, y = self._walk_leg(idx, steps)[-1].tolist()
+        return x, y, 0.0
+
+    def trace(self) -> MovementTrace:
+        """Computes all moves at once, sorted by time and node."""
+        steps = self.leg_steps
+        legs = np.repeat(np.arange(len(steps)), steps)
+        # number of the step within its leg
+        step_idx = np.arange(len(legs)) - np.repeat(np.cumsum(steps) - steps, steps)
+        times = np.concatenate(
+            (np.zeros(self.num_nodes), self.leg_start[legs] + step_idx + 1)
+        )
+        nodes = np.concatenate((np.arange(self.num_nodes), self.leg_node[legs]))
+
+        # the steps of a node are summed up one after the other starting at
+        # its start position, exactly like the generator moves the node
+        xs = np.concatenate((self.start_x, self.leg_step_x[legs]))
+        ys = np.concatenate((self.start_y, self.leg_step_y[legs]))
+        bounds = np.searchsorted(self.leg_node[legs], np.arange(self.num_nodes + 1))
+        for i in range(self.num_nodes):
+            first = self.num_nodes + bounds[i]
+            last = self.num_nodes + bounds[i + 1]
+            for values, start in ((xs, self.start_x[i]), (ys, self.start_y[i])):
+                if last > first:
+                    values[first] += start
+                    np.add.accumulate(values[first:last], out=values[first:last])
+        # the moves are grouped by node in ascending node order, so a stable
+        # sort by time also sorts by node, and it runs on presorted runs
+        order = np.argsort(times, kind="stable")
+        return MovementTrace.from_columns(
+            times[order], nodes[order], xs[order], ys[order], 0.0, sort=False
+        )
+
+    def chunks(self) -> Iterator[MovementTrace]:
+        """Computes the moves window by window of chunk_duration seconds."""
+        # legs in the order of their first step
+        order = np.lexsort((self.leg_node, self.leg_start))
+        next_leg = 0
+        active: List[Tuple[int, float, np.ndarray, np.ndarray]] = []
+        window_start = 0.0
+        first_window = True
+        while first_window or next_leg < len(order) or len(active) > 0:
+            window_end = window_start + self.chunk_duration
+            while (
+                next_leg < len(order)
+                and self.leg_start[order[next_leg]] + 1 < window_end
+            ):
+                idx = order[next_leg]
+                positions = self._walk_leg(idx, self.leg_steps[idx])[1:]
+                active.append(
+                    (
+                        self.leg_node[idx],
+                        self.leg_start[idx] + 1,
+                        positions[:, 0],
+                        positions[:, 1],
+                    )
+                )
+                next_leg += 1
+
+            times = []
+            nodes = []
+            xs = []
+            ys = []
+            if first_window:
+                times.append(np.zeros(self.num_nodes))
+                nodes.append(np.arange(self.num_nodes))
+                xs.append(self.start_x)
+                ys.append(self.start_y)
+                first_window = False
+            still_active = []
+            for leg in active:
+                node, first_time, leg_xs, leg_ys = leg
+                lo = max(0, math.ceil(window_start - first_time))
+                hi = min(len(leg_xs), math.ceil(window_end - first_time))
+                if hi > lo:
+                    times.append(first_time + np.arange(lo, hi, dtype=float))
+                    nodes.append(np.full(hi - lo, node))
+                    xs.append(leg_xs[lo:hi])
+                    ys.append(leg_ys[lo:hi])
+                if hi < len(leg_xs):
+                    still_active.append(leg)
+            active = still_active
+            window_start = window_end
+
+            if len(times) > 0:
+                yield MovementTrace.from_columns(
+                    np.concatenate(times),
+                    np.concatenate(nodes),
+                    np.concatenate(xs),
+                    np.concatenate(ys),
+                    0.0,
+                )
+
+    def breakpoints(self) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Returns the turning points (time, x, y, z) of every node: each node
+        waits at its position until a leg starts and then moves in a straight
+        line until the leg ends.
+        """
+        breakpoints = {}
+        for i in range(self.num_nodes):
+            first = self.leg_offsets[i]
+            last = self.leg_offsets[i + 1]
+            times = np.empty(1 + 2 * (last - first))
+            points = np.zeros((len(times), 3))
+            times[0] = 0.0
+            points[0, :2] = (self.start_x[i], self.start_y[i])
+            times[1::2] = self.leg_start[first:last]
+            times[2::2] = self.leg_start[first:last] + self.leg_steps[first:last]
+            points[1::2, 0] = self.leg_x[first:last]
+            points[1::2, 1] = self.leg_y[first:last]
+            points[2::2, 0] = self.leg_end_x[first:last]
+            points[2::2, 1] = self.leg_end_y[first:last]
+            breakpoints[i] = (times, points)
+        return breakpoints
+
+
+def _walk(x: float, y: float, step_x: float, step_y: float, steps: int) -> np.ndarray:
+    """
+    Returns the start and the positions after each step as (steps + 1, 2)
+    array, summed up one step at a time like the generator does.
+    """
+    values = np.empty((steps + 1, 2))
+    values[0] = (x, y)
+    values[1:] = (step_x, step_y)
+    return np.add.accumulate(values)
@@ -2,3 +2,6 @@ from .common import NetworkSettings, BROADCAST_ADDR
 from .plans import CommonContactPlan, Contact, ContactPlan
 from .plans.ion import IonContactPlan
 from .netplan import NetworkPlan
+from .spatial import SpatialGrid, SpatialIndex
+from .positions import PositionStore
+from .neighbors import NeighborService
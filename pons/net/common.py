@@ -1,4 +1,5 @@
 from __future__ import annotations
+from copy import deepcopy
 from pons.event_log import event_log
 from pons.net.plans import CommonContactPlan
 
@@ -47,6 +48,17 @@ class NetworkSettings(object):
         else:
             return "NetworkSettings(%s, %s)" % (self.name, self.contactplan)
 
+    def __deepcopy__(self, memo):
+        # contact plans can be huge and live updates of a plan have to reach
+        # all nodes, so all copies of the settings (one per node) share it
+        copy = self.__class__.__new__(self.__class__)
+        memo[id(self)] = copy
+        for key, value in self.__dict__.items():
+            if key != "contactplan":
+                value = deepcopy(value, memo)
+            setattr(copy, key, value)
+        return copy
+
     def start(self, netsim):
         self.env = netsim.env
 
@@ -0,0 +1,503 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Set, Tuple
+import logging
+
+import numpy as np
+
+from pons.event_log import event_log
+from pons.net.positions import PositionStore
+from pons.net.spatial import SpatialIndex
+
+if TYPE_CHECKING:
+    import pons
+    import pons.routing
+    from pons import Node
+
+logger = logging.getLogger(__name__)
+
+
+class NeighborService(object):
+    """
+    Computes the neighbors of all nodes once per tick and hands every router
+    its current peers.
+
+    Instead of every router polling its own neighbors, routers register with
+    the service. One simpy process per distinct scan interval refreshes the
+    adjacency of all nodes (only if something changed since the last refresh)
+    and then updates the peers of all routers of that interval.
+    """
+
+    def __init__(self, netsim: pons.NetSim, positions: Optional[PositionStore] = None):
+        self.netsim = netsim
+        self.env = netsim.env
+        self.nodes: Dict[int, Node] = netsim.nodes
+        self.spatial_index = SpatialIndex(self.nodes.values())
+        self.order: Dict[int, int] = self.spatial_index.order
+        # with a position store range checks run vectorized instead of
+        # through the grid index
+        self.positions = positions
+        self.routers: Dict[float, List[pons.routing.Router]] = {}
+        self.registered: Dict[int, pons.routing.Router] = {}
+        # contact plans make neighbors depend on the time, not only on positions
+        self.time_dependent = any(
+            net.contactplan is not None
+            for n in self.nodes.values()
+            for net in n.net.values()
+        )
+        # networks in which all nodes use the same range, links there are
+        # symmetric and can be maintained incrementally for moved nodes
+        ranges: Dict[str, Set[float]] = {}
+        for n in self.nodes.values():
+            for net in n.net.values():
+                if net.contactplan is None:
+                    ranges.setdefault(net.name, set()).add(net.range)
+        self.symmetric_nets = set(name for name, r in ranges.items() if len(r) == 1)
+        self.range_nets = list(ranges)
+        self.plan_nets = set(
+            net.name
+            for n in self.nodes.values()
+            for net in n.net.values()
+            if net.contactplan is not None
+        )
+        if positions is not None:
+            self._members = {name: self._net_members(name) for name in ranges}
+            # links of every range-based network as a boolean matrix over
+            # its members, used to find the links that changed
+            self._adjacency = {
+                name: np.zeros((len(m[0]), len(m[0])), dtype=bool)
+                for name, m in self._members.items()
+            }
+        # networks whose links are set by scheduled events instead of range checks
+        self.event_nets: Set[str] = set()
+        self.polled_nets: Optional[Set[str]] = None
+        self.moved: Set[int] = set()
+        self.full_refresh = True
+        self.last_update: Optional[float] = None
+
+    def __str__(self):
+        return "NeighborService(%d nodes, %d routers)" % (
+            len(self.nodes),
+            sum(len(r) for r in self.routers.values()),
+        )
+
+    def register(self, router: pons.routing.Router):
+        """Registers a router to get its peers every scan_interval."""
+        interval = router.scan_interval
+        if interval not in self.routers:
+            self.routers[interval] = []
+            self.env.process(self.scan(interval))
+        self.routers[interval].append(router)
+        self.registered[router.my_id] = router
+
+    def _net_members(self, name: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Returns the store rows, node ids and squared ranges of all nodes in a network."""
+        rows = []
+        range_sq = []
+        for n in self.nodes.values():
+            net = n.net.get(name)
+            if net is not None and net.contactplan is None:
+                rows.append(self.positions.rows[n.node_id])
+                range_sq.append(net.range_sq)
+        rows = np.array(rows, dtype=np.int64)
+        return rows, self.positions.ids[rows], np.array(range_sq, dtype=float)
+
+    def node_moved(self, node: Node):
+        """Notifies the service that the position of a node changed."""
+        if self.positions is not None:
+            self.positions.update(node)
+        else:
+            self.spatial_index.update(node)
+        self.moved.add(node.node_id)
+
+    def invalidate(self):
+        """Forces a full refresh on the next update."""
+        if self.positions is not None:
+            for n in self.nodes.values():
+                self.positions.update(n)
+        else:
+            self.spatial_index.update_all()
+        self.full_refresh = True
+
+    def update(self, simtime: float):
+        """Refreshes the neighbors of all nodes that might have changed."""
+        if self.positions is not None:
+            self._update_vectorized(simtime)
+        else:
+            if self.time_dependent:
+                full = (
+                    self.full_refresh
+                    or len(self.moved) > 0
+                    or simtime != self.last_update
+                )
+            else:
+                full = self.full_refresh or self._asymmetric_moved()
+            if full:
+                nodes = self.nodes.values()
+                for n in nodes:
+                    n.calc_neighbors(
+                        simtime, nodes, self.spatial_index, self.polled_nets
+                    )
+            elif len(self.moved) > 0:
+                self._update_moved(simtime)
+        self.moved.clear()
+        self.full_refresh = False
+        self.last_update = simtime
+
+    def _asymmetric_moved(self) -> bool:
+        return any(
+            name not in self.symmetric_nets and name not in self.event_nets
+            for nid in self.moved
+            for name in self.nodes[nid].net
+        )
+
+    def _update_moved(self, simtime: float):
+        """
+        Re-evaluates only the pairs that involve a moved node, the neighbors
+        of all other pairs are carried over unchanged.
+        """
+        nodes = self.nodes
+        grids = self.spatial_index.grids
+        new_neighbors: Dict[Tuple[int, str], Set[int]] = {}
+
+        def neighbors_of(node_id: int, name: str) -> Set[int]:
+            key = (node_id, name)
+            if key not in new_neighbors:
+                new_neighbors[key] = set(nodes[node_id].neighbors[name])
+            return new_neighbors[key]
+
+        for node_id in self.moved:
+            node = nodes[node_id]
+            for name, net in node.net.items():
+                if name in self.event_nets:
+                    continue
+                mine = neighbors_of(node_id, name)
+                candidates = grids[net.range].nearby(node)
+                candidates.update(mine)
+                candidates.discard(node_id)
+                for other_id in candidates:
+                    other = nodes[other_id]
+                    if name not in other.net:
+                        continue
+                    theirs = neighbors_of(other_id, name)
+                    if net.has_contact(simtime, node, other):
+                        mine.add(other_id)
+                        theirs.add(node_id)
+                    else:
+                        mine.discard(other_id)
+                        theirs.discard(node_id)
+
+        self._apply(simtime, new_neighbors)
+
+    def _update_vectorized(self, simtime: float, chunk_size: int = 1024):
+        """
+        Range checks with the position store, either for all pairs of a
+        network or only for the nodes that moved.
+        """
+        store = self.positions
+        full = self.full_refresh or self._asymmetric_moved()
+        moved_rows = np.array([store.rows[nid] for nid in self.moved], dtype=np.int64)
+        new_neighbors: Dict[Tuple[int, str], Set[int]] = {}
+
+        for name in self.range_nets:
+            rows, ids, range_sq = self._members[name]
+            adjacency = self._adjacency[name]
+            if full:
+                selected = np.arange(len(rows))
+                changed = np.ones(len(rows), dtype=bool)
+            else:
+                selected = np.flatnonzero(np.isin(rows, moved_rows))
+                changed = np.zeros(len(rows), dtype=bool)
+            for start in range(0, len(selected), chunk_size):
+                chunk = selected[start : start + chunk_size]
+                in_range = store.dist_sq(rows[chunk], rows) <= range_sq[chunk, None]
+                # a node is never its own neighbor
+                in_range[np.arange(len(chunk)), chunk] = False
+                if not full:
+                    diff = in_range != adjacency[chunk]
+                    changed[chunk] |= diff.any(axis=1)
+                    changed |= diff.any(axis=0)
+                    # symmetric network, so the other side of every pair
+                    # changes as well
+                    adjacency[:, chunk] = in_range.T
+                adjacency[chunk] = in_range
+            for i in np.flatnonzero(changed).tolist():
+                new_neighbors[(int(ids[i]), name)] = set(ids[adjacency[i]].tolist())
+
+        self._apply(simtime, new_neighbors)
+
+        if self.time_dependent and (self.full_refresh or simtime != self.last_update):
+            all_nodes = self.nodes.values()
+            polled = self.plan_nets.difference(self.event_nets)
+            for n in all_nodes:
+                n.calc_neighbors(simtime, all_nodes, nets=polled)
+
+    def _apply(self, simtime: float, new_neighbors: Dict[Tuple[int, str], Set[int]]):
+        """Sets the new neighbors and logs all link changes in the same order as a full refresh."""
+        nodes = self.nodes
+        order = self.order
+        changes = []
+        for (node_id, name), ids in new_neighbors.items():
+            node = nodes[node_id]
+            old_ids = node.neighbors[name]
+            if len(old_ids) == len(ids) and ids.issuperset(old_ids):
+                continue
+            net_idx = list(node.net).index(name)
+            old_ids = set(old_ids)
+            for nid in ids - old_ids:
+                changes.append((order[node_id], net_idx, order[nid], "UP", name))
+            for nid in old_ids - ids:
+                changes.append((order[node_id], net_idx, order[nid], "DOWN", name))
+            node.neighbors[name] = sorted(ids, key=order.__getitem__)
+
+        if len(changes) > 0:
+            ids_by_order = list(order)
+            changes.sort()
+            for node_idx, _, other_idx, event, name in changes:
+                event_log(
+                    simtime,
+                    "LINK",
+                    {
+                        "event": event,
+                        "nodes": [ids_by_order[node_idx], ids_by_order[other_idx]],
+                        "net": name,
+                    },
+                )
+
+    def schedule_links(self, name: str, contacts: np.ndarray):
+        """
+        Sets the links of a range-based network from predicted contacts
+        (see pons.mobility.predict_contacts) instead of range checks. Each
+        link goes up at the start and down at the end of its contact.
+        """
+        self._set_event_driven([name])
+
+        # links of the contacts that are active right now
+        now = self.env.now
+        initial = {
+            (n.node_id, name): set() for n in self.nodes.values() if name in n.net
+        }
+        active = contacts[(contacts["start"] <= now) & (contacts["end"] > now)]
+        for a, b in zip(active["a"].tolist(), active["b"].tolist()):
+            initial[(a, name)].add(b)
+            initial[(b, name)].add(a)
+        self._apply(now, initial)
+
+        # all later up and down events in time order, downs first
+        starts = contacts[contacts["start"] > now]
+        ends = contacts[(contacts["end"] > now) & np.isfinite(contacts["end"])]
+        times = np.concatenate((starts["start"], ends["end"]))
+        ups = np.repeat([True, False], [len(starts), len(ends)])
+        a = np.concatenate((starts["a"], ends["a"]))
+        b = np.concatenate((starts["b"], ends["b"]))
+        order = np.lexsort((ups, times))
+        self.env.process(
+            self._link_events(
+                name,
+                times[order].tolist(),
+                ups[order].tolist(),
+                a[order].tolist(),
+                b[order].tolist(),
+            )
+        )
+
+    def _set_event_driven(self, names: List[str]):
+        """Stops polling the links of the given networks."""
+        self.event_nets.update(names)
+        self.range_nets = [n for n in self.range_nets if n not in self.event_nets]
+        self.polled_nets = set(
+            net for n in self.nodes.values() for net in n.net
+        ).difference(self.event_nets)
+        self.time_dependent = len(self.plan_nets.difference(self.event_nets)) > 0
+
+    def schedule_plan_links(self):
+        """
+        Sets the links of all contact plan networks from the event timelines
+        of their plans instead of polling has_contact for all pairs. Links
+        only change at the starts and ends of contacts: a link is up from
+        the start of a contact until its end. Plans without a timeline
+        (next_event not implemented) are still polled.
+        """
+        now = self.env.now
+        # the nodes of every network that use the same plan
+        groups: Dict[Tuple[str, int], List[int]] = {}
+        plans: Dict[int, pons.CommonContactPlan] = {}
+        polled = set()
+        for n in self.nodes.values():
+            for name, net in n.net.items():
+                plan = net.contactplan
+                if plan is None:
+                    continue
+                if id(plan) not in plans:
+                    plans[id(plan)] = plan
+                    try:
+                        plan.next_event(now)
+                    except NotImplementedError:
+                        polled.add(id(plan))
+                groups.setdefault((name, id(plan)), []).append(n.node_id)
+        names = set(name for name, plan_id in groups).difference(
+            name for name, plan_id in groups if plan_id in polled
+        )
+        if len(names) == 0:
+            return
+        self._set_event_driven(names)
+
+        for plan_id, plan in plans.items():
+            sources = {
+                name: ids
+                for (name, p_id), ids in groups.items()
+                if p_id == plan_id and name in names
+            }
+            if len(sources) == 0:
+                continue
+            # the links right now are set immediately, all links might change
+            events = plan.events(now)
+            next_time = next(events, None)
+            self._update_plan_links(sources, None, _probe(now, next_time))
+            # also without events, contacts might be inserted later
+            self.env.process(self._plan_events(plan, sources, events, next_time))
+
+    def _plan_events(
+        self,
+        plan: pons.CommonContactPlan,
+        sources: Dict[str, List[int]],
+        events: Iterator[float],
+        next_time: Optional[float],
+    ):
+        """
+        Updates the links of the networks using a plan at all of its events.
+        Contacts inserted into or retracted from the plan wake the process
+        up: the links of their node pairs are updated right away and the
+        timeline continues from the current time with the changed plan.
+        """
+        changes: List[Tuple[int, int]] = []
+        wakeup = self.env.event()
+
+        def on_change(contact: pons.Contact, inserted: bool):
+            changes.append(tuple(contact.nodes))
+            if not wakeup.triggered:
+                wakeup.succeed()
+
+        plan.subscribe(on_change)
+        while True:
+            if next_time is None:
+                yield wakeup
+                due = False
+            else:
+                timeout = self.env.timeout(next_time - self.env.now)
+                yield timeout | wakeup
+                due = timeout.processed or next_time <= self.env.now
+            now = next_time if due else self.env.now
+            changed = plan.changed_links(now) if due else []
+            if wakeup.triggered:
+                if changed is not None:
+                    changed += changes
+                changes.clear()
+                wakeup = self.env.event()
+                events = plan.events(now)
+            next_time = next(events, None)
+            self._update_plan_links(sources, changed, _probe(now, next_time))
+
+    def _update_plan_links(
+        self,
+        sources: Dict[str, List[int]],
+        changed: Optional[List[Tuple[int, int]]],
+        probe: float,
+    ):
+        """
+        Re-evaluates the links of the given node pairs (all pairs if changed
+        is None) at probe time and hands the routers of all nodes whose
+        neighbors changed their new peers.
+        """
+        nodes = self.nodes
+        order = self.order
+        updated = set()
+        for name, ids in sources.items():
+            if changed is None:
+                pairs = [
+                    (node_id, other.node_id)
+                    for node_id in ids
+                    for other in nodes.values()
+                    if other.node_id != node_id and name in other.net
+                ]
+                for node_id in ids:
+                    nodes[node_id].neighbors[name] = []
+            else:
+                members = set(ids)
+                pairs = []
+                for a, b in changed:
+                    if a != b:
+                        pairs.append((a, b))
+                        pairs.append((b, a))
+                pairs = [
+                    (a, b)
+                    for a, b in pairs
+                    if a in members and b in nodes and name in nodes[b].net
+                ]
+            for node_id, other_id in pairs:
+                node = nodes[node_id]
+                up = node.net[name].has_contact(probe, node, nodes[other_id])
+                neighbors = node.neighbors[name]
+                if up == (other_id in neighbors):
+                    continue
+                if up:
+                    neighbors.append(other_id)
+                    neighbors.sort(key=order.__getitem__)
+                else:
+                    neighbors.remove(other_id)
+                updated.add(node_id)
+
+        for node_id in sorted(updated, key=order.__getitem__):
+            router = self.registered.get(node_id)
+            if router is not None:
+                peers = set()
+                for net in nodes[node_id].neighbors.values():
+                    peers.update(net)
+                router.update_peers(peers)
+
+    def _link_events(
+        self,
+        name: str,
+        times: List[float],
+        ups: List[bool],
+        a: List[int],
+        b: List[int],
+    ):
+        """Applies the scheduled link changes of a network at their times."""
+        nodes = self.nodes
+        idx = 0
+        while idx < len(times):
+            yield self.env.timeout(max(times[idx] - self.env.now, 0))
+            new_neighbors: Dict[Tuple[int, str], Set[int]] = {}
+            while idx < len(times) and times[idx] <= self.env.now:
+                for node_id, other_id in ((a[idx], b[idx]), (b[idx], a[idx])):
+                    key = (node_id, name)
+                    if key not in new_neighbors:
+                        new_neighbors[key] = set(nodes[node_id].neighbors[name])
+                    if ups[idx]:
+                        new_neighbors[key].add(other_id)
+                    else:
+                        new_neighbors[key].discard(other_id)
+                idx += 1
+            self._apply(self.env.now, new_neighbors)
+
+    def scan(self, interval: float):
+        """Peer discovery for all routers with the same scan interval."""
+        while True:
+            self.update(self.env.now)
+            for router in self.routers[interval]:
+                peers = set()
+                for net in self.nodes[router.my_id].neighbors.values():
+                    peers.update(net)
+                router.update_peers(peers)
+            yield self.env.timeout(interval)
+
+
+def _probe(time: float, next_time: Optional[float]) -> float:
+    """
+    Returns a time between an event and the next one. The links do not
+    change in between, so the links there are the links from the event on.
+    """
+    if next_time is None:
+        return time + 1.0
+    return (time + next_time) / 2
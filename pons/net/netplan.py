@@ -8,7 +8,7 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-from typing import TYPE_CHECKING, List, Tuple, Optional
+from typing import TYPE_CHECKING, Callable, List, Tuple, Optional
 
 from .plans import CommonContactPlan
 import pons
@@ -40,6 +40,12 @@ class NetworkPlan(CommonContactPlan):
             return self.contactplan.next_event(time)
         return None
 
+    def changed_links(self, time: float) -> Optional[List[Tuple[int, int]]]:
+        # the static links never change
+        if self.contactplan is not None:
+            return self.contactplan.changed_links(time)
+        return []
+
     def __eq__(self, value: object) -> bool:
         if not isinstance(value, NetworkPlan):
             logger.debug("Comparing NetworkPlan with non-NetworkPlan object")
@@ -117,7 +123,12 @@ class NetworkPlan(CommonContactPlan):
     def at(self, time: int) -> List[pons.Contact]:
         contacts = []
         if self.contactplan is not None:
-            contacts = self.contactplan.at(time)
+            # copy, the contact plan caches the list it returns
+            contacts = list(self.contactplan.at(time))
+        return contacts + self._static_contacts()
+
+    def _static_contacts(self) -> List[pons.Contact]:
+        contacts = []
         for e in self.G.edges():
             link_props = self.G.get_edge_data(*e, default={})
             # if no contact plan is set, we do not have a max duration, so we set it to sys.maxsize * 2 + 1
@@ -133,6 +144,20 @@ class NetworkPlan(CommonContactPlan):
             contacts.append(contact)
         return contacts
 
+    def subscribe(self, listener: Callable[[pons.Contact, bool], None]) -> None:
+        # the static links never change
+        if self.contactplan is not None:
+            self.contactplan.subscribe(listener)
+
+    def link_events(self, time: float) -> List[Tuple[str, pons.Contact]]:
+        events = []
+        if self.contactplan is not None:
+            events = list(self.contactplan.link_events(time))
+        if time == 0:
+            # the static links are up from the start
+            events += [("UP", c) for c in self._static_contacts()]
+        return events
+
     # return the loss for a contact between two nodes
     def loss_for_contact(self, simtime: float, node1: int, node2: int) -> float:
         if self.G.has_edge(node1, node2):
@@ -1,7 +1,12 @@
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Dict, List, Tuple, Optional
+from heapq import merge
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Tuple, Optional
 import logging
+import math
+import random
 
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -60,6 +65,41 @@ class CommonContactPlan(object):
     def next_event(self, time: int) -> Optional[int]:
         raise NotImplementedError()
 
+    def events(self, time: float = 0) -> Iterator[float]:
+        """Yields the times of all events after the given time in order."""
+        next_time = self.next_event(time)
+        while next_time is not None:
+            yield next_time
+            next_time = self.next_event(next_time)
+
+    def changed_links(self, time: float) -> Optional[List[Tuple[int, int]]]:
+        """
+        Returns the node pairs of all contacts starting or ending at the
+        given event time or None if any link might change.
+        """
+        return None
+
+    def subscribe(self, listener: Callable[[Contact, bool], None]) -> None:
+        """
+        Registers a function that is called with every contact inserted into
+        (True) or retracted from (False) the plan while it is in use. Plans
+        without live updates never call it.
+        """
+        pass
+
+    def link_events(self, time: float) -> List[Tuple[str, Contact]]:
+        """
+        Returns the contacts starting ("UP") or ending ("DOWN") at the given
+        event time.
+        """
+        events = []
+        for c in self.at(time):
+            if c.timespan[0] == time:
+                events.append(("UP", c))
+            if c.timespan[1] == time:
+                events.append(("DOWN", c))
+        return events
+
     def __eq__(self, value: object) -> bool:
         raise NotImplementedError()
 
@@ -77,30 +117,383 @@ class CommonContactPlan(object):
         raise NotImplementedError()
 
 
+# the columns of contacts stored column by column, a bandwidth of -1 means
+# that the contact has no bandwidth limit
+CONTACT_COLUMNS = {
+    "start": np.float64,
+    "end": np.float64,
+    "node1": np.int64,
+    "node2": np.int64,
+    "bw": np.int64,
+    "loss": np.float64,
+    "delay": np.float64,
+    "jitter": np.float64,
+    "fixed": np.bool_,
+}
+
+
+class ContactColumns(object):
+    """
+    A sequence of contacts stored column by column in numpy arrays, e.g.
+    memory-mapped from a binary contact plan. The Contact objects are only
+    created when they are accessed.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray]) -> None:
+        self.columns = columns
+
+    @classmethod
+    def from_contacts(cls, contacts: List[Contact]) -> "ContactColumns":
+        count = len(contacts)
+        values = {
+            "start": (c.timespan[0] for c in contacts),
+            "end": (c.timespan[1] for c in contacts),
+            "node1": (c.nodes[0] for c in contacts),
+            "node2": (c.nodes[1] for c in contacts),
+            "bw": (-1 if c.bw is None else c.bw for c in contacts),
+            "loss": (c.loss for c in contacts),
+            "delay": (c.delay for c in contacts),
+            "jitter": (c.jitter for c in contacts),
+            "fixed": (c.fixed for c in contacts),
+        }
+        return cls(
+            {
+                name: np.fromiter(values[name], dtype, count)
+                for name, dtype in CONTACT_COLUMNS.items()
+            }
+        )
+
+    def take(self, indices: np.ndarray) -> "ContactColumns":
+        """Returns the contacts at the given indices in their order."""
+        return ContactColumns(
+            {name: column[indices] for name, column in self.columns.items()}
+        )
+
+    def __len__(self) -> int:
+        return len(self.columns["start"])
+
+    def _contacts(self, start: int, stop: int) -> List[Contact]:
+        rows = [self.columns[name][start:stop].tolist() for name in CONTACT_COLUMNS]
+        starts, ends, node1, node2, bw, loss, delay, jitter, fixed = rows
+        bw = [None if b < 0 else b for b in bw]
+        return list(
+            map(
+                Contact,
+                zip(starts, ends),
+                zip(node1, node2),
+                bw,
+                loss,
+                delay,
+                jitter,
+                fixed,
+            )
+        )
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            start, stop, step = idx.indices(len(self))
+            return self._contacts(start, stop)[::step]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("contact index out of range")
+        return self._contacts(idx, idx + 1)[0]
+
+    def __iter__(self) -> Iterator[Contact]:
+        # the contacts are created in chunks to not hold all of them at once
+        for start in range(0, len(self), 65536):
+            yield from self._contacts(start, start + 65536)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ContactColumns):
+            return len(self) == len(other) and all(
+                np.array_equal(self.columns[name], other.columns[name])
+                for name in CONTACT_COLUMNS
+            )
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+
+def _running_max(values: np.ndarray, first: np.ndarray) -> np.ndarray:
+    """
+    Returns the running maximum of values, which restarts wherever first is
+    set. The ranks of the values are shifted by segment, so one running
+    maximum over all of them never crosses from one segment to the next.
+    """
+    unique, ranks = np.unique(values, return_inverse=True)
+    shift = (np.cumsum(first) - 1) * len(unique)
+    return unique[np.maximum.accumulate(ranks + shift) - shift]
+
+
+def max_end_tree(ends: np.ndarray) -> np.ndarray:
+    """
+    Returns a max segment tree over the end times of entries sorted by their
+    start time. The leaves are at size..2 * size - 1, the root at 1.
+    """
+    ends = np.asarray(ends, dtype=float)
+    size = 1
+    while size < len(ends):
+        size *= 2
+    level = np.full(size, -np.inf)
+    level[: len(ends)] = ends
+    levels = [level]
+    while len(level) > 1:
+        level = level.reshape(-1, 2).max(axis=1)
+        levels.append(level)
+    return np.concatenate([[-np.inf]] + levels[::-1])
+
+
+def active_in_tree(max_end: np.ndarray, count: int, time: float) -> List[int]:
+    """
+    Returns the positions of all entries of a max_end_tree among the first
+    count ones whose end is not before time, in start order.
+    """
+    active = []
+    stack = [(1, 0, len(max_end) // 2)]
+    while len(stack) > 0:
+        node, lo, hi = stack.pop()
+        if lo >= count or max_end[node] < time:
+            continue
+        if hi - lo == 1:
+            active.append(lo)
+            continue
+        mid = (lo + hi) // 2
+        # right child first, so the left one is visited first
+        stack.append((2 * node + 1, mid, hi))
+        stack.append((2 * node, lo, mid))
+    return active
+
+
+def contact_index(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    node1: np.ndarray,
+    node2: np.ndarray,
+    fixed: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """
+    Returns the arrays of the index of a contact plan for contacts sorted by
+    their start time:
+
+    - max_end is a max segment tree over the end times of the contacts.
+      The contacts active at a time are the ones among the contacts starting
+      until then whose end is not before it, so a query only descends into
+      subtrees that contain at least one of them.
+    - end_order and ends are the contacts in the order of their end times.
+    - timeline holds all distinct starts and ends of contacts, the times at
+      which the active contacts change.
+    - pair_order lists the contacts of every node pair in start order, the
+      pairs are pair_node1/pair_node2 and their contacts are the ones between
+      consecutive pair_offsets. pair_starts and pair_max_ends hold the start
+      times and the running maximum of the end times of these contacts.
+    - fixed holds the indices of all fixed contacts.
+    """
+    starts = np.asarray(starts, dtype=float)
+    ends = np.asarray(ends, dtype=float)
+    node1 = np.asarray(node1, dtype=np.int64)
+    node2 = np.asarray(node2, dtype=np.int64)
+    count = len(starts)
+    max_end = max_end_tree(ends)
+
+    end_order = np.argsort(ends, kind="stable")
+    pair_order = np.lexsort((np.arange(count), node2, node1))
+    pair_node1 = node1[pair_order]
+    pair_node2 = node2[pair_order]
+    first = np.ones(count, dtype=bool)
+    first[1:] = (pair_node1[1:] != pair_node1[:-1]) | (
+        pair_node2[1:] != pair_node2[:-1]
+    )
+    pair_offsets = np.append(np.flatnonzero(first), count)
+    pair_max_ends = _running_max(ends[pair_order], first)
+    return {
+        "max_end": max_end,
+        "end_order": end_order,
+        "ends": ends[end_order],
+        "timeline": np.unique(np.concatenate([starts, ends])),
+        "pair_order": pair_order,
+        "pair_starts": starts[pair_order],
+        "pair_max_ends": pair_max_ends,
+        "pair_node1": pair_node1[first],
+        "pair_node2": pair_node2[first],
+        "pair_offsets": pair_offsets,
+        "starts": starts,
+        "fixed": np.flatnonzero(fixed),
+    }
+
+
 class ContactPlan(CommonContactPlan):
     """
     A ContactPlan is a CommonContactPlan that can be used to create contacts.
     It is a factory for Contact objects.
+
+    Looping plans repeat their contacts every period, which is the end of the
+    last contact unless a period is given. Contacts may last beyond the
+    period, e.g. a pass of a satellite at the end of its orbit, and are then
+    still active at the start of the next period.
+
+    Contacts can be inserted and retracted while the plan is in use. The
+    index of the plan stays as it is: inserted contacts are kept in a small
+    plan of their own and retracted ones are skipped, until there are too
+    many pending changes and the index is rebuilt once for all of them.
     """
 
     def __init__(
-        self, contacts: List[Contact], loop: bool = False, symmetric: bool = False
+        self,
+        contacts: List[Contact] | ContactColumns,
+        loop: bool = False,
+        symmetric: bool = False,
+        period: Optional[float] = None,
     ) -> None:
+        if period is not None and period <= 0:
+            raise ValueError("The period of a contact plan must be positive.")
         self.contacts = contacts
-        self.loop = loop
+        self.loop = loop or period is not None
         self.symmetric = symmetric
-        self.last_at = -1
-        self.last_cache = []
-        self.last_next = (-1, 0)
-        self.last_idx = 0
+        self.period = period
+        self._init_updates()
         self.sort_contacts()
 
+    @classmethod
+    def from_index(
+        cls,
+        contacts: ContactColumns,
+        index: Dict[str, np.ndarray],
+        loop: bool = False,
+        symmetric: bool = False,
+        period: Optional[float] = None,
+    ) -> "ContactPlan":
+        """
+        Creates a plan from contacts sorted by start time and their index
+        (see contact_index). The arrays are used as they are, so a plan with
+        memory-mapped arrays opens without reading its contacts.
+        """
+        plan = cls.__new__(cls)
+        plan.contacts = contacts
+        plan.loop = loop or period is not None
+        plan.symmetric = symmetric
+        plan.period = period
+        plan._init_updates()
+        plan._use_index(index)
+        return plan
+
+    def _init_updates(self) -> None:
+        # the plan of the inserted contacts and the indices of the retracted ones
+        self._overlay: Optional[ContactPlan] = None
+        self._retracted: frozenset = frozenset()
+        # the number of starts and ends of retracted contacts at every time
+        self._dropped: Dict[float, int] = {}
+        self._listeners: List[Callable[[Contact, bool], None]] = []
+
     def sort_contacts(self) -> None:
         """
-        Sorts the contacts by their start time.
+        Sorts the contacts by their start time and rebuilds the index for at().
         """
+        if self._pending():
+            self.contacts = self._live_contacts()
+            self._overlay = None
+            self._retracted = frozenset()
+            self._dropped = {}
+        if isinstance(self.contacts, ContactColumns):
+            columns = self.contacts.columns
+            if np.any(np.diff(columns["start"]) < 0):
+                order = np.argsort(columns["start"], kind="stable")
+                self.contacts = self.contacts.take(order)
+                columns = self.contacts.columns
+            index = contact_index(
+                columns["start"],
+                columns["end"],
+                columns["node1"],
+                columns["node2"],
+                columns["fixed"],
+            )
+            self._use_index(index)
+            return
+
         self.contacts.sort(key=lambda c: c.timespan[0])
-        self.max_time = max((c.timespan[1] for c in self.contacts), default=0.0)
+        count = len(self.contacts)
+        index = contact_index(
+            np.fromiter((c.timespan[0] for c in self.contacts), float, count),
+            np.fromiter((c.timespan[1] for c in self.contacts), float, count),
+            np.fromiter((c.nodes[0] for c in self.contacts), np.int64, count),
+            np.fromiter((c.nodes[1] for c in self.contacts), np.int64, count),
+            np.fromiter((c.fixed for c in self.contacts), bool, count),
+        )
+        # queries on lists are faster than on arrays for plans in memory
+        self._use_index({name: array.tolist() for name, array in index.items()})
+
+    def _use_index(self, index: Dict[str, np.ndarray | List]) -> None:
+        """Sets up the queries of the plan on the arrays of its index."""
+        self._starts = index["starts"]
+        self._max_end = index["max_end"]
+        self._end_order = index["end_order"]
+        self._ends = index["ends"]
+        self._timeline = index["timeline"]
+        self._pair_order = index["pair_order"]
+        self._pair_starts = index["pair_starts"]
+        self._pair_max_ends = index["pair_max_ends"]
+        # the contacts of every node pair are the ones in pair_order between
+        # the two offsets of the pair
+        offsets = np.asarray(index["pair_offsets"]).tolist()
+        self._pairs: Dict[Tuple[int, int], Tuple[int, int]] = dict(
+            zip(
+                zip(
+                    np.asarray(index["pair_node1"]).tolist(),
+                    np.asarray(index["pair_node2"]).tolist(),
+                ),
+                zip(offsets[:-1], offsets[1:]),
+            )
+        )
+        self._fixed = index["fixed"]
+        self.max_time = float(self._ends[-1]) if len(self._ends) > 0 else 0.0
+        # no cached result yet
+        self.last_at = None
+        self.last_cache = []
+        self._use_period()
+
+    def _use_period(self) -> None:
+        """
+        Precomputes the timeline of one period of a looping plan: the phases
+        at which the active contacts change and the first time of every
+        phase, as contacts lasting beyond the period only change links in the
+        following periods.
+        """
+        period = self.max_time if self.period is None else self.period
+        self._period = period if self.loop and period > 0 else None
+        self._phases = []
+        self._phase_firsts = []
+        if self._period is None or len(self._timeline) == 0:
+            return
+        timeline = np.asarray(self._timeline, dtype=float)
+        # the timeline is sorted, so the first index of a phase is its first time
+        phases, first = np.unique(np.mod(timeline, self._period), return_index=True)
+        self._phases = phases.tolist()
+        self._phase_firsts = timeline[first].tolist()
+
+    def _plan_times(self, time: float, inclusive: bool = False) -> List[float]:
+        """
+        Maps a time to the times in the plan it corresponds to: its phase in
+        the period and, for contacts lasting beyond the period, the same phase
+        in the following periods of the plan. Contacts are active at the start
+        of a new period, but those of the old one still end at its boundary,
+        so with inclusive the boundary also maps to the end of the period and
+        of the plan for changes of links.
+        """
+        period = self._period
+        if period is None or (time <= period and not inclusive):
+            return [time]
+        phase = time % period
+        times = [phase]
+        t = phase + period
+        while t <= time and (t < self.max_time or (inclusive and t == self.max_time)):
+            times.append(t)
+            t = phase + (len(times) * period)
+        return times
+
+    def _active(self, time: float) -> List[int]:
+        """Returns the indices of all contacts active at time in start order."""
+        count = bisect_right(self._starts, time)
+        return active_in_tree(self._max_end, count, time)
 
     def get_max_time(self) -> int:
         """Returns the maximum time in the contact plan."""
@@ -110,126 +503,359 @@ class ContactPlan(CommonContactPlan):
         if not isinstance(other, ContactPlan):
             return False
         return (
-            self.contacts == other.contacts
+            list(self.raw_contacts()) == list(other.raw_contacts())
             and self.loop == other.loop
             and self.symmetric == other.symmetric
+            and self.period == other.period
         )
 
     def raw_contacts(self) -> List[Contact]:
         """
         Returns a list of all contacts in the contact plan.
         """
+        if self._pending():
+            return self._live_contacts()
         return self.contacts
 
     def __hash__(self) -> int:
-        return hash((tuple(self.contacts), self.loop, self.symmetric))
+        return hash(
+            (tuple(self.raw_contacts()), self.loop, self.symmetric, self.period)
+        )
+
+    def subscribe(self, listener: Callable[[Contact, bool], None]) -> None:
+        self._listeners.append(listener)
+
+    def insert(self, contact: Contact) -> None:
+        """
+        Adds a contact to the plan while it is in use and notifies the
+        subscribers, e.g. the neighbor service, which then brings the link up
+        and down at the times of the contact.
+        """
+        if self.loop:
+            # the period and the timeline of one period depend on all contacts
+            self._rebuild(list(self.raw_contacts()) + [contact])
+        else:
+            added = [] if self._overlay is None else list(self._overlay.contacts)
+            added.append(contact)
+            self._overlay = ContactPlan(added, symmetric=self.symmetric)
+            self.max_time = max(self.max_time, self._overlay.max_time)
+            self._updated()
+        for listener in self._listeners:
+            listener(contact, True)
+
+    def retract(self, contact: Contact) -> None:
+        """
+        Removes a contact from the plan while it is in use and notifies the
+        subscribers, so an active link of the contact goes down right away.
+        :raises ValueError: If the contact is not in the plan.
+        """
+        overlay = self._overlay
+        if overlay is not None and contact in overlay.contacts:
+            added = list(overlay.contacts)
+            added.remove(contact)
+            self._overlay = None
+            if len(added) > 0:
+                self._overlay = ContactPlan(added, symmetric=self.symmetric)
+        else:
+            idx = self._find(contact)
+            self._retracted = self._retracted | {idx}
+            # the times of the contact are no events anymore
+            dropped = dict(self._dropped)
+            for t in self.contacts[idx].timespan:
+                dropped[t] = dropped.get(t, 0) + 1
+            self._dropped = dropped
+        if self.loop:
+            self._rebuild(self._live_contacts())
+        else:
+            self._updated()
+        for listener in self._listeners:
+            listener(contact, False)
+
+    def compact(self) -> None:
+        """Rebuilds the index with all inserted and retracted contacts."""
+        if self._pending():
+            self._rebuild(self._live_contacts())
+
+    def _pending(self) -> bool:
+        return self._overlay is not None or len(self._retracted) > 0
+
+    def _live_contacts(self) -> List[Contact]:
+        """Returns the contacts of the index that were not retracted and the inserted ones."""
+        retracted = self._retracted
+        contacts = [c for i, c in enumerate(self.contacts) if i not in retracted]
+        if self._overlay is not None:
+            # the index of the plan relies on the start order of its contacts
+            contacts = list(
+                merge(contacts, self._overlay.contacts, key=lambda c: c.timespan[0])
+            )
+        return contacts
+
+    def _find(self, contact: Contact) -> int:
+        """Returns the index of a contact in the index that was not retracted."""
+        pair = self._pairs.get(tuple(contact.nodes))
+        if pair is not None:
+            lo, hi = pair
+            j = bisect_left(self._pair_starts, contact.timespan[0], lo, hi)
+            while j < hi and self._pair_starts[j] == contact.timespan[0]:
+                idx = int(self._pair_order[j])
+                if idx not in self._retracted and self.contacts[idx] == contact:
+                    return idx
+                j += 1
+        raise ValueError("%r is not in the contact plan" % (contact,))
+
+    def _updated(self) -> None:
+        """Resets the cache and rebuilds the index if too many changes are pending."""
+        self.last_at = None
+        self.last_cache = []
+        pending = len(self._retracted)
+        if self._overlay is not None:
+            pending += len(self._overlay.contacts)
+        if pending > max(256, math.isqrt(len(self.contacts))):
+            self.compact()
+
+    def _rebuild(self, contacts: List[Contact]) -> None:
+        """Replaces the contacts and the index of the plan, keeping its subscribers."""
+        if isinstance(self.contacts, ContactColumns):
+            contacts = ContactColumns.from_contacts(contacts)
+        listeners = self._listeners
+        self.contacts = contacts
+        self._init_updates()
+        self._listeners = listeners
+        self.sort_contacts()
+
+    def normalize(self) -> "ContactPlan":
+        """
+        Returns an equivalent plan with as few contacts as possible:
+        contacts without duration are dropped, overlapping and back-to-back
+        contacts of a node pair with identical link properties are merged and
+        duplicate fixed contacts are removed. In symmetric plans, the
+        direction of a contact does not matter, so both directions of a node
+        pair are merged as the pair with the lower node first.
+        """
+        contacts = self.raw_contacts()
+        if not isinstance(contacts, ContactColumns):
+            contacts = ContactColumns.from_contacts(contacts)
+        columns = contacts.columns
+        keep = columns["fixed"] | (columns["end"] > columns["start"])
+        columns = {name: np.asarray(column)[keep] for name, column in columns.items()}
+        if self.symmetric:
+            node1 = np.minimum(columns["node1"], columns["node2"])
+            node2 = np.maximum(columns["node1"], columns["node2"])
+            columns["node1"], columns["node2"] = node1, node2
+
+        # contacts with the same nodes and properties follow each other in
+        # start order, a contact starting after the latest end of the ones
+        # before it starts a new merged contact
+        keys = ["node1", "node2", "bw", "loss", "delay", "jitter", "fixed"]
+        order = np.lexsort([columns["start"]] + [columns[k] for k in keys[::-1]])
+        columns = {name: column[order] for name, column in columns.items()}
+        fixed = columns["fixed"]
+        first = np.zeros(len(order), dtype=bool)
+        first[:1] = True
+        for k in keys:
+            first[1:] |= columns[k][1:] != columns[k][:-1]
+        max_ends = _running_max(columns["end"], first)
+        merged = first.copy()
+        merged[1:] |= ~fixed[1:] & (columns["start"][1:] > max_ends[:-1])
+        starts = np.flatnonzero(merged)
+
+        result = {name: column[starts] for name, column in columns.items()}
+        if len(starts) > 0:
+            result["end"] = np.maximum.reduceat(columns["end"], starts)
+        order = np.lexsort((result["node2"], result["node1"], result["start"]))
+        normalized = ContactColumns({name: result[name][order] for name in result})
+        if not isinstance(self.raw_contacts(), ContactColumns):
+            normalized = list(normalized)
+
+        # a looping plan keeps its period, even if contacts at its end are dropped
+        period = self.period
+        max_time = float(np.max(result["end"])) if len(starts) > 0 else 0.0
+        if self.loop and period is None and max_time != self.max_time:
+            period = self.max_time
+        return ContactPlan(
+            normalized, loop=self.loop, symmetric=self.symmetric, period=period
+        )
 
     def all_contacts(self) -> List[Tuple[int, int]]:
-        return list(set([(c.nodes[0], c.nodes[1]) for c in self.contacts]))
+        pairs = list(self._pairs)
+        if self._overlay is not None:
+            pairs += [p for p in self._overlay.all_contacts() if p not in self._pairs]
+        return pairs
 
     def loss_for_contact(self, simtime: float, node1: int, node2: int) -> float:
-        current_contacts = self.at(simtime)
-        for c in current_contacts:
-            if c.nodes[0] == node1 and c.nodes[1] == node2:
-                return c.loss
-            if (
-                c.nodes[0] == node2 and c.nodes[1] == node1 and self.symmetric
-            ):  # for symmetric contact plans check the reverse as well
-                return c.loss
-
-        return 0.0
+        contact = self.contact_between(simtime, node1, node2)
+        if contact is None:
+            return 0.0
+        return contact.loss
 
     def has_contact(self, simtime: float, node1: int, node2: int) -> bool:
-        current_contacts = self.at(simtime)
-        for contact in current_contacts:
-            if contact.nodes[0] == node1 and contact.nodes[1] == node2:
-                return True
-            if self.symmetric and (
-                contact.nodes[0] == node2 and contact.nodes[1] == node1
-            ):  # Assuming symmetric means the contact is bidirectional
-
-                return True
-        return False
+        return self.contact_between(simtime, node1, node2) is not None
 
     def tx_time_for_contact(
         self, simtime: float, node1: int, node2: int, size: int
     ) -> float:
-        current_contacts = self.at(simtime)
-        for c in current_contacts:
-            if c.bw == 0:  # no bandwidth limit, return a very small time
-                return 0.000005 * size
-            if c.nodes[0] == node1 and c.nodes[1] == node2:
-                # calculate jitter to apply
-                jitter = 0
-                if c.jitter > 0:
-                    jitter = (random.random() - 0.5) * c.jitter
-                return size / c.bw + c.delay / 1000 + jitter
-            if (
-                c.nodes[0] == node2 and c.nodes[1] == node1 and self.symmetric
-            ):  # for symmetric contact plans check the reverse as well
-                jitter = 0
-                if c.jitter > 0:
-                    jitter = (random.random() - 0.5) * c.jitter
-                return size / c.bw + c.delay / 1000 + jitter
-        raise Exception("no contact found")
+        c = self.contact_between(simtime, node1, node2)
+        if c is None:
+            raise Exception("no contact found")
+        if c.bw == 0:  # no bandwidth limit, return a very small time
+            return 0.000005 * size
+        # calculate jitter to apply
+        jitter = 0
+        if c.jitter > 0:
+            jitter = (random.random() - 0.5) * c.jitter
+        return size / c.bw + c.delay / 1000 + jitter
+
+    def contact_between(self, time: float, node1: int, node2: int) -> Optional[Contact]:
+        """
+        Returns the first active contact from node1 to node2 at the given
+        time (in symmetric plans also from node2 to node1) or None.
+        """
+        contact = None
+        for t in self._plan_times(time):
+            idx = self._first_active(t, (node1, node2))
+            if self.symmetric:
+                reverse = self._first_active(t, (node2, node1))
+                if reverse != -1 and (idx == -1 or reverse < idx):
+                    idx = reverse
+            if idx != -1:
+                contact = self.contacts[idx]
+                break
+        if self._overlay is not None:
+            inserted = self._overlay.contact_between(time, node1, node2)
+            if inserted is not None and (
+                contact is None or inserted.timespan[0] < contact.timespan[0]
+            ):
+                contact = inserted
+        return contact
+
+    def _first_active(self, time: float, nodes: Tuple[int, int]) -> int:
+        """Returns the index of the first contact of a pair active at time or -1."""
+        pair = self._pairs.get(nodes)
+        if pair is None:
+            return -1
+        lo, hi = pair
+        count = bisect_right(self._pair_starts, time, lo, hi)
+        # the maximum ends are the running maximum of the end times, so the
+        # first one reaching time belongs to the first contact ending later
+        first = bisect_left(self._pair_max_ends, time, lo, count)
+        if first == count:
+            return -1
+        idx = int(self._pair_order[first])
+        if idx not in self._retracted:
+            return idx
+        # the next active contact of the pair after a retracted one
+        for j in range(first + 1, count):
+            idx = int(self._pair_order[j])
+            if idx not in self._retracted and self.contacts[idx].timespan[1] >= time:
+                return idx
+        return -1
 
     def at(self, time: int) -> List[Contact]:
         """Returns all contacts that are active at the given time."""
+        # the last result stays valid for repeated queries in any time order
         if self.last_at == time:
             return self.last_cache
         self.last_at = time
-        if self.loop and time > self.max_time:
-            time = time % self.get_max_time()
-        start_idx = 0
-        if self.last_at < time:
-            start_idx = self.last_idx
-
-        first_found = 0
-        current_contacts = []
-        for c in range(start_idx, len(self.contacts)):
-            if self.contacts[c].timespan[0] <= time <= self.contacts[c].timespan[1]:
-                if first_found == 0:
-                    first_found = c
-                current_contacts.append(self.contacts[c])
-            if (
-                self.contacts[c].timespan[0] > time
-            ):  # since contacts are sorted, we can break early
-                break
-
-        self.last_idx = first_found
-
-        # current_contacts = [
-        #     c for c in self.contacts if c.timespan[0] <= time <= c.timespan[1]
-        # ]
+        times = self._plan_times(time)
+        if len(times) == 1:
+            active = self._active(times[0])
+        else:
+            active = sorted(set().union(*(self._active(t) for t in times)))
+        retracted = self._retracted
+        current_contacts = [self.contacts[c] for c in active if c not in retracted]
+        if self._overlay is not None:
+            current_contacts += self._overlay.at(time)
+            current_contacts.sort(key=lambda c: c.timespan[0])
         self.last_cache = current_contacts
         return current_contacts
 
     def next_event(self, time: float) -> Optional[float]:
+        """Returns the first start or end of a contact after the given time or None."""
+        return next(self.events(time), None)
 
-        min_idx = 0
-        if time >= self.last_next[0]:
-            min_idx = self.last_next[1]
-
-        start_event = float("inf")
-        end_event = float("inf")
-        for i in range(min_idx, len(self.contacts)):
-            contact = self.contacts[i]
-            if contact.timespan[0] > time and contact.timespan[0] < start_event:
-                start_event = contact.timespan[0]
-                min_idx = min(min_idx, i)
-            if contact.timespan[1] > time and contact.timespan[1] < end_event:
-                end_event = contact.timespan[1]
-                min_idx = min(min_idx, i)
-
-        next_time = min(start_event, end_event)
-
-        self.last_next = (next_time, min_idx)
-
-        return next_time if next_time != float("inf") else None
+    def events(self, time: float = 0) -> Iterator[float]:
+        """
+        Yields the starts and ends of all contacts after the given time in
+        order. Looping plans repeat their timeline every period forever.
+        """
+        if self._period is None:
+            timeline = self._timeline
+            events = (
+                timeline[idx]
+                for idx in range(bisect_right(timeline, time), len(timeline))
+                if timeline[idx] not in self._dropped or self._live(timeline[idx])
+            )
+            if self._overlay is not None:
+                events = merge(events, self._overlay.events(time))
+            last = None
+            for t in events:
+                if t != last:
+                    yield t
+                    last = t
+            return
+        period = self._period
+        phases = self._phases
+        offset = (time // period) * period
+        idx = bisect_right(phases, time - offset)
+        while len(phases) > 0:
+            for phase, first in zip(phases[idx:], self._phase_firsts[idx:]):
+                t = offset + phase
+                if t > time and t >= first:
+                    yield t
+            offset += period
+            idx = 0
+
+    def changed_links(self, time: float) -> Optional[List[Tuple[int, int]]]:
+        """Returns the node pairs of all contacts starting or ending at the given time."""
+        links = []
+        for t in self._plan_times(time, inclusive=True):
+            links += self._changed_links(t)
+        if self._overlay is not None:
+            links += self._overlay.changed_links(time)
+        return links
+
+    def link_events(self, time: float) -> List[Tuple[str, Contact]]:
+        """Returns the contacts starting ("UP") or ending ("DOWN") at the given time."""
+        events = []
+        for t in self._plan_times(time, inclusive=True):
+            for i in self._active(t):
+                if i in self._retracted:
+                    continue
+                c = self.contacts[i]
+                if c.timespan[0] == t:
+                    events.append(("UP", c))
+                if c.timespan[1] == t:
+                    events.append(("DOWN", c))
+        if self._overlay is not None:
+            events += self._overlay.link_events(time)
+        return events
+
+    def _changed_links(self, time: float) -> List[Tuple[int, int]]:
+        starting = range(
+            bisect_left(self._starts, time), bisect_right(self._starts, time)
+        )
+        ending = range(bisect_left(self._ends, time), bisect_right(self._ends, time))
+        changed = list(starting) + [int(self._end_order[i]) for i in ending]
+        return [
+            tuple(self.contacts[i].nodes) for i in changed if i not in self._retracted
+        ]
+
+    def _live(self, time: float) -> bool:
+        """Returns whether a contact that was not retracted starts or ends at time."""
+        count = bisect_right(self._starts, time) - bisect_left(self._starts, time)
+        count += bisect_right(self._ends, time) - bisect_left(self._ends, time)
+        return count > self._dropped.get(time, 0)
 
     def fixed_links(self) -> List[Tuple[int, int]]:
         """Returns a list of fixed links in the contact plan."""
-        return [(c.nodes[0], c.nodes[1]) for c in self.contacts if c.fixed]
+        links = [
+            tuple(self.contacts[int(i)].nodes)
+            for i in self._fixed
+            if int(i) not in self._retracted
+        ]
+        if self._overlay is not None:
+            links += self._overlay.fixed_links()
+        return links
 
     def get_max_time(self) -> int:
         """Returns the maximum time in the contact plan."""
@@ -0,0 +1,199 @@
+import json
+import logging
+import os
+import struct
+import tempfile
+from typing import Dict
+
+import numpy as np
+
+from pons.net.plans import (
+    CONTACT_COLUMNS,
+    ContactColumns,
+    ContactPlan,
+    contact_index,
+)
+
+logger = logging.getLogger(__name__)
+
+# a binary contact plan starts with the magic, the length of the JSON header
+# and the header itself, followed by all arrays aligned to ALIGNMENT bytes
+MAGIC = b"PONSPLAN"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+PLAN_SUFFIX = ".pcp"
+
+
+def write_plan(filename: str, plan: ContactPlan) -> None:
+    """
+    Writes a contact plan as binary contact plan, which stores the contacts
+    column by column together with the index of the plan.
+    :param filename: The path to the binary contact plan.
+    :param plan: The contact plan to write.
+    """
+    contacts = plan.raw_contacts()
+    if not isinstance(contacts, ContactColumns):
+        contacts = ContactColumns.from_contacts(contacts)
+    columns = contacts.columns
+    index = contact_index(
+        columns["start"],
+        columns["end"],
+        columns["node1"],
+        columns["node2"],
+        columns["fixed"],
+    )
+    arrays: Dict[str, np.ndarray] = {}
+    for name, dtype in CONTACT_COLUMNS.items():
+        arrays["contact." + name] = np.ascontiguousarray(columns[name], dtype=dtype)
+    for name, array in index.items():
+        arrays["index." + name] = np.ascontiguousarray(array)
+
+    entries = []
+    offset = 0
+    for name, array in arrays.items():
+        entries.append(
+            {
+                "name": name,
+                "dtype": array.dtype.str,
+                "length": len(array),
+                "offset": offset,
+            }
+        )
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    header = json.dumps(
+        {
+            "version": FORMAT_VERSION,
+            "loop": plan.loop,
+            "symmetric": plan.symmetric,
+            "period": plan.period,
+            "arrays": entries,
+        }
+    ).encode("utf-8")
+    start = -(-(len(MAGIC) + 8 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    with open(filename, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for entry, array in zip(entries, arrays.values()):
+            f.seek(start + entry["offset"])
+            f.write(array.tobytes())
+        f.truncate(start + offset)
+
+
+def read_plan(filename: str) -> ContactPlan:
+    """
+    Opens a binary contact plan. All contacts and the index are memory-mapped
+    read-only, so the plan opens without parsing and all processes using the
+    same file share one copy of it in memory.
+    :param filename: The path to the binary contact plan.
+    :return: The contact plan.
+    :raises ValueError: If the file is no binary contact plan.
+    """
+    with open(filename, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{filename} is no binary contact plan.")
+        (length,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(length).decode("utf-8"))
+    if header["version"] != FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported binary contact plan version {header['version']} in {filename}."
+        )
+    start = -(-(len(MAGIC) + 8 + length) // ALIGNMENT) * ALIGNMENT
+    data = np.memmap(filename, dtype=np.uint8, mode="r")
+
+    arrays: Dict[str, np.ndarray] = {}
+    for entry in header["arrays"]:
+        arrays[entry["name"]] = np.ndarray(
+            (entry["length"],),
+            dtype=np.dtype(entry["dtype"]),
+            buffer=data,
+            offset=start + entry["offset"],
+        )
+    contacts = ContactColumns(
+        {name: arrays["contact." + name] for name in CONTACT_COLUMNS}
+    )
+    index = {
+        name[len("index.") :]: array
+        for name, array in arrays.items()
+        if name.startswith("index.")
+    }
+    return ContactPlan.from_index(
+        contacts,
+        index,
+        loop=header["loop"],
+        symmetric=header["symmetric"],
+        period=header.get("period"),
+    )
+
+
+def load_plan(
+    filename: str,
+    mapping: dict[str, int] | None = None,
+    loop: bool = False,
+    symmetric: bool = False,
+) -> ContactPlan:
+    """
+    Loads a contact plan from a CSV, JSON, core contact plan or binary contact
+    plan file, the format is determined by the file extension. If
+    PONS_CACHE_DIR is set, text plans are converted to binary contact plans
+    there, and later calls memory-map these instead of parsing the file again
+    as long as the file is unchanged.
+    :param filename: The path to the contact plan.
+    :param mapping: An optional mapping from string node identifiers to integer node IDs.
+    :param loop: Whether the contact plan should be looped.
+    :param symmetric: Whether contacts work in both directions.
+    :return: The contact plan.
+    :raises ValueError: If the file format is not supported.
+    """
+    # imported here, as the readers need pandas
+    from pons.mobility.cache import cache_dir, cache_key
+    from pons.net.plans.parser import read_ccp, read_csv, read_json
+
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == PLAN_SUFFIX:
+        return read_plan(filename)
+    readers = {".csv": read_csv, ".json": read_json, ".ccp": read_ccp}
+    if extension not in readers:
+        raise ValueError(
+            f"Unsupported contact plan format: {filename}. Please use .csv, .json, .ccp or {PLAN_SUFFIX}."
+        )
+
+    def parse() -> ContactPlan:
+        contacts = readers[extension](filename, mapping=mapping)
+        return ContactPlan(contacts, loop=loop, symmetric=symmetric)
+
+    directory = cache_dir()
+    if directory is None:
+        return parse()
+    key = cache_key(
+        filename,
+        "plan",
+        format=FORMAT_VERSION,
+        mapping=mapping,
+        loop=loop,
+        symmetric=symmetric,
+    )
+    path = os.path.join(directory, key + PLAN_SUFFIX)
+    if os.path.exists(path):
+        try:
+            plan = read_plan(path)
+            logger.debug("Loaded cached plan %s for %s", key, filename)
+            return plan
+        except (OSError, ValueError):
+            pass
+
+    plan = parse()
+    # the plan is written to a temporary file first and then renamed, so
+    # concurrent workers never read partial files
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=PLAN_SUFFIX + ".tmp")
+    os.close(fd)
+    try:
+        write_plan(tmp, plan)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    logger.debug("Cached plan %s for %s", key, filename)
+    return plan
@@ -1,10 +1,41 @@
 from dateutil.parser import parse
 
 
+from bisect import bisect_right
+from collections import defaultdict
 from random import random
-from typing import TYPE_CHECKING, Dict, List, Tuple, Optional
+from typing import TYPE_CHECKING, Dict, Iterable, List, Tuple, Optional
 
-from pons.net.plans import CommonContactPlan, Contact
+from pons.net.plans import (
+    CommonContactPlan,
+    Contact,
+    active_in_tree,
+    max_end_tree,
+)
+
+
+class _TimeIndex(object):
+    """
+    The entries of an ION contact plan sorted by start time with a max
+    segment tree over their end times, so a search for the active entries
+    only visits subtrees holding at least one of them.
+    """
+
+    def __init__(self, entries: List[tuple], indices: Iterable[int]) -> None:
+        order = sorted(indices, key=lambda i: entries[i][1][0])
+        self.order = order
+        self.starts = [entries[i][1][0] for i in order]
+        self.max_end = max_end_tree([entries[i][1][1] for i in order])
+
+    def active(self, t: float) -> List[int]:
+        """Returns the indices of all entries active at t in plan order."""
+        count = bisect_right(self.starts, t)
+        return sorted(self.order[i] for i in active_in_tree(self.max_end, count, t))
+
+    def first_active(self, t: float) -> Optional[int]:
+        """Returns the index of the first entry active at t in plan order."""
+        found = self.active(t)
+        return found[0] if found else None
 
 
 class IonContactPlan(CommonContactPlan):
@@ -13,13 +44,13 @@ class IonContactPlan(CommonContactPlan):
     def __init__(self, name: str, contacts=None):
         self.name = name
         if contacts is None:
-            self.ion_contacts = []
+            contacts = []
         self.ion_contacts = contacts
         self.contacts = []
         self.update_contacts_from_ion()
 
     def update_contacts_from_ion(self):
-        """Update the contacts list from the ion_contacts."""
+        """Update the contacts list and the indexes from the ion_contacts."""
         self.contacts = []
         for c in self.ion_contacts:
             if c[0] == "contact":
@@ -33,6 +64,47 @@ class IonContactPlan(CommonContactPlan):
                         jitter=0.0,
                     )
                 )
+        self._build_index()
+
+    def _build_index(self):
+        """
+        Indexes the entries by time, node and node pair. Every contact is
+        joined with the ranges of its node pair overlapping it, so the
+        transmission time of a contact only looks at these ranges.
+        """
+        entries = self.ion_contacts
+        by_kind = defaultdict(list)
+        by_node = defaultdict(list)
+        by_pair = defaultdict(list)
+        for i, c in enumerate(entries):
+            by_kind[c[0]].append(i)
+            by_node[(c[0], c[2])].append(i)
+            if c[3] != c[2]:
+                by_node[(c[0], c[3])].append(i)
+            by_pair[(c[0], min(c[2], c[3]), max(c[2], c[3]))].append(i)
+
+        self._entries = _TimeIndex(entries, range(len(entries)))
+        self._kinds = {k: _TimeIndex(entries, v) for k, v in by_kind.items()}
+        self._nodes = {k: _TimeIndex(entries, v) for k, v in by_node.items()}
+        self._pairs = {}
+        self._pair_ranges = {}
+        for (kind, node1, node2), indices in by_pair.items():
+            if kind == "contact":
+                self._pairs[(node1, node2)] = _TimeIndex(entries, indices)
+            elif kind == "range":
+                self._pair_ranges[(node1, node2)] = _TimeIndex(entries, indices)
+
+    def _select(self, index: Optional[_TimeIndex], t) -> List[tuple]:
+        if index is None:
+            return []
+        return [self.ion_contacts[i] for i in index.active(t)]
+
+    def _contact_between(self, t, node1: int, node2: int) -> Optional[int]:
+        """Returns the index of the first contact of the node pair active at t."""
+        index = self._pairs.get((min(node1, node2), max(node1, node2)))
+        if index is None:
+            return None
+        return index.first_active(t)
 
     def __str__(self):
         return "IonContactPlan(%s, %d)" % (self.name, len(self.ion_contacts))
@@ -92,68 +164,42 @@ class IonContactPlan(CommonContactPlan):
         return list(set(all))
 
     def get_entries(self, t):
-        return [c for c in self.ion_contacts if c[1][0] <= t and c[1][1] >= t]
+        return self._select(self._entries, t)
 
     def get_contacts(self, t):
-        return [
-            c
-            for c in self.ion_contacts
-            if c[1][0] <= t and c[1][1] >= t and c[0] == "contact"
-        ]
+        return self._select(self._kinds.get("contact"), t)
 
     def get_ranges(self, t):
-        return [
-            c
-            for c in self.ion_contacts
-            if c[1][0] <= t and c[1][1] >= t and c[0] == "range"
-        ]
+        return self._select(self._kinds.get("range"), t)
 
     def get_contacts_for_node(self, t, node_id: int):
-        return [
-            c
-            for c in self.ion_contacts
-            if c[1][0] <= t
-            and c[1][1] >= t
-            and (c[2] == node_id or c[3] == node_id)
-            and c[0] == "contact"
-        ]
+        return self._select(self._nodes.get(("contact", node_id)), t)
 
     def get_ranges_for_node(self, t, node_id: int):
-        return [
-            c
-            for c in self.ion_contacts
-            if c[1][0] <= t
-            and c[1][1] >= t
-            and (c[2] == node_id or c[3] == node_id)
-            and c[0] == "range"
-        ]
+        return self._select(self._nodes.get(("range", node_id)), t)
 
     def remove_past_entries(self, t):
         self.ion_contacts = [c for c in self.ion_contacts if c[1][1] >= t]
+        self.update_contacts_from_ion()
 
     def has_contact(self, simtime: float, node1: int, node2: int) -> bool:
-        contacts_of_src = self.get_contacts_for_node(simtime, node1)
-        # print("has_contact: %d %d %s " % (node1, node2, contacts_of_src))
-        for c in contacts_of_src:
-            if c[2] == node2 or c[3] == node2:
-                return True
-        return False
+        return self._contact_between(simtime, node1, node2) is not None
 
     def loss_for_contact(self, simtime: float, node1: int, node2: int) -> float:
-        contacts = self.get_contacts_for_node(simtime, node1)
-        for c in contacts:
-            if c[2] == node2 or c[3] == node2:
-                return 0.0
-        raise Exception("no contact found")
+        if self._contact_between(simtime, node1, node2) is None:
+            raise Exception("no contact found")
+        return 0.0
 
     def tx_time_for_contact(
         self, simtime: float, node1: int, node2: int, size: int
     ) -> float:
-        contacts = self.get_contacts_for_node(simtime, node1)
-        for c in contacts:
-            if c[2] == node2 or c[3] == node2:
-                ranges = self.get_ranges_for_node(simtime, node1)
-                for r in ranges:
-                    if r[2] == node2 or r[3] == node2:
-                        return size / c[4] + r[4] * 0.00000013
+        i = self._contact_between(simtime, node1, node2)
+        ranges = self._pair_ranges.get((min(node1, node2), max(node1, node2)))
+        if i is not None and ranges is not None:
+            r = ranges.first_active(simtime)
+            if r is not None:
+                return (
+                    size / self.ion_contacts[i][4]
+                    + self.ion_contacts[r][4] * 0.00000013
+                )
         raise Exception("no contact found")
@@ -1,9 +1,11 @@
 from networkx.algorithms.operators.binary import symmetric_difference
 from pons.net.plans import bandwidth_parser
 import logging
+from typing import Iterator
+
+import numpy as np
 import pandas as pd
 from pons.net.plans import Contact, CommonContactPlan
-from pons.net.plans.core import CoreContact
 
 logger = logging.getLogger(__name__)
 
@@ -71,11 +73,110 @@ BANDWIDTH_IDENTIFIERS = ["bandwidth", "bw", "data_rate(bps)"]
 DELAY_IDENTIFIERS = ["delay", "latency", "delay(s)", "latency(s)"]
 
 
+# marks values of a column that could not be parsed
+_INVALID = object()
+
+
+def _parse_distinct(values: pd.Series, parse) -> np.ndarray:
+    """
+    Parses a column by calling parse only once for each distinct value.
+    Returns the parsed values as object array, values which cannot be parsed
+    and missing values are _INVALID.
+    """
+    codes, uniques = pd.factorize(values)
+    parsed = []
+    for value in uniques:
+        try:
+            parsed.append(parse(value))
+        except (ValueError, TypeError, KeyError) as e:
+            logger.error(f"Invalid value {value!r}: {e}")
+            parsed.append(_INVALID)
+    # missing values have the code -1, which picks the last entry
+    parsed.append(_INVALID)
+    table = np.empty(len(parsed), dtype=object)
+    table[:] = parsed
+    return table[codes]
+
+
+def _float_column(values: pd.Series, default: float | None = None) -> np.ndarray:
+    """
+    Converts a column to floats. Missing values are set to the default, if
+    there is none they are NaN just like values which are no numbers.
+    """
+    numbers = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float, copy=True)
+    if default is not None:
+        numbers[values.isna().to_numpy()] = default
+    return numbers
+
+
+def _coalesce(df: pd.DataFrame, possible_names: list) -> pd.Series:
+    """
+    Returns the values of the first column in possible_names that holds a
+    value for a row, rows without any of them are missing.
+    """
+    column = pd.Series(np.nan, index=df.index, dtype=object)
+    for name in reversed(possible_names):
+        if name in df.columns:
+            column = df[name].combine_first(column)
+    return column
+
+
+def _make_contacts(
+    valid: np.ndarray,
+    start: np.ndarray,
+    end: np.ndarray,
+    node1: np.ndarray,
+    node2: np.ndarray,
+    bw: np.ndarray,
+    loss: np.ndarray,
+    delay: np.ndarray,
+    jitter: np.ndarray,
+    fixed: np.ndarray,
+    symmetric: np.ndarray | None = None,
+) -> list[Contact]:
+    """
+    Creates the contacts of all valid rows of the given columns. Rows marked
+    as symmetric are followed by the contact in the reverse direction.
+    """
+    invalid = np.count_nonzero(~valid)
+    if invalid > 0:
+        logger.error(f"Skipped {invalid} invalid contacts")
+    rows = np.flatnonzero(valid)
+    timespans = list(zip(start[rows].tolist(), end[rows].tolist()))
+    node1 = node1[rows].tolist()
+    node2 = node2[rows].tolist()
+    columns = (
+        bw[rows].tolist(),
+        loss[rows].tolist(),
+        delay[rows].tolist(),
+        jitter[rows].tolist(),
+        fixed[rows].tolist(),
+    )
+    contacts = list(map(Contact, timespans, zip(node1, node2), *columns))
+    if symmetric is None or not symmetric[rows].any():
+        return contacts
+
+    reverse = np.flatnonzero(symmetric[rows])
+    reversed_contacts = list(
+        map(
+            Contact,
+            [timespans[i] for i in reverse],
+            [(node2[i], node1[i]) for i in reverse],
+            *([column[i] for i in reverse] for column in columns),
+        )
+    )
+    # each reverse contact directly follows its contact
+    order = np.concatenate([np.arange(len(contacts)), reverse]).argsort(kind="stable")
+    merged = contacts + reversed_contacts
+    return [merged[i] for i in order.tolist()]
+
+
 def read_csv(
     filename: str, sep: str = ",", mapping: dict[str, int] | None = None
 ) -> list[Contact]:
     """
     Reads a CSV file containing contact information and returns a list of contacts.
+    The columns are parsed as a whole, rows that cannot be parsed are skipped.
     :param filename: The path to the CSV file.
     :param sep: The separator used in the CSV file (default is comma).
     :param mapping: An optional mapping from string node identifiers to integer node IDs.
@@ -85,6 +186,38 @@ def read_csv(
 
     df = pd.read_csv(filename, sep=sep, on_bad_lines="warn", skip_blank_lines=True)
     logger.debug(f"Read {len(df)} rows from {filename}")
+    return _csv_contacts(df, mapping)
+
+
+def iter_csv(
+    filename: str,
+    sep: str = ",",
+    mapping: dict[str, int] | None = None,
+    chunk_size: int = 65536,
+) -> Iterator[Contact]:
+    """
+    Yields the contacts of a CSV file in the order of the file. Only
+    chunk_size rows are read at a time, so the file does not have to fit
+    into memory.
+    :param filename: The path to the CSV file.
+    :param sep: The separator used in the CSV file (default is comma).
+    :param mapping: An optional mapping from string node identifiers to integer node IDs.
+    :param chunk_size: The number of rows parsed at once.
+    :raises ValueError: If the file cannot be read or if required columns are missing.
+    """
+    with pd.read_csv(
+        filename,
+        sep=sep,
+        on_bad_lines="warn",
+        skip_blank_lines=True,
+        chunksize=chunk_size,
+    ) as reader:
+        for df in reader:
+            yield from _csv_contacts(df, mapping)
+
+
+def _csv_contacts(df: pd.DataFrame, mapping: dict[str, int] | None) -> list[Contact]:
+    """Returns the contacts of the rows of a CSV file."""
     logger.debug("Identifying columns in the data...")
     START_COLUMN_NAME = detect_column_name(
         df, START_TIMESPAN_IDENTIFIERS, rename_to="start_time"
@@ -136,163 +269,49 @@ def read_csv(
     contains_column_or_insert_with_default_value(
         df, "jitter", 0.0
     )  # Default jitter to 0.0 if not present
-    contacts = []
-    for _, row in df.iterrows():
-        try:
-            node1 = row[NODE1_COLUMN_NAME]
-            node2 = row[NODE2_COLUMN_NAME]
-            # check whether node1 and node2 are valid integers
-            if not isinstance(node1, int) or not isinstance(node2, int):
-                # try mapping them if a mapping is provided
-                if mapping is not None:
-                    if node1 in mapping:
-                        node1 = mapping[str(node1)]
-                    else:
-                        logger.error(f"Node1 {node1} not found in mapping.")
-                        raise ValueError(
-                            f"Node1 {node1} not found in mapping. Please check the mapping."
-                        )
-                    if node2 in mapping:
-                        node2 = mapping[str(node2)]
-                    else:
-                        logger.error(f"Node2 {node2} not found in mapping.")
-                        raise ValueError(
-                            f"Node2 {node2} not found in mapping. Please check the mapping."
-                        )
-                else:
-                    logger.error(
-                        f"Node1 {node1} and Node2 {node2} must be integers or mapped to integers."
-                    )
-                    raise ValueError(
-                        f"Node1 {node1} and Node2 {node2} must be integers or mapped to integers."
-                    )
-            start_ts = float(row[START_COLUMN_NAME])
-            end_ts = float(row[END_COLUMN_NAME])
-            is_fixed = end_ts < 0
-            bw = None
-            if BANDWIDTH_COLUMN_NAME in row and pd.notna(row[BANDWIDTH_COLUMN_NAME]):
-                bw = row[BANDWIDTH_COLUMN_NAME]
-                bw = bandwidth_parser(bw)
-            contact = Contact(
-                timespan=(start_ts, end_ts),
-                nodes=(node1, node2),
-                bw=bw,
-                loss=float(row["loss"]),
-                delay=float(row["delay"]),
-                jitter=float(row["jitter"]),
-                fixed=is_fixed,
-            )
-            contacts.append(contact)
-        except Exception as e:
-            logger.error(f"Error processing row {row}: {e}")
-            continue
-    return contacts
-
 
-def validate_json_contact(item: dict) -> list[str]:
-    """
-    Validates a contact item from JSON data.
-    :param item: A dictionary representing a contact item.
-    :return: True if the item is valid, False otherwise.
-    """
-
-    is_fixed = item.get("fixed", False)
-
-    # check for start time key
-    START_ID = None
-    for key in START_TIMESPAN_IDENTIFIERS:
-        if key in item:
-            logger.debug(f"Found required key '{key}' in item: {item}")
-            START_ID = key
-            break
-    if START_ID == None:
-        if is_fixed:
-            item["start_time"] = 0.0
-            START_ID = "start_time"
-        else:
+    def parse_node(node):
+        # integer columns hold node IDs, all other values have to be mapped
+        if isinstance(node, (int, np.integer)):
+            return int(node)
+        if mapping is None:
+            raise ValueError(f"Node {node} must be an integer or mapped to an integer.")
+        if node not in mapping:
             raise ValueError(
-                f"Missing required start time key in item: {item}. Please check the JSON data."
+                f"Node {node} not found in mapping. Please check the mapping."
             )
-    # check for end time key
-    END_ID = None
-    for key in END_TIMESPAN_IDENTIFIERS:
-        if key in item:
-            logger.debug(f"Found required key '{key}' in item: {item}")
-            END_ID = key
-            break
-    if END_ID == None:
-        if is_fixed:
-            item["end_time"] = -1.0
-            END_ID = "end_time"
-        else:
-            raise ValueError(
-                f"Missing required end time key in item: {item}. Please check the JSON data."
-            )
-    # check for node1 key
-    NODE1_ID = None
-    for key in NODE1_IDENTIFIERS:
-        if key in item:
-            logger.debug(f"Found required key '{key}' in item: {item}")
-            NODE1_ID = key
-            break
-    if NODE1_ID == None:
-        raise ValueError(
-            f"Missing required node1 key in item: {item}. Please check the JSON data."
-        )
-    # check for node2 key
-    NODE2_ID = None
-    for key in NODE2_IDENTIFIERS:
-        if key in item:
-            logger.debug(f"Found required key '{key}' in item: {item}")
-            NODE2_ID = key
-            break
-    if NODE2_ID == None:
-        raise ValueError(
-            f"Missing required node2 key in item: {item}. Please check the JSON data."
-        )
-
-    return [START_ID, END_ID, NODE1_ID, NODE2_ID]
-
-
-def unify_json_contact(item: dict, found_keys: list[str]) -> dict:
-    """
-    Unifies the contact item from JSON data by renaming keys to a standard format.
-    :param item: A dictionary representing a contact item.
-    :param found_keys: A list of keys that were found in the item.
-    :return: A dictionary with unified keys.
-    """
-    unified_item = {}
-
-    unified_item["start_time"] = item[found_keys[0]]
-    unified_item["end_time"] = item[found_keys[1]]
-    unified_item["node1"] = item[found_keys[2]]
-    unified_item["node2"] = item[found_keys[3]]
-
-    # Optional fields
-    if "bandwidth" in item:
-        unified_item["bandwidth"] = item["bandwidth"]
-    elif "bw" in item:
-        unified_item["bandwidth"] = item["bw"]
-    else:
-        unified_item["bandwidth"] = None
-
-    if unified_item["bandwidth"] is not None and isinstance(
-        unified_item["bandwidth"], str
-    ):
-        unified_item["bandwidth"] = bandwidth_parser(unified_item["bandwidth"])
-
-    unified_item["loss"] = item.get("loss", 0.0)
-    unified_item["delay"] = item.get("delay", 0.0)
-    unified_item["jitter"] = item.get("jitter", 0.0)
-    unified_item["fixed"] = item.get("fixed", False)
-    unified_item["symmetric"] = item.get("symmetric", False)
-
-    return unified_item
+        return mapping[str(node)]
+
+    node1 = _parse_distinct(df[NODE1_COLUMN_NAME], parse_node)
+    node2 = _parse_distinct(df[NODE2_COLUMN_NAME], parse_node)
+    start_ts = _float_column(df[START_COLUMN_NAME])
+    end_ts = _float_column(df[END_COLUMN_NAME])
+    loss = _float_column(df["loss"], 0.0)
+    delay = _float_column(df["delay"], 0.0)
+    jitter = _float_column(df["jitter"], 0.0)
+    bw = _parse_distinct(df["bandwidth"], lambda b: int(bandwidth_parser(b)))
+    # contacts without bandwidth are unlimited
+    bw[df["bandwidth"].isna().to_numpy()] = None
+
+    valid = (
+        (node1 != _INVALID)
+        & (node2 != _INVALID)
+        & (bw != _INVALID)
+        & ~np.isnan(start_ts)
+        & ~np.isnan(end_ts)
+        & ~np.isnan(loss)
+        & ~np.isnan(delay)
+        & ~np.isnan(jitter)
+    )
+    return _make_contacts(
+        valid, start_ts, end_ts, node1, node2, bw, loss, delay, jitter, end_ts < 0
+    )
 
 
 def read_json(filename: str, mapping: dict[str, int] | None = None) -> list[Contact]:
     """
     Reads a JSON file containing contact information and returns a list of contacts.
+    The items are parsed column by column, items that cannot be parsed are skipped.
     :param filename: The path to the JSON file.
     :param mapping: An optional mapping from string node identifiers to integer node IDs.
     :return: A list of Contact objects.
@@ -302,89 +321,105 @@ def read_json(filename: str, mapping: dict[str, int] | None = None) -> list[Cont
 
     with open(filename, "r") as f:
         data = json.load(f)
+    if len(data) == 0:
+        return []
 
-    contacts = []
-    for item in data:
-        try:
-            # Validate the contact item
-            found_keys = validate_json_contact(item)
-            # Unify the contact item
-            item = unify_json_contact(item, found_keys)
-
-            node1 = item["node1"]
-            node2 = item["node2"]
-            # check whether node1 and node2 are valid integers
-            if not isinstance(node1, int) or not isinstance(node2, int):
-                # try mapping them if a mapping is provided
-                if mapping is not None:
-                    if str(node1) in mapping:
-                        node1 = mapping[str(node1)]
-                    else:
-                        raise ValueError(
-                            f"Node1 {node1} not found in mapping. Please check the mapping."
-                        )
-                    if str(node2) in mapping:
-                        node2 = mapping[str(node2)]
-                    else:
-                        raise ValueError(
-                            f"Node2 {node2} not found in mapping. Please check the mapping."
-                        )
-                else:
-
-                    raise ValueError(
-                        f"Node1 {node1} and Node2 {node2} must be integers or mapped to integers."
-                    )
+    # object columns keep the values of the JSON items as they are
+    df = pd.DataFrame(data, dtype=object)
 
-            is_fixed = item.get("fixed", False)
-            start_ts = float(item.get("start_time", 0.0))
-            end_ts = float(item.get("end_time", -1.0))
-            if is_fixed:
-                if end_ts >= 0:
-                    raise ValueError(
-                        f"Contact with fixed=True but end_time {item['end_time']} is not negative."
-                    )
-                if start_ts != 0.0:
-                    raise ValueError(
-                        f"Contact with fixed=True but start_time {start_ts} is not 0.0."
-                    )
-            if end_ts < 0 and start_ts == 0 and "fixed" not in item:
-                logger.warning(
-                    f"Contact with negative end_time {end_ts} and start_time {start_ts} but no 'fixed' key. Assuming fixed contact."
-                )
-                is_fixed = True
-
-            contact = Contact(
-                timespan=(start_ts, end_ts),
-                nodes=(node1, node2),
-                bw=item.get("bandwidth"),
-                loss=item.get("loss", 0.0),
-                delay=item.get("delay", 0.0),
-                jitter=item.get("jitter", 0.0),
-                fixed=is_fixed,
+    if "fixed" in df.columns:
+        fixed_given = df["fixed"].notna().to_numpy()
+        is_fixed = df["fixed"].fillna(False).astype(bool).to_numpy()
+    else:
+        fixed_given = np.zeros(len(df), dtype=bool)
+        is_fixed = fixed_given.copy()
+
+    # fixed contacts do not need a timespan
+    start = _coalesce(df, START_TIMESPAN_IDENTIFIERS)
+    end = _coalesce(df, END_TIMESPAN_IDENTIFIERS)
+    start_ts = _float_column(start)
+    end_ts = _float_column(end)
+    start_ts[start.isna().to_numpy() & is_fixed] = 0.0
+    end_ts[end.isna().to_numpy() & is_fixed] = -1.0
+
+    node1 = _coalesce(df, NODE1_IDENTIFIERS)
+    node2 = _coalesce(df, NODE2_IDENTIFIERS)
+
+    def parse_mapped(node):
+        if mapping is None:
+            raise ValueError(f"Node {node} must be an integer or mapped to an integer.")
+        if str(node) not in mapping:
+            raise ValueError(
+                f"Node {node} not found in mapping. Please check the mapping."
             )
-            # Append the contact to the list
-            contacts.append(contact)
-
-            if "symmetric" in item and item["symmetric"]:
-                # Create a symmetric contact if specified
-                symmetric_contact = Contact(
-                    timespan=(start_ts, end_ts),
-                    nodes=(node2, node1),
-                    bw=item.get("bandwidth"),
-                    loss=item.get("loss", 0.0),
-                    delay=item.get("delay", 0.0),
-                    jitter=item.get("jitter", 0.0),
-                    fixed=is_fixed,
-                )
-                contacts.append(symmetric_contact)
-
-        except KeyError as e:
-            logger.error(f"Missing key in item {item}: {e}")
-            continue
-        except Exception as e:
-            logger.error(f"Error processing item {item}: {e}")
-            continue
-    return contacts
+        return mapping[str(node)]
+
+    # both nodes are mapped unless both of them are integers
+    int1 = _parse_distinct(node1, lambda n: n if isinstance(n, int) else _INVALID)
+    int2 = _parse_distinct(node2, lambda n: n if isinstance(n, int) else _INVALID)
+    use_ints = (int1 != _INVALID) & (int2 != _INVALID)
+    if not use_ints.all():
+        mapped1 = _parse_distinct(node1[~use_ints], parse_mapped)
+        mapped2 = _parse_distinct(node2[~use_ints], parse_mapped)
+        int1[~use_ints] = mapped1
+        int2[~use_ints] = mapped2
+
+    bandwidth = _coalesce(df, ["bandwidth", "bw"])
+    bw = _parse_distinct(
+        bandwidth, lambda b: bandwidth_parser(b) if isinstance(b, str) else b
+    )
+    bw[bandwidth.isna().to_numpy()] = None
+
+    def optional(name):
+        if name not in df.columns:
+            return np.zeros(len(df))
+        return _float_column(df[name], 0.0)
+
+    loss = optional("loss")
+    delay = optional("delay")
+    jitter = optional("jitter")
+
+    valid = (
+        (int1 != _INVALID)
+        & (int2 != _INVALID)
+        & (bw != _INVALID)
+        & ~np.isnan(start_ts)
+        & ~np.isnan(end_ts)
+        & ~np.isnan(loss)
+        & ~np.isnan(delay)
+        & ~np.isnan(jitter)
+    )
+
+    wrong_fixed = valid & is_fixed & ((end_ts >= 0) | (start_ts != 0.0))
+    if wrong_fixed.any():
+        logger.error(
+            f"{np.count_nonzero(wrong_fixed)} contacts with fixed=True do not start at 0.0 and end at a negative time."
+        )
+        valid &= ~wrong_fixed
+
+    assumed_fixed = valid & ~fixed_given & (end_ts < 0) & (start_ts == 0)
+    if assumed_fixed.any():
+        logger.warning(
+            f"{np.count_nonzero(assumed_fixed)} contacts with negative end_time and start_time 0 but no 'fixed' key. Assuming fixed contacts."
+        )
+        is_fixed = is_fixed | assumed_fixed
+
+    symmetric = None
+    if "symmetric" in df.columns:
+        symmetric = df["symmetric"].fillna(False).astype(bool).to_numpy()
+    return _make_contacts(
+        valid,
+        start_ts,
+        end_ts,
+        int1,
+        int2,
+        bw,
+        loss,
+        delay,
+        jitter,
+        is_fixed,
+        symmetric,
+    )
 
 
 def read_ccp(
@@ -394,43 +429,158 @@ def read_ccp(
 ) -> list[Contact]:
     """
     Reads a core contact plan and returns a list of contacts.
+    All contact lines are split first and then parsed column by column.
     :param filename: The path to the CSV file.
     :param mapping: An optional mapping from string node identifiers to integer node IDs.
     :param symmetric: Whether to create symmetric contacts.
     :return: A list of Contact objects.
     :raises ValueError: If the file cannot be read or if required columns are missing.
     """
+    if mapping is None:
+        mapping = {}
+
+    try:
+        df = pd.read_csv(
+            filename,
+            sep=r"\s+",
+            header=None,
+            names=range(10),
+            dtype=str,
+            comment="#",
+        )
+    except pd.errors.EmptyDataError:
+        return []
+    except pd.errors.ParserError as e:
+        raise ValueError("Invalid core contact plan %s: %s" % (filename, e))
 
-    contacts = []
-    for line in open(filename, "r").readlines():
-        line = line.strip()
-        if not line or line.startswith("#"):
-            continue
-
-        if line.startswith("a "):
-            core_contact = CoreContact.from_string(line, mapping=mapping)
-            contact = Contact(
-                timespan=core_contact.timespan,
-                nodes=core_contact.nodes,
-                bw=core_contact.bw,
-                loss=core_contact.loss,
-                delay=core_contact.delay,
-                jitter=core_contact.jitter,
-                fixed=core_contact.fixed,
-            )
-            contacts.append(contact)
-            if symmetric:
-                symmetric_contact = Contact(
-                    timespan=core_contact.timespan,
-                    nodes=(core_contact.nodes[1], core_contact.nodes[0]),
-                    bw=core_contact.bw,
-                    loss=core_contact.loss,
-                    delay=core_contact.delay,
-                    jitter=core_contact.jitter,
-                    fixed=core_contact.fixed,
-                )
-                contacts.append(symmetric_contact)
+    contacts = _ccp_contacts(df, mapping, symmetric)
     # remove duplicates
     contacts = list({(c.nodes, c.timespan): c for c in contacts}.values())
 
     return contacts
+
+
+def iter_ccp(
+    filename: str,
+    mapping: dict[str, int] | None = None,
+    symmetric: bool = False,
+    chunk_size: int = 65536,
+) -> Iterator[Contact]:
+    """
+    Yields the contacts of a core contact plan in the order of the file.
+    Only chunk_size lines are read at a time, so the plan does not have to
+    fit into memory. Unlike read_ccp, duplicates are not removed.
+    :param filename: The path to the core contact plan.
+    :param mapping: An optional mapping from string node identifiers to integer node IDs.
+    :param symmetric: Whether to create symmetric contacts.
+    :param chunk_size: The number of lines parsed at once.
+    :raises ValueError: If the file contains invalid contact lines.
+    """
+    if mapping is None:
+        mapping = {}
+    try:
+        reader = pd.read_csv(
+            filename,
+            sep=r"\s+",
+            header=None,
+            names=range(10),
+            dtype=str,
+            comment="#",
+            chunksize=chunk_size,
+        )
+    except pd.errors.EmptyDataError:
+        return
+    with reader:
+        try:
+            for df in reader:
+                yield from _ccp_contacts(df, mapping, symmetric)
+        except pd.errors.ParserError as e:
+            raise ValueError("Invalid core contact plan %s: %s" % (filename, e))
+
+
+def _ccp_contacts(
+    df: pd.DataFrame, mapping: dict[str, int], symmetric: bool
+) -> list[Contact]:
+    """Returns the contacts of the split lines of a core contact plan."""
+    lines = df[df[0] == "a"].to_numpy()
+    if len(lines) == 0:
+        return []
+    is_fixed = lines[:, 1] == "fixed"
+    num_fields = pd.notna(lines).sum(axis=1)
+    valid = ((lines[:, 1] == "contact") & (num_fields == 10)) | (
+        is_fixed & (num_fields == 8)
+    )
+    if not valid.all():
+        line = lines[np.argmin(valid)]
+        raise ValueError(
+            "Invalid CoreContact line: %s" % " ".join(line[pd.notna(line)])
+        )
+    # fixed contacts do not have a timespan, so their fields are moved to
+    # the columns of the other contacts: start end node1 node2 bw loss delay jitter
+    columns = np.where(is_fixed[:, None], np.roll(lines, 2, axis=1), lines)[:, 2:].T
+    start = columns[0].copy()
+    end = columns[1].copy()
+    start[~is_fixed] = start[~is_fixed].astype(float)
+    end[~is_fixed] = end[~is_fixed].astype(float)
+    start[is_fixed] = 0
+    end[is_fixed] = -1
+    timespans = list(zip(start.tolist(), end.tolist()))
+    fixed = is_fixed.tolist()
+
+    def parse_node(node):
+        if node in mapping:
+            return mapping[node]
+        return int(node)
+
+    # node names and bandwidths repeat a lot, so each one is parsed only once
+    nodes = {node: parse_node(node) for node in pd.unique(columns[2:4].ravel())}
+    node1 = [nodes[node] for node in columns[2]]
+    node2 = [nodes[node] for node in columns[3]]
+    bandwidths = {bw: bandwidth_parser(bw) for bw in pd.unique(columns[4])}
+    bw = [bandwidths[bw] for bw in columns[4]]
+    loss = np.array(columns[5], dtype=float).tolist()
+    delay = np.array(columns[6], dtype=float).tolist()
+    jitter = np.array(columns[7], dtype=float).tolist()
+
+    contacts = list(
+        map(Contact, timespans, zip(node1, node2), bw, loss, delay, jitter, fixed)
+    )
+    if symmetric:
+        reverse = map(
+            Contact, timespans, zip(node2, node1), bw, loss, delay, jitter, fixed
+        )
+        contacts = [c for pair in zip(contacts, reverse) for c in pair]
+    return contacts
+
+
+def write_ccp(filename: str, contacts: list[Contact], loop: bool = False) -> None:
+    """
+    Writes contacts as core contact plan, which can be read with read_ccp.
+    :param filename: The path to the core contact plan.
+    :param contacts: The contacts to write.
+    :param loop: Whether the contact plan should be looped.
+    """
+    with open(filename, "w") as f:
+        f.write("s loop %d\n" % int(loop))
+        for c in contacts:
+            # contacts without bandwidth limit
+            bw = 0 if c.bw is None else c.bw
+            if c.fixed:
+                f.write(
+                    "a fixed %d %d %d %r %r %r\n"
+                    % (c.nodes[0], c.nodes[1], bw, c.loss, c.delay, c.jitter)
+                )
+            else:
+                f.write(
+                    "a contact +%r +%r %d %d %d %r %r %r\n"
+                    % (
+                        c.timespan[0],
+                        c.timespan[1],
+                        c.nodes[0],
+                        c.nodes[1],
+                        bw,
+                        c.loss,
+                        c.delay,
+                        c.jitter,
+                    )
+                )
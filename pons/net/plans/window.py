@@ -0,0 +1,243 @@
+import logging
+import math
+import os
+import queue
+import threading
+from bisect import bisect_right
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from pons.net.plans import CommonContactPlan, Contact, ContactPlan
+
+logger = logging.getLogger(__name__)
+
+
+class WindowedContactPlan(CommonContactPlan):
+    """
+    A contact plan that streams its contacts from a source sorted by start
+    time and only keeps the contacts around the current time in memory.
+
+    Time is split into windows of the given length. The plan of a window
+    holds the contacts starting in it and the contacts of earlier windows
+    that are still active at its start, so all contacts active at a time are
+    in the plan of its window. Windows in which no contacts start share the
+    plan of the window before them. A background thread reads and indexes
+    the next window while the current one is used. Plans of windows before
+    the previous window of the latest queried time are dropped, so queries
+    have to move forward in time like the simulation does.
+    """
+
+    def __init__(
+        self,
+        source: Iterable[Contact],
+        window: float,
+        symmetric: bool = False,
+        prefetch: int = 1,
+    ) -> None:
+        if window <= 0:
+            raise ValueError("The window of a contact plan must be positive.")
+        self.window = window
+        self.symmetric = symmetric
+        # the loaded plans with the first window they cover and the window
+        # after the last one, ordered by time
+        self.firsts: List[int] = []
+        self.spans: List[Tuple[int, float, ContactPlan]] = []
+        self.final = False
+        self.current = 0
+        self.fixed: Optional[List[Tuple[int, int]]] = None
+        self.stop = threading.Event()
+        self.queue: queue.Queue = queue.Queue(maxsize=prefetch)
+        self.thread = threading.Thread(
+            target=self._prefetch, args=(iter(source),), daemon=True
+        )
+        self.thread.start()
+
+    @classmethod
+    def from_file(
+        cls,
+        filename: str,
+        window: float,
+        mapping: dict[str, int] | None = None,
+        symmetric: bool = False,
+    ) -> "WindowedContactPlan":
+        """
+        Streams the contacts of a CSV file, core contact plan or binary
+        contact plan, the format is determined by the file extension. The
+        contacts in the file have to be sorted by start time.
+        :raises ValueError: If the file format is not supported.
+        """
+        from pons.net.plans.binary import PLAN_SUFFIX, read_plan
+        from pons.net.plans.parser import iter_ccp, iter_csv
+
+        extension = os.path.splitext(filename)[1].lower()
+        if extension == ".csv":
+            source = iter_csv(filename, mapping=mapping)
+        elif extension == ".ccp":
+            source = iter_ccp(filename, mapping=mapping)
+        elif extension == PLAN_SUFFIX:
+            # the contacts of binary plans are memory-mapped in start order
+            source = read_plan(filename).contacts
+        else:
+            raise ValueError(
+                f"Unsupported contact plan format for streaming: {filename}. Please use .csv, .ccp or {PLAN_SUFFIX}."
+            )
+        return cls(source, window, symmetric=symmetric)
+
+    def __str__(self) -> str:
+        return "WindowedContactPlan(window=%r, windows=%d)" % (
+            self.window,
+            len(self.spans),
+        )
+
+    def close(self) -> None:
+        """Stops reading the source."""
+        self.stop.set()
+
+    def _window_of(self, time: float) -> int:
+        return max(int(time // self.window), 0)
+
+    def _prefetch(self, source: Iterator[Contact]) -> None:
+        """Reads and indexes the plans of the windows one after the other."""
+        try:
+            contacts: List[Contact] = []
+            pending = next(source, None)
+            last_start = -math.inf
+            first = 0
+            while not self.stop.is_set():
+                while pending is not None and (
+                    self._window_of(pending.timespan[0]) <= first
+                ):
+                    if pending.timespan[0] < last_start:
+                        raise ValueError(
+                            f"The contacts of a windowed contact plan must be sorted by start time: {pending.nodes} starts at {pending.timespan[0]} after {last_start}"
+                        )
+                    last_start = pending.timespan[0]
+                    contacts.append(pending)
+                    pending = next(source, None)
+                # the plan covers all windows until the next contact starts
+                if pending is None:
+                    end = math.inf
+                else:
+                    end = self._window_of(pending.timespan[0])
+                plan = ContactPlan(contacts, symmetric=self.symmetric)
+                if not self._put((first, end, plan)) or pending is None:
+                    return
+                # contacts still active in the next window and fixed contacts,
+                # which are not bound to any time
+                start = end * self.window
+                contacts = [
+                    c for c in plan.contacts if c.fixed or c.timespan[1] >= start
+                ]
+                first = end
+        except BaseException as e:
+            self._put(e)
+
+    def _put(self, item) -> bool:
+        """Hands an item to the simulation, returns False if the plan was closed."""
+        while not self.stop.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _receive(self) -> None:
+        """Receives the plan of the next windows from the prefetch thread."""
+        item = self.queue.get()
+        if isinstance(item, BaseException):
+            self.final = True
+            raise item
+        first, end, plan = item
+        self.firsts.append(first)
+        self.spans.append((first, end, plan))
+        if end == math.inf:
+            self.final = True
+        if self.fixed is None:
+            self.fixed = plan.fixed_links()
+
+    def _span(self, window: int) -> Tuple[int, float, ContactPlan]:
+        """Returns the loaded plan covering a window, loading it if needed."""
+        while not self.final and (len(self.spans) == 0 or self.spans[-1][1] <= window):
+            self._receive()
+        idx = bisect_right(self.firsts, window) - 1
+        if idx < 0:
+            logger.warning(
+                "Contacts at %r were already dropped from the windowed plan.",
+                window * self.window,
+            )
+            idx = 0
+        return self.spans[idx]
+
+    def _plan(self, time: float) -> ContactPlan:
+        """Returns the plan for a time and drops the plans of past windows."""
+        window = self._window_of(time)
+        if window > self.current:
+            self.current = window
+            # the plan of the previous window is kept for queries that lag
+            # slightly behind
+            while len(self.spans) > 1 and self.spans[1][0] <= window - 1:
+                del self.spans[0]
+                del self.firsts[0]
+        return self._span(window)[2]
+
+    def loss_for_contact(self, simtime: float, node1: int, node2: int) -> float:
+        return self._plan(simtime).loss_for_contact(simtime, node1, node2)
+
+    def has_contact(self, simtime: float, node1: int, node2: int) -> bool:
+        return self._plan(simtime).has_contact(simtime, node1, node2)
+
+    def tx_time_for_contact(
+        self, simtime: float, node1: int, node2: int, size: int
+    ) -> float:
+        return self._plan(simtime).tx_time_for_contact(simtime, node1, node2, size)
+
+    def contact_between(self, time: float, node1: int, node2: int) -> Optional[Contact]:
+        return self._plan(time).contact_between(time, node1, node2)
+
+    def at(self, time: float) -> List[Contact]:
+        return self._plan(time).at(time)
+
+    def next_event(self, time: float) -> Optional[float]:
+        """Returns the first start or end of a contact after the given time or None."""
+        window = self._window_of(time)
+        while True:
+            first, end, plan = self._span(window)
+            next_time = plan.next_event(time)
+            # later plans might hold contacts starting before next_time
+            if end == math.inf or (
+                next_time is not None and self._window_of(next_time) < end
+            ):
+                return next_time
+            window = end
+
+    def changed_links(self, time: float) -> Optional[List[Tuple[int, int]]]:
+        return self._plan(time).changed_links(time)
+
+    def link_events(self, time: float) -> List[Tuple[str, Contact]]:
+        return self._plan(time).link_events(time)
+
+    def all_contacts(self) -> List[Tuple[int, int]]:
+        """Returns the node pairs of the contacts in the loaded windows."""
+        pairs = set()
+        for _, _, plan in self.spans:
+            pairs.update(plan.all_contacts())
+        return list(pairs)
+
+    def raw_contacts(self) -> List[Contact]:
+        """Returns the contacts of the loaded windows."""
+        contacts = {}
+        for _, _, plan in self.spans:
+            for c in plan.contacts:
+                contacts[c] = None
+        return list(contacts)
+
+    def fixed_links(self) -> List[Tuple[int, int]]:
+        if self.fixed is None:
+            self._span(0)
+        return list(self.fixed)
+
+    def __eq__(self, value: object) -> bool:
+        return self is value
+
+    def __hash__(self) -> int:
+        return id(self)
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Iterable
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from pons import Node
+
+
+class PositionStore(object):
+    """
+    Structure-of-arrays copy of the positions of all nodes.
+
+    Rows follow the order in which the simulation iterates over its nodes, so
+    range checks for a whole network (or for the nodes that moved) run as one
+    vectorized numpy operation instead of a Python loop over node pairs.
+    """
+
+    def __init__(self, nodes: Iterable[Node]):
+        nodes = list(nodes)
+        self.ids = np.array([n.node_id for n in nodes], dtype=np.int64)
+        self.rows: Dict[int, int] = {n.node_id: i for i, n in enumerate(nodes)}
+        self.x = np.zeros(len(nodes))
+        self.y = np.zeros(len(nodes))
+        self.z = np.zeros(len(nodes))
+        for n in nodes:
+            self.update(n)
+
+    def __str__(self):
+        return "PositionStore(%d nodes)" % len(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def update(self, node: Node):
+        """Copies the current position of a node into the store."""
+        row = self.rows[node.node_id]
+        self.x[row] = node.x
+        self.y[row] = node.y
+        self.z[row] = node.z
+
+    def dist_sq(self, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """
+        Returns the matrix of squared distances between the nodes in rows and
+        the nodes in cols, computed exactly like NetworkSettings.has_contact.
+        """
+        dx = self.x[rows, None] - self.x[None, cols]
+        dy = self.y[rows, None] - self.y[None, cols]
+        dz = self.z[rows, None] - self.z[None, cols]
+        return dx * dx + dy * dy + dz * dz
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING, Dict, Iterable, List, Set, Tuple
+
+if TYPE_CHECKING:
+    from pons import Node
+
+Cell = Tuple[int, int, int]
+
+
+class SpatialGrid(object):
+    """A uniform grid (spatial hash) over node positions.
+
+    The cell size equals the network range, so two nodes that are in range
+    of each other are always in the same or in adjacent cells.
+    """
+
+    def __init__(self, range: float):
+        self.range = range
+        if range > 0:
+            # slightly larger than the range, so float rounding in
+            # NetworkSettings.has_contact can never accept a pair that is
+            # more than one cell apart
+            self.cell_size = range * (1 + 1e-9)
+        else:
+            # range 0 only accepts (nearly) identical positions
+            self.cell_size = 1.0
+        self.cells: Dict[Cell, Set[int]] = {}
+        self.node_cells: Dict[int, Cell] = {}
+
+    def __str__(self):
+        return "SpatialGrid(%.02f, %d cells, %d nodes)" % (
+            self.range,
+            len(self.cells),
+            len(self.node_cells),
+        )
+
+    def cell_of(self, x: float, y: float, z: float) -> Cell:
+        size = self.cell_size
+        return (math.floor(x / size), math.floor(y / size), math.floor(z / size))
+
+    def update(self, node: Node):
+        """Moves a node to the cell matching its current position."""
+        cell = self.cell_of(node.x, node.y, node.z)
+        old_cell = self.node_cells.get(node.node_id)
+        if old_cell == cell:
+            return
+        if old_cell is not None:
+            members = self.cells[old_cell]
+            members.discard(node.node_id)
+            if len(members) == 0:
+                del self.cells[old_cell]
+        self.node_cells[node.node_id] = cell
+        self.cells.setdefault(cell, set()).add(node.node_id)
+
+    def remove(self, node_id: int):
+        cell = self.node_cells.pop(node_id, None)
+        if cell is not None:
+            members = self.cells[cell]
+            members.discard(node_id)
+            if len(members) == 0:
+                del self.cells[cell]
+
+    def nearby(self, node: Node) -> Set[int]:
+        """Returns the ids of all nodes in the cell of a node and the 26 cells around it."""
+        cx, cy, cz = self.cell_of(node.x, node.y, node.z)
+        result = set()
+        cells = self.cells
+        for x in (cx - 1, cx, cx + 1):
+            for y in (cy - 1, cy, cy + 1):
+                for z in (cz - 1, cz, cz + 1):
+                    members = cells.get((x, y, z))
+                    if members is not None:
+                        result.update(members)
+        return result
+
+
+class SpatialIndex(object):
+    """Keeps one SpatialGrid per distinct range of all range-based networks."""
+
+    def __init__(self, nodes: Iterable[Node]):
+        self.nodes: Dict[int, Node] = {}
+        self.order: Dict[int, int] = {}
+        self.grids: Dict[float, SpatialGrid] = {}
+        for node in nodes:
+            self.order[node.node_id] = len(self.order)
+            self.nodes[node.node_id] = node
+            for net in node.net.values():
+                if net.contactplan is None and net.range not in self.grids:
+                    self.grids[net.range] = SpatialGrid(net.range)
+        self.update_all()
+
+    def __str__(self):
+        return "SpatialIndex(%s)" % ", ".join(str(g) for g in self.grids.values())
+
+    def update(self, node: Node):
+        """Updates the grid cells of a node after it moved."""
+        for grid in self.grids.values():
+            grid.update(node)
+
+    def update_all(self):
+        for node in self.nodes.values():
+            self.update(node)
+
+    def candidates(self, node: Node, range: float, extra: Set[int]) -> List[Node]:
+        """
+        Returns all nodes that might be in range of a node, plus the nodes in extra,
+        in the same order in which the simulation iterates over its nodes.
+        """
+        ids = self.grids[range].nearby(node)
+        ids.update(extra)
+        ids.discard(node.node_id)
+        order = self.order
+        return [self.nodes[nid] for nid in sorted(ids, key=order.__getitem__)]
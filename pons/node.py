@@ -65,20 +65,33 @@ class Node(object):
         if self.router is not None:
             self.router.start(netsim, self.node_id)
 
-    def calc_neighbors(self, simtime, nodes: List[Node]):
-        old_neigbhbor_ids = set(
-            [nid for nids in self.neighbors.values() for nid in nids]
-        )
+    def calc_neighbors(
+        self,
+        simtime,
+        nodes: List[Node],
+        spatial_index: pons.net.SpatialIndex | None = None,
+        nets: List[str] | None = None,
+    ):
         for net in self.net.values():
+            if nets is not None and net.name not in nets:
+                continue
+            # links are tracked per network, a neighbor in another network
+            # neither keeps a link up nor takes it down
+            old_neighbor_ids = set(self.neighbors.get(net.name, []))
             self.neighbors[net.name] = []
-            for node in nodes:
+            candidates = nodes
+            if spatial_index is not None and net.contactplan is None:
+                # only nodes in nearby cells can be in range, old neighbors
+                # are still needed to detect links going down
+                candidates = spatial_index.candidates(self, net.range, old_neighbor_ids)
+            for node in candidates:
                 if node.node_id != self.node_id:
                     # print("node %d: %s %s %s" % (node.id, node.net, net.name,  net.has_contact(simtime, self, node)))
                     if net.name in node.net and net.has_contact(simtime, self, node):
                         self.neighbors[net.name].append(node.node_id)
                         if (
                             net.contactplan is None
-                            and node.node_id not in old_neigbhbor_ids
+                            and node.node_id not in old_neighbor_ids
                         ):
                             event_log(
                                 simtime,
@@ -90,10 +103,7 @@ class Node(object):
                                 },
                             )
                     else:
-                        if (
-                            net.contactplan is None
-                            and node.node_id in old_neigbhbor_ids
-                        ):
+                        if net.contactplan is None and node.node_id in old_neighbor_ids:
                             event_log(
                                 simtime,
                                 "LINK",
@@ -105,8 +115,12 @@ class Node(object):
                             )
         # self.log("neighbors: %s @ %f" % (self.neighbors, simtime))
 
-    def add_all_neighbors(self, simtime, nodes: List[Node]):
+    def add_all_neighbors(
+        self, simtime, nodes: List[Node], nets: List[str] | None = None
+    ):
         for net in self.net.values():
+            if nets is not None and net.name not in nets:
+                continue
             self.neighbors[net.name] = []
             for node in nodes:
                 if node.node_id != self.node_id:
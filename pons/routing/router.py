@@ -1,4 +1,3 @@
-from copy import copy
 import pons
 import logging
 from pons.event_log import event_log
@@ -128,65 +127,59 @@ class Router(object):
         for app in self.apps:
             # self.log("starting app %s" % app)
             app.start(netsim, my_id)
-        self.env.process(self.scan())
+        self.last_peer_found = self.env.now
+        if self.netsim.do_actual_scan:
+            self.env.process(self.scan())
+        else:
+            # assume some kind of peer discovery mechanism, peers are handed
+            # over by the neighbor service of the simulation
+            self.netsim.neighbor_service.register(self)
 
     def scan(self):
-        self.last_peer_found = self.netsim.env.now
-
+        """Peer discovery with hello messages (only used with real_scan)."""
         while True:
             # print("[%s] scanning..." % self.my_id)
-
-            if self.netsim.do_actual_scan:
-                # do actual peer discovery with a hello message
-                self.peers.clear()
-                self.netsim.nodes[self.my_id].send(
-                    self.netsim,
+            self.peers.clear()
+            self.netsim.nodes[self.my_id].send(
+                self.netsim,
+                pons.BROADCAST_ADDR,
+                pons.Message(
+                    "HELLO",
+                    self.my_id,
                     pons.BROADCAST_ADDR,
-                    pons.Message(
-                        "HELLO",
-                        self.my_id,
-                        pons.BROADCAST_ADDR,
-                        HELLO_MSG_SIZE,
-                        self.netsim.env.now,
-                        metadata={"is_bundle": False},
-                    ),
-                )
-            else:
-                # assume some kind of peer discovery mechanism
-                self.netsim.nodes[self.my_id].calc_neighbors(
-                    self.netsim.env.now, self.netsim.nodes.values()
-                )
-
-                old_peers = copy(self.peers)
-                peers = set()
-                for net in self.netsim.nodes[self.my_id].neighbors.values():
-                    peers.update(net)
-                self.peers = list(peers)
-                # self.peers = copy(self.netsim.nodes[self.my_id].neighbors)
-
-                new_peers = [p for p in self.peers if p not in old_peers]
-
-                for peer in new_peers:
-                    self.on_peer_discovered(peer)
-
-                if len(old_peers) == 0 and len(self.peers) > 0:
-                    diff = self.netsim.env.now - self.last_peer_found
-                    event_log(
-                        self.netsim.env.now,
-                        "PEERS",
-                        {
-                            "event": "NO_PEERS_PERIOD",
-                            "id": self.my_id,
-                            "duration": diff,
-                        },
-                    )
-                elif len(old_peers) > 0 and len(self.peers) == 0:
-                    self.last_peer_found = self.netsim.env.now
-
-                    # report period without peers
-
+                    HELLO_MSG_SIZE,
+                    self.netsim.env.now,
+                    metadata={"is_bundle": False},
+                ),
+            )
             yield self.env.timeout(self.scan_interval)
 
+    def update_peers(self, peers: set):
+        """Called by the neighbor service with the current neighbors of this node."""
+        old_peers = set(self.peers)
+        self.peers = list(peers)
+
+        new_peers = [p for p in self.peers if p not in old_peers]
+
+        for peer in new_peers:
+            self.on_peer_discovered(peer)
+
+        if len(old_peers) == 0 and len(self.peers) > 0:
+            diff = self.netsim.env.now - self.last_peer_found
+            event_log(
+                self.netsim.env.now,
+                "PEERS",
+                {
+                    "event": "NO_PEERS_PERIOD",
+                    "id": self.my_id,
+                    "duration": diff,
+                },
+            )
+        elif len(old_peers) > 0 and len(self.peers) == 0:
+            self.last_peer_found = self.netsim.env.now
+
+            # report period without peers
+
     def _on_tx_failed(self, msg_id: str, remote_id: int):
         self.stats["aborted"] += 1
         self.netsim.routing_stats["aborted"] += 1
@@ -134,7 +134,17 @@ class NetSim(object):
                 max(n.y for n in self.nodes.values()) + 50,
             )
 
-        self.mover = pons.OneMovementManager(self.env, self.nodes, self.movements)
+        # optional structure-of-arrays copy of all positions, range checks
+        # then run vectorized with numpy
+        self.positions = None
+        if self.config.get("position_store", False):
+            self.positions = pons.net.PositionStore(self.nodes.values())
+
+        # computes the neighbors of all nodes once per tick for all routers
+        self.neighbor_service = pons.net.NeighborService(self, self.positions)
+        self.mover = pons.OneMovementManager(
+            self.env, self.nodes, self.movements, self.neighbor_service
+        )
 
     def get_id_by_name(self, name):
         return self.name_to_id_map.get(name, -1)
@@ -160,7 +170,10 @@ class NetSim(object):
     def setup(self):
         logger.info("Initializing simulation: %s", self.config)
 
-        if self.movements is not None and len(self.movements) > 0:
+        # pick up positions that were changed after the simulation was created
+        self.neighbor_service.invalidate()
+
+        if self.movements is not None:
             logger.debug("Starting movement manager...")
             self.mover.start()
 
@@ -188,6 +201,9 @@ class NetSim(object):
 
             pons.event_log.event_filter = self.config.get("event_filter", [])
 
+        if self.config.get("contact_prediction", False):
+            self.predict_contacts()
+
         for n in self.nodes.values():
             # print("-> start node %d w/ %d apps" % (n.id, len(n.apps)))
             n.start(self)
@@ -206,8 +222,32 @@ class NetSim(object):
                     raise Exception("unknown message generator type")
 
         logger.debug("Nodes: %s", self.nodes)
-        for n in self.nodes.values():
-            n.calc_neighbors(0, self.nodes.values())
+        self.neighbor_service.update(0)
+
+    def predict_contacts(self):
+        """
+        Computes the exact contact times of all range-based networks with a
+        common range from the movements, interpreted as piecewise-linear
+        trajectories, and schedules their links as events.
+        """
+        trajectories = pons.mobility.LinearTrajectories.from_moves(
+            self.movements, self.nodes.values()
+        )
+        for name in sorted(self.neighbor_service.symmetric_nets):
+            members = [
+                n
+                for n in self.nodes.values()
+                if name in n.net and n.net[name].contactplan is None
+            ]
+            contacts = pons.mobility.predict_contacts(
+                trajectories,
+                [n.node_id for n in members],
+                members[0].net[name].range,
+                self.env.now,
+                self.duration,
+            )
+            logger.debug("Predicted %d contacts for network %s", len(contacts), name)
+            self.neighbor_service.schedule_links(name, contacts)
 
     def using_contactplan(self):
         for n in self.nodes.values():
@@ -232,32 +272,49 @@ class NetSim(object):
             logger.warning("No contact plan")
             return
 
-        initial_events = contactplan.at(0)
-        if len(initial_events) != 0:
-            for e in initial_events:
-                if e.timespan[0] == 0:
-                    event_log(0, "LINK", {"event": "UP", "nodes": e.nodes})
+        # contacts inserted or retracted while the simulation runs
+        changes = []
+        wakeup = self.env.event()
 
-        next_event = contactplan.next_event(0)
+        def on_change(contact, inserted):
+            changes.append((contact, inserted))
+            if not wakeup.triggered:
+                wakeup.succeed()
+
+        contactplan.subscribe(on_change)
+
+        for event, e in contactplan.link_events(0):
+            if event == "UP":
+                event_log(0, "LINK", {"event": "UP", "nodes": e.nodes})
+
+        events = contactplan.events(0)
+        next_event = next(events, None)
         if next_event is None:
             logger.warning("No events in contact plan")
-            return
 
-        total = 0
-        while True:
-            yield self.env.timeout(next_event)
-            total += next_event
-            events = contactplan.at(total)
-            for e in events:
-                if e.timespan[0] == total:
-                    event_log(total, "LINK", {"event": "UP", "nodes": e.nodes})
-                if e.timespan[1] == total:
-                    event_log(total, "LINK", {"event": "DOWN", "nodes": e.nodes})
-
-            next_event = contactplan.next_event(total)
-            if next_event is None or next_event > self.duration:
-                break
-            next_event -= total
+        while next_event is None or next_event <= self.duration:
+            if next_event is None:
+                yield wakeup
+                due = False
+            else:
+                timeout = self.env.timeout(next_event - self.env.now)
+                yield timeout | wakeup
+                due = timeout.processed or next_event <= self.env.now
+            now = next_event if due else self.env.now
+            if due:
+                for event, e in contactplan.link_events(now):
+                    event_log(now, "LINK", {"event": event, "nodes": e.nodes})
+            if wakeup.triggered:
+                # only changes of active contacts change links right now
+                for e, inserted in changes:
+                    if e.timespan[0] <= now <= e.timespan[1]:
+                        event = "UP" if inserted else "DOWN"
+                        event_log(now, "LINK", {"event": event, "nodes": e.nodes})
+                changes.clear()
+                wakeup = self.env.event()
+                events = contactplan.events(now)
+
+            next_event = next(events, None)
 
     def run(self):
         logger.info("== running simulation for %d seconds ==" % self.duration)
@@ -270,7 +327,8 @@ class NetSim(object):
 
         signal.signal(signal.SIGINT, signal_handler)
 
-        all_contactplans = set()
+        # nodes share their contact plans, so they are deduplicated by identity
+        all_contactplans = {}
         for n in self.nodes.values():
             event_log(
                 0,
@@ -288,9 +346,9 @@ class NetSim(object):
             for net in n.net.values():
                 net.start(self)
                 if net.contactplan is not None:
-                    all_contactplans.add(net.contactplan)
+                    all_contactplans[id(net.contactplan)] = net.contactplan
 
-        for cp in all_contactplans:
+        for cp in all_contactplans.values():
             self.env.process(self.contact_logger(cp))
 
         logger.debug("Global number of unique contact plans: %d", len(all_contactplans))
@@ -300,9 +358,13 @@ class NetSim(object):
         last_sim = 0.0
 
         if self.using_contactplan():
+            # links of contact plans follow the events of the plans, only
+            # plans without events are still polled
+            self.neighbor_service.schedule_plan_links()
+            polled = self.neighbor_service.polled_nets
             contacts = set()
             for n in self.nodes.values():
-                n.add_all_neighbors(self.env.now, self.nodes.values())
+                n.add_all_neighbors(self.env.now, self.nodes.values(), polled)
                 for net in n.net.values():
                     contacts.update(net.contactplan.fixed_links())
 
@@ -315,6 +377,8 @@ class NetSim(object):
                 #         len(n.neighbors[list(n.neighbors.keys())[0]]),
                 #     )
                 # )
+            # neighbors are reset, so the first scan has to refresh them again
+            self.neighbor_service.invalidate()
             logger.debug(
                 "global number of unique contacts at start: %d %s",
                 len(contacts),
@@ -332,9 +396,7 @@ class NetSim(object):
                 )
 
         else:
-            now_sim = self.env.now
-            for n in self.nodes.values():
-                n.calc_neighbors(now_sim, self.nodes.values())
+            self.neighbor_service.update(self.env.now)
 
         print("")
         while self.env.now < self.duration + 1.0 and not aborted:
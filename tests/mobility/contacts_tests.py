@@ -0,0 +1,59 @@
+import os
+import random
+import tempfile
+import unittest
+
+import pons
+from pons.net.plans import ContactPlan
+from pons.net.plans.parser import read_ccp, write_ccp
+
+
+class ContactsTests(unittest.TestCase):
+    """
+    tests for extracting contact plans from movements
+    """
+
+    def test_extract(self):
+        """
+        tests that the contact plan matches range checks at every sample of the movement
+        """
+        random.seed(7)
+        duration = 300
+        moves = pons.generate_randomwaypoint_movement(
+            duration, 10, 200, 200, max_pause=20
+        )
+        plan = pons.extract_contact_plan(moves, 40, duration)
+        net = pons.NetworkSettings("net", range=40)
+        nodes = {n.node_id: n for n in pons.generate_nodes(10)}
+        idx = 0
+        for t in range(duration):
+            while idx < len(moves) and moves[idx][0] == t:
+                _, node_id, x, y, z = moves[idx]
+                nodes[node_id].x, nodes[node_id].y, nodes[node_id].z = x, y, z
+                idx += 1
+            for a in range(10):
+                for b in range(10):
+                    if a != b:
+                        self.assertEqual(
+                            plan.has_contact(t, a, b),
+                            net.has_contact(t, nodes[a], nodes[b]),
+                        )
+
+    def test_ccp(self):
+        """
+        tests that a written core contact plan reads back the same contacts
+        """
+        random.seed(8)
+        moves = pons.RandomWaypointMovement(200, 8, 150, 150)
+        plan = pons.extract_contact_plan(moves, 30, 200, bandwidth=1000, delay=0.1)
+        self.assertGreater(len(plan.contacts), 0)
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, "contacts.ccp")
+            write_ccp(filename, plan.contacts)
+            contacts = read_ccp(filename)
+        self.assertEqual(ContactPlan(contacts, symmetric=True), plan)
+        self.assertEqual(contacts[0].delay, 100.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
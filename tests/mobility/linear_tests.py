@@ -0,0 +1,103 @@
+import random
+import unittest
+
+import pons
+import pons.routing
+from pons.mobility import LinearTrajectories, predict_contacts
+
+
+class LinearTests(unittest.TestCase):
+    """
+    tests for the contact prediction of piecewise-linear movement
+    """
+
+    def test_crossing(self):
+        """
+        tests the exact contact times of a node passing a static node
+        """
+        moves = [(0.0, 0, 0.0, 0.0, 0.0), (100.0, 0, 100.0, 0.0, 0.0)]
+        moves.append((0.0, 1, 50.0, 5.0, 0.0))
+        trajectories = LinearTrajectories.from_moves(moves, max_step=100.0)
+        contacts = predict_contacts(trajectories, [0, 1], 10.0, 0.0, 200.0)
+        self.assertEqual(len(contacts), 1)
+        # entering and leaving at |x - 50| = sqrt(10^2 - 5^2)
+        self.assertAlmostEqual(contacts[0]["start"], 50 - 75**0.5)
+        self.assertAlmostEqual(contacts[0]["end"], 50 + 75**0.5)
+        self.assertEqual((contacts[0]["a"], contacts[0]["b"]), (0, 1))
+
+    def test_pause(self):
+        """
+        tests that nodes wait at their last sample if the next one is far away
+        """
+        moves = [(0.0, 0, 0.0, 0.0, 0.0), (50.0, 0, 10.0, 0.0, 0.0)]
+        trajectories = LinearTrajectories.from_moves(moves)
+        positions = trajectories.positions([0], [0.0, 48.0, 49.0, 49.5, 50.0])
+        self.assertEqual(positions[:, 0, 0].tolist(), [0.0, 0.0, 0.0, 5.0, 10.0])
+
+    def test_samples(self):
+        """
+        tests that the contacts match range checks at every sample of the movement
+        """
+        random.seed(3)
+        duration = 600
+        moves = pons.generate_randomwaypoint_movement(
+            duration, 20, 300, 300, max_pause=20
+        )
+        trajectories = LinearTrajectories.from_moves(moves)
+        contacts = predict_contacts(trajectories, list(range(20)), 50, 0, duration)
+        net = pons.NetworkSettings("net", range=50)
+        nodes = {n.node_id: n for n in pons.generate_nodes(20)}
+        idx = 0
+        for t in range(duration):
+            while idx < len(moves) and moves[idx][0] == t:
+                _, node_id, x, y, z = moves[idx]
+                nodes[node_id].x, nodes[node_id].y, nodes[node_id].z = x, y, z
+                idx += 1
+            active = contacts[(contacts["start"] <= t) & (contacts["end"] >= t)]
+            expected = set(
+                (a, b)
+                for a in range(20)
+                for b in range(a + 1, 20)
+                if net.has_contact(t, nodes[a], nodes[b])
+            )
+            self.assertEqual(set(zip(active["a"], active["b"])), expected)
+
+    def test_netsim(self):
+        """
+        tests that the simulation sets the links at the predicted times
+        """
+        random.seed(5)
+        duration = 300
+        moves = pons.generate_randomwaypoint_movement(
+            duration, 30, 300, 300, max_pause=20
+        )
+        nodes = pons.generate_nodes(
+            30,
+            net=[pons.NetworkSettings("net", range=50)],
+            router=pons.routing.EpidemicRouter(),
+        )
+        config = {
+            "movement_logger": False,
+            "peers_logger": False,
+            "contact_prediction": True,
+        }
+        netsim = pons.NetSim(
+            duration, nodes, world_size=(300, 300), movements=moves, config=config
+        )
+        trajectories = LinearTrajectories.from_moves(moves)
+        contacts = predict_contacts(trajectories, list(range(30)), 50, 0, duration)
+        netsim.setup()
+        for t in range(10, duration, 10):
+            now = t + 0.5
+            netsim.env.run(until=now)
+            active = contacts[(contacts["start"] <= now) & (contacts["end"] > now)]
+            expected = {n: set() for n in range(30)}
+            for a, b in zip(active["a"].tolist(), active["b"].tolist()):
+                expected[a].add(b)
+                expected[b].add(a)
+            for node in netsim.nodes.values():
+                self.assertEqual(set(node.neighbors["net"]), expected[node.node_id])
+
+
+if __name__ == "__main__":
+    unittest.main()
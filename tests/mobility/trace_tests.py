@@ -0,0 +1,108 @@
+import os
+import random
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+import pons
+from pons import MovementTrace, Ns2Movement, OneMovement, OneMovementReader
+
+
+class TraceTests(unittest.TestCase):
+    """
+    tests for array-backed movement traces
+    """
+
+    def test_from_list(self):
+        """
+        tests that a trace behaves like the list of moves it was created from
+        """
+        moves = [
+            (0.0, 0, 1.0, 2.0, 0.0),
+            (0.0, 1, 3.0, 4.0, 0.0),
+            (1.0, 0, 1.5, 2.5, 0.0),
+        ]
+        trace = MovementTrace.from_list(moves)
+        self.assertEqual(len(trace), 3)
+        self.assertEqual(trace.num_nodes, 2)
+        self.assertEqual(trace[2], moves[2])
+        self.assertEqual(list(trace), moves)
+        self.assertEqual(list(trace[1:]), moves[1:])
+
+    def test_randomwaypoint(self):
+        """
+        tests that generated moves are sorted by time and node
+        """
+        random.seed(1)
+        trace = pons.generate_randomwaypoint_movement(200, 10, 100, 100, max_pause=20)
+        keys = [(move[0], move[1]) for move in trace]
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(trace.num_nodes, 10)
+
+    def test_one_file(self):
+        """
+        tests reading a movement file of The ONE
+        """
+        path = Path(__file__).resolve().parents[2] / "examples/data/movements.one"
+        movement = OneMovement.from_file(path)
+        with open(path) as f:
+            lines = f.readlines()[1:]
+        self.assertEqual(len(movement.moves), len(lines))
+        time, node_id, x, y = lines[-1].split()
+        expected = (float(time), int(node_id), float(x), float(y), 0.0)
+        self.assertEqual(movement.moves[len(lines) - 1], expected)
+
+    def test_one_reader(self):
+        """
+        tests that streaming a movement file replays the same moves
+        """
+        path = Path(__file__).resolve().parents[2] / "examples/data/movements.one"
+        movement = OneMovement.from_file(path)
+        reader = OneMovementReader(path, chunk_size=7)
+        self.assertEqual(reader.duration, movement.duration)
+        self.assertEqual(list(reader), list(movement.moves))
+
+        positions = []
+        for moves in (movement.moves, reader):
+            nodes = pons.generate_nodes(movement.num_nodes)
+            config = {"movement_logger": False, "peers_logger": False}
+            netsim = pons.NetSim(
+                100, nodes, world_size=(1000, 1000), movements=moves, config=config
+            )
+            netsim.setup()
+            netsim.env.run(until=100)
+            positions.append([(n.x, n.y, n.z) for n in nodes])
+        self.assertEqual(positions[0], positions[1])
+
+    def test_cache(self):
+        """
+        tests that cached movement files give the same movement as parsing them
+        """
+        root = Path(__file__).resolve().parents[2]
+        one = root / "examples/data/movements.one"
+        ns2 = root / "examples/data/scenario1.ns_movements"
+        expected = [OneMovement.from_file(one), Ns2Movement.from_file(ns2, end_time=60)]
+        with tempfile.TemporaryDirectory() as tmp:
+            with mock.patch.dict(os.environ, {"PONS_CACHE_DIR": tmp}):
+                for _ in range(2):
+                    movements = [
+                        OneMovement.from_file(one),
+                        Ns2Movement.from_file(ns2, end_time=60),
+                    ]
+                    for movement, reference in zip(movements, expected):
+                        self.assertEqual(movement.num_nodes, reference.num_nodes)
+                        self.assertTrue(
+                            np.array_equal(movement.moves.data, reference.moves.data)
+                        )
+                    self.assertEqual(movements[0].duration, expected[0].duration)
+                    self.assertEqual(movements[1].end, expected[1].end)
+                # the second time the traces are memory-mapped from the cache
+                self.assertIsInstance(movements[0].moves.data, np.memmap)
+                self.assertEqual(len(os.listdir(tmp)), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import math
+import random
+import unittest
+
+import numpy as np
+
+import pons
+from pons.mobility import LinearTrajectories, MovementTrace
+
+
+def reference_randomwaypoint_movement(
+    duration,
+    num_nodes,
+    width,
+    height,
+    min_speed=1.0,
+    max_speed=5.0,
+    min_pause=0,
+    max_pause=120,
+):
+    """the original per-second random waypoint generator"""
+    moves = []
+    for i in range(num_nodes):
+        cur_time = 0.0
+        x = random.randint(0, width)
+        y = random.randint(0, height)
+        z = 0.0
+        moves.append((cur_time, i, x, y, z))
+        while cur_time < duration:
+            way_x = random.randint(0, width)
+            way_y = random.randint(0, height)
+            speed = random.random() * (max_speed - min_speed) + min_speed
+            pause = random.randint(min_pause, max_pause)
+            cur_time += pause
+            dist = math.sqrt((way_x - x) ** 2 + (way_y - y) ** 2)
+            time = dist / speed
+            step_x = (way_x - x) / time
+            step_y = (way_y - y) / time
+            for j in range(int(time)):
+                if cur_time + j >= duration:
+                    break
+                cur_time += 1
+                x += step_x
+                y += step_y
+                moves.append((cur_time, i, x, y, z))
+    moves.sort(key=lambda x: (x[0], x[1]))
+    return moves
+
+
+class WaypointTests(unittest.TestCase):
+    """
+    tests for the lazy random waypoint movement
+    """
+
+    def test_same_moves(self):
+        """
+        tests that the generator and the lazy model produce the original moves
+        """
+        for args in [(600, 20, 300, 300), (100.5, 5, 50, 50, 0.5, 1.0, 0, 3)]:
+            random.seed(11)
+            expected = reference_randomwaypoint_movement(*args)
+            random.seed(11)
+            trace = pons.generate_randomwaypoint_movement(*args)
+            self.assertEqual(list(trace), expected)
+            random.seed(11)
+            movement = pons.RandomWaypointMovement(*args, chunk_duration=37.0)
+            lazy = MovementTrace.from_chunks(movement.chunks())
+            self.assertTrue(np.array_equal(trace.data, lazy.data))
+
+    def test_position(self):
+        """
+        tests that positions match the last move of a node before a time
+        """
+        random.seed(3)
+        trace = pons.generate_randomwaypoint_movement(600, 10, 300, 300)
+        random.seed(3)
+        movement = pons.RandomWaypointMovement(600, 10, 300, 300)
+        for t in [0.0, 0.5, 17.0, 123.4, 599.9, 700.0]:
+            for node_id in range(10):
+                moves = [m for m in trace if m[1] == node_id and m[0] <= t]
+                self.assertEqual(movement.position(node_id, t), moves[-1][2:])
+
+    def test_breakpoints(self):
+        """
+        tests that the legs give the same trajectories as the sampled moves
+        """
+        random.seed(5)
+        trace = pons.generate_randomwaypoint_movement(600, 10, 300, 300)
+        random.seed(5)
+        movement = pons.RandomWaypointMovement(600, 10, 300, 300)
+        times = np.arange(0, 600, 0.25)
+        expected = LinearTrajectories.from_moves(trace).positions(range(10), times)
+        actual = LinearTrajectories.from_moves(movement).positions(range(10), times)
+        np.testing.assert_allclose(actual, expected, atol=1e-9)
+
+
+if __name__ == "__main__":
+    unittest.main()
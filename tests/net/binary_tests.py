@@ -0,0 +1,124 @@
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+from pons.net.plans import Contact, ContactColumns, ContactPlan
+from pons.net.plans.binary import load_plan, read_plan, write_plan
+from pons.net.plans.parser import write_ccp
+
+
+def random_contacts(count, num_nodes=6, duration=100):
+    contacts = []
+    for _ in range(count):
+        start = random.choice([random.randint(0, duration), random.random() * duration])
+        end = start + random.choice([0, 1, 5, duration / 2, random.random() * 30])
+        nodes = tuple(random.sample(range(num_nodes), 2))
+        loss = random.choice([0.0, 0.1, 0.5])
+        contacts.append(
+            Contact((start, end), nodes, bw=random.randint(1, 100), loss=loss)
+        )
+    return contacts
+
+
+class BinaryTests(unittest.TestCase):
+    """
+    tests for binary contact plans
+    """
+
+    def test_roundtrip(self):
+        """
+        tests that a memory-mapped plan answers all queries like the plan in memory
+        """
+        random.seed(11)
+        contacts = random_contacts(300)
+        contacts.append(Contact((0, -1), (1, 4), bw=None, fixed=True))
+        plan = ContactPlan(contacts, loop=True, symmetric=True)
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, "plan.pcp")
+            write_plan(filename, plan)
+            loaded = read_plan(filename)
+
+            self.assertIsInstance(loaded.contacts, ContactColumns)
+            self.assertEqual(loaded.contacts, plan.contacts)
+            self.assertEqual(loaded, plan)
+            self.assertEqual(loaded.get_max_time(), plan.get_max_time())
+            self.assertEqual(loaded.fixed_links(), [(1, 4)])
+            self.assertEqual(sorted(loaded.all_contacts()), sorted(plan.all_contacts()))
+            for _ in range(300):
+                t = random.random() * 150
+                self.assertEqual(loaded.at(t), plan.at(t))
+                self.assertEqual(loaded.next_event(t), plan.next_event(t))
+                a, b = random.sample(range(6), 2)
+                self.assertEqual(
+                    loaded.contact_between(t, a, b), plan.contact_between(t, a, b)
+                )
+
+    def test_updates(self):
+        """
+        tests that a plan with pending inserts and retracts is written with its live contacts
+        """
+        random.seed(14)
+        contacts = random_contacts(100)
+        plan = ContactPlan(list(contacts))
+        for c in random_contacts(20) + [Contact((0.0, 5.0), (3, 4))]:
+            plan.insert(c)
+            contacts.append(c)
+        for c in random.sample(contacts, 30):
+            plan.retract(c)
+            contacts.remove(c)
+        expected = ContactPlan(contacts)
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, "plan.pcp")
+            write_plan(filename, plan)
+            loaded = read_plan(filename)
+
+            self.assertEqual(list(loaded.contacts), expected.contacts)
+            for _ in range(300):
+                t = random.random() * 150
+                self.assertEqual(loaded.at(t), expected.at(t))
+                self.assertEqual(loaded.next_event(t), expected.next_event(t))
+                a, b = random.sample(range(6), 2)
+                self.assertEqual(
+                    loaded.has_contact(t, a, b), expected.has_contact(t, a, b)
+                )
+
+    def test_columns(self):
+        """
+        tests that plans of contacts in columns sort and index them like lists
+        """
+        random.seed(12)
+        contacts = random_contacts(200)
+        columns = ContactColumns.from_contacts(contacts)
+        plan = ContactPlan(columns)
+        expected = ContactPlan(list(contacts))
+        self.assertEqual(list(plan.contacts), expected.contacts)
+        for t in range(0, 150, 3):
+            self.assertEqual(plan.at(t), expected.at(t))
+
+    def test_cache(self):
+        """
+        tests that loading a text plan again maps the cached binary plan
+        """
+        random.seed(13)
+        contacts = [
+            Contact((float(s), s + 5.0), (a, b), bw=1000, delay=0.5)
+            for s, a, b in [(0, 1, 2), (3, 2, 3), (10, 1, 3)]
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, "contacts.ccp")
+            write_ccp(filename, contacts)
+            cache = os.path.join(tmp, "cache")
+            with mock.patch.dict(os.environ, {"PONS_CACHE_DIR": cache}):
+                parsed = load_plan(filename, symmetric=True)
+                self.assertEqual(len(os.listdir(cache)), 1)
+                cached = load_plan(filename, symmetric=True)
+            self.assertIsInstance(parsed.contacts, list)
+            self.assertIsInstance(cached.contacts, ContactColumns)
+            self.assertEqual(cached, parsed)
+            self.assertEqual(parsed.contacts, contacts)
+
+
+if __name__ == "__main__":
+    unittest.main()
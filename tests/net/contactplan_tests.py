@@ -0,0 +1,347 @@
+import random
+import unittest
+
+import pons
+from pons.net.plans import Contact, ContactPlan
+
+
+def random_contacts(num_contacts, num_nodes=6, duration=100):
+    contacts = []
+    for _ in range(num_contacts):
+        start = random.choice([random.randint(0, duration), random.random() * duration])
+        end = start + random.choice([0, 1, 5, duration / 2, random.random() * 30])
+        nodes = tuple(random.sample(range(num_nodes), 2))
+        loss = random.choice([0.0, 0.1, 0.5])
+        contacts.append(
+            Contact((start, end), nodes, bw=random.randint(1, 100), loss=loss)
+        )
+    return contacts
+
+
+class ContactPlanTests(unittest.TestCase):
+    """
+    tests for the queries of contact plans
+    """
+
+    def test_at(self):
+        """
+        tests that at() returns the active contacts for queries in any time order
+        """
+        random.seed(1)
+        for _ in range(50):
+            plan = ContactPlan(random_contacts(random.randint(0, 80)))
+            times = [random.random() * 120 for _ in range(30)] + list(range(0, 120, 3))
+            random.shuffle(times)
+            for t in times:
+                expected = [
+                    c for c in plan.contacts if c.timespan[0] <= t <= c.timespan[1]
+                ]
+                self.assertEqual(plan.at(t), expected)
+
+    def test_pairs(self):
+        """
+        tests the contact queries of node pairs against the active contacts
+        """
+        random.seed(2)
+        for symmetric in [False, True]:
+            for _ in range(30):
+                contacts = random_contacts(random.randint(0, 80), num_nodes=4)
+                plan = ContactPlan(contacts, symmetric=symmetric)
+                for t in [random.random() * 120 for _ in range(20)]:
+                    for a in range(4):
+                        for b in range(4):
+                            matching = [
+                                c
+                                for c in plan.at(t)
+                                if c.nodes == (a, b)
+                                or (symmetric and c.nodes == (b, a))
+                            ]
+                            self.assertEqual(
+                                plan.has_contact(t, a, b), len(matching) > 0
+                            )
+                            if len(matching) > 0:
+                                c = matching[0]
+                                self.assertEqual(plan.loss_for_contact(t, a, b), c.loss)
+                                self.assertEqual(
+                                    plan.tx_time_for_contact(t, a, b, 1000),
+                                    1000 / c.bw + c.delay / 1000,
+                                )
+                            else:
+                                self.assertEqual(plan.loss_for_contact(t, a, b), 0.0)
+                                with self.assertRaises(Exception):
+                                    plan.tx_time_for_contact(t, a, b, 1000)
+
+    def test_events(self):
+        """
+        tests that the event timeline contains every start and end of a contact
+        """
+        random.seed(3)
+        for _ in range(30):
+            plan = ContactPlan(random_contacts(random.randint(0, 40)))
+            timeline = sorted(set(t for c in plan.contacts for t in c.timespan))
+            self.assertEqual(list(plan.events(10)), [t for t in timeline if t > 10])
+            for t in [random.random() * 120 for _ in range(20)]:
+                later = [e for e in timeline if e > t]
+                self.assertEqual(
+                    plan.next_event(t), later[0] if len(later) > 0 else None
+                )
+
+    def test_period(self):
+        """
+        tests that a periodic plan answers queries like its contacts repeated
+        for every period, also for contacts lasting beyond the period
+        """
+        random.seed(4)
+        period = 80.0
+        # times in quarter seconds, so the repeated times are exact
+        contacts = [
+            Contact(tuple(round(t * 4) / 4 for t in c.timespan), c.nodes)
+            for c in random_contacts(60)
+        ]
+        plan = ContactPlan(list(contacts), symmetric=True, period=period)
+        self.assertTrue(plan.loop)
+        # the copies of a contact in later periods map to the contact
+        original = {id(c): c for c in contacts}
+        repeated = []
+        for k in range(6):
+            for c in contacts:
+                copy = Contact(
+                    (c.timespan[0] + k * period, c.timespan[1] + k * period), c.nodes
+                )
+                original[id(copy)] = c
+                repeated.append(copy)
+        unrolled = ContactPlan(repeated, symmetric=True)
+
+        def key(c):
+            return contacts.index(original[id(c)])
+
+        for _ in range(300):
+            t = random.random() * 5 * period
+            self.assertEqual(
+                sorted(map(key, plan.at(t))), sorted(map(key, unrolled.at(t)))
+            )
+            a, b = random.sample(range(6), 2)
+            self.assertEqual(plan.has_contact(t, a, b), unrolled.has_contact(t, a, b))
+
+        events = []
+        for t in plan.events(0):
+            if t > 5 * period:
+                break
+            events.append(t)
+        expected = [t for t in unrolled.events(0) if t <= 5 * period]
+        self.assertEqual(events, expected)
+        for t in expected:
+            self.assertEqual(
+                sorted(plan.changed_links(t)), sorted(unrolled.changed_links(t))
+            )
+            self.assertEqual(
+                sorted((e, key(c)) for e, c in plan.link_events(t)),
+                sorted((e, key(c)) for e, c in unrolled.link_events(t)),
+            )
+
+    def test_normalize(self):
+        """
+        tests that normalizing merges redundant contacts without changing the links
+        """
+        contacts = [
+            Contact((0.0, 10.0), (1, 2), bw=1000),
+            Contact((5.0, 15.0), (1, 2), bw=1000),
+            Contact((15.0, 20.0), (1, 2), bw=1000),
+            Contact((12.0, 18.0), (1, 2), bw=2000),
+            Contact((30.0, 30.0), (1, 2), bw=1000),
+            Contact((20.0, 25.0), (2, 1), bw=1000),
+            Contact((0, -1), (3, 4), bw=1000, fixed=True),
+            Contact((0, -1), (3, 4), bw=1000, fixed=True),
+        ]
+        normalized = ContactPlan(list(contacts)).normalize()
+        self.assertEqual(
+            normalized.contacts,
+            [
+                Contact((0.0, 20.0), (1, 2), bw=1000),
+                Contact((0, -1), (3, 4), bw=1000, fixed=True),
+                Contact((12.0, 18.0), (1, 2), bw=2000),
+                Contact((20.0, 25.0), (2, 1), bw=1000),
+            ],
+        )
+        normalized = ContactPlan(list(contacts), symmetric=True).normalize()
+        self.assertEqual(len(normalized.contacts), 3)
+        self.assertIn(Contact((0.0, 25.0), (1, 2), bw=1000), normalized.contacts)
+
+        random.seed(5)
+        contacts = [Contact(c.timespan, c.nodes, bw=1000) for c in random_contacts(200)]
+        for symmetric in [False, True]:
+            plan = ContactPlan(list(contacts), symmetric=symmetric, loop=True)
+            normalized = plan.normalize()
+            self.assertLess(len(normalized.contacts), len(plan.contacts))
+            self.assertEqual(normalized.get_max_time(), plan.get_max_time())
+            for t in [random.random() * 300 for _ in range(300)]:
+                a, b = random.sample(range(6), 2)
+                self.assertEqual(
+                    normalized.has_contact(t, a, b), plan.has_contact(t, a, b)
+                )
+
+    def test_shared(self):
+        """
+        tests that all nodes share the contact plan of their network settings
+        """
+        plan = ContactPlan(random_contacts(10), symmetric=True)
+        net = pons.NetworkSettings("cp", range=0, contactplan=plan)
+        nodes = pons.generate_nodes(5, net=[net])
+        for n in nodes:
+            self.assertIsNot(n.net["cp"], net)
+            self.assertIs(n.net["cp"].contactplan, plan)
+
+    def test_links(self):
+        """
+        tests that links go up and down exactly at the starts and ends of
+        the contacts in contact plan networks
+        """
+        contacts = [
+            Contact((10, 20), (0, 1), bw=1000),
+            Contact((15, 30), (1, 2), bw=1000),
+            Contact((25, 35), (0, 1), bw=1000),
+        ]
+        for loop in [False, True]:
+            plan = ContactPlan(contacts, symmetric=True, loop=loop)
+            net = pons.NetworkSettings("cp", range=0, contactplan=plan)
+            router = pons.routing.EpidemicRouter()
+            nodes = pons.generate_nodes(3, net=[net], router=router)
+            config = {"movement_logger": False, "peers_logger": False}
+            netsim = pons.NetSim(80, nodes, config=config)
+            netsim.setup()
+
+            samples = []
+
+            def sample(env):
+                for t in [5, 10.5, 17, 22, 27, 33, 40, 45.5, 52, 57, 62, 70]:
+                    yield env.timeout(t - env.now)
+                    samples.append([sorted(n.neighbors.get("cp", [])) for n in nodes])
+
+            netsim.env.process(sample(netsim.env))
+            netsim.run()
+            expected = [
+                [[], [], []],
+                [[1], [0], []],
+                [[1], [0, 2], [1]],
+                [[], [2], [1]],
+                [[1], [0, 2], [1]],
+                [[1], [0], []],
+                [[], [], []],
+            ]
+            if loop:
+                # the plan repeats every 35 seconds
+                expected += [
+                    [[1], [0], []],
+                    [[1], [0, 2], [1]],
+                    [[], [2], [1]],
+                    [[1], [0, 2], [1]],
+                    [[1], [0], []],
+                ]
+            else:
+                expected += [[[], [], []]] * 5
+            self.assertEqual(samples, expected)
+
+    def test_updates(self):
+        """
+        tests that a plan with inserted and retracted contacts answers
+        queries like a plan built from the remaining contacts
+        """
+        random.seed(6)
+        for loop in [False, True]:
+            contacts = random_contacts(100)
+            plan = ContactPlan(list(contacts), symmetric=True, loop=loop)
+            notified = []
+            plan.subscribe(lambda c, inserted: notified.append((c, inserted)))
+            for c in random_contacts(30):
+                plan.insert(c)
+                contacts.append(c)
+            for c in random.sample(contacts, 40):
+                plan.retract(c)
+                contacts.remove(c)
+            self.assertEqual(len(notified), 70)
+            with self.assertRaises(ValueError):
+                plan.retract(Contact((1.0, 2.0), (7, 8)))
+
+            expected = ContactPlan(list(contacts), symmetric=True, loop=loop)
+            self.assertEqual(sorted(plan.fixed_links()), sorted(expected.fixed_links()))
+            for t in [random.random() * 200 for _ in range(200)]:
+                self.assertEqual(
+                    sorted(c.timespan + c.nodes for c in plan.at(t)),
+                    sorted(c.timespan + c.nodes for c in expected.at(t)),
+                )
+                a, b = random.sample(range(6), 2)
+                self.assertEqual(
+                    plan.contact_between(t, a, b), expected.contact_between(t, a, b)
+                )
+                next_time = plan.next_event(t)
+                self.assertEqual(next_time, expected.next_event(t))
+                if next_time is not None:
+                    self.assertEqual(
+                        sorted(plan.changed_links(next_time)),
+                        sorted(expected.changed_links(next_time)),
+                    )
+            raw = plan.raw_contacts()
+            self.assertEqual(sorted(raw, key=repr), sorted(contacts, key=repr))
+            starts = [c.timespan[0] for c in raw]
+            self.assertEqual(starts, sorted(starts))
+
+        plan = ContactPlan([Contact((-5.0, 5.0), (1, 2))])
+        self.assertEqual(len(plan.at(-1)), 1)
+        inserted = Contact((-2.0, 0.0), (2, 3))
+        plan.insert(inserted)
+        self.assertEqual(len(plan.at(-1)), 2)
+        plan.retract(inserted)
+        self.assertEqual(len(plan.at(-1)), 1)
+
+        plan = ContactPlan([])
+        for c in random_contacts(300):
+            plan.insert(c)
+        # the index was rebuilt once too many changes were pending
+        self.assertGreater(len(plan.contacts), 256)
+        self.assertEqual(len(plan.raw_contacts()), 300)
+
+    def test_live_links(self):
+        """
+        tests that links follow contacts inserted and retracted during the simulation
+        """
+        first = Contact((10, 40), (0, 1), bw=1000)
+        plan = ContactPlan([first], symmetric=True)
+        net = pons.NetworkSettings("cp", range=0, contactplan=plan)
+        nodes = pons.generate_nodes(3, net=[net], router=pons.routing.EpidemicRouter())
+        config = {"movement_logger": False, "peers_logger": False}
+        netsim = pons.NetSim(80, nodes, config=config)
+        netsim.setup()
+
+        samples = []
+
+        def operator(env):
+            yield env.timeout(20)
+            plan.insert(Contact((15, 50), (1, 2), bw=1000))
+            plan.insert(Contact((60, 70), (0, 2), bw=1000))
+            yield env.timeout(5)
+            plan.retract(first)
+
+        def sample(env):
+            for t in [15, 20.5, 30, 45, 55, 65, 75]:
+                yield env.timeout(t - env.now)
+                samples.append([sorted(n.neighbors.get("cp", [])) for n in nodes])
+
+        netsim.env.process(operator(netsim.env))
+        netsim.env.process(sample(netsim.env))
+        netsim.run()
+        self.assertEqual(
+            samples,
+            [
+                [[1], [0], []],
+                [[1], [0, 2], [1]],
+                [[], [2], [1]],
+                [[], [2], [1]],
+                [[], [], []],
+                [[2], [], [0]],
+                [[], [], []],
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
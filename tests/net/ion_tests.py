@@ -0,0 +1,133 @@
+import random
+import unittest
+
+from pons.net.plans.ion import IonContactPlan
+
+
+def random_entries(count, nodes=6, duration=100.0):
+    entries = []
+    for _ in range(count):
+        start = random.random() * duration
+        end = start + random.random() * 20
+        node1, node2 = random.sample(range(nodes), 2)
+        if random.random() < 0.5:
+            entries.append(("contact", (start, end), node1, node2, 1000.0))
+        else:
+            entries.append(("range", (start, end), node1, node2, 3e8))
+    return entries
+
+
+class _Counting(object):
+    """A sequence that records the positions read from it."""
+
+    def __init__(self, values, visited):
+        self.values = values
+        self.visited = visited
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, i):
+        self.visited.append(i)
+        return self.values[i]
+
+
+class IonContactPlanTests(unittest.TestCase):
+    """
+    tests for ION contact plans
+    """
+
+    def test_queries(self):
+        """
+        tests that the indexed queries match a scan over all entries
+        """
+        random.seed(22)
+        entries = random_entries(400)
+        plan = IonContactPlan("random", entries)
+
+        def active(t, kind=None, node=None):
+            return [
+                c
+                for c in entries
+                if c[1][0] <= t <= c[1][1]
+                and (kind is None or c[0] == kind)
+                and (node is None or node in (c[2], c[3]))
+            ]
+
+        for _ in range(300):
+            t = random.random() * 120
+            node1, node2 = random.sample(range(6), 2)
+            self.assertEqual(plan.get_entries(t), active(t))
+            self.assertEqual(plan.get_contacts(t), active(t, "contact"))
+            self.assertEqual(plan.get_ranges(t), active(t, "range"))
+            contacts = active(t, "contact", node1)
+            self.assertEqual(plan.get_contacts_for_node(t, node1), contacts)
+            self.assertEqual(
+                plan.get_ranges_for_node(t, node1), active(t, "range", node1)
+            )
+
+            contacts = [c for c in contacts if node2 in (c[2], c[3])]
+            ranges = [r for r in active(t, "range", node1) if node2 in (r[2], r[3])]
+            self.assertEqual(plan.has_contact(t, node1, node2), len(contacts) > 0)
+            if contacts and ranges:
+                self.assertEqual(
+                    plan.tx_time_for_contact(t, node1, node2, 500),
+                    500 / contacts[0][4] + ranges[0][4] * 0.00000013,
+                )
+            else:
+                with self.assertRaises(Exception):
+                    plan.tx_time_for_contact(t, node1, node2, 500)
+
+        plan.remove_past_entries(50.0)
+        self.assertEqual(
+            plan.get_entries(45.0),
+            [c for c in entries if c[1][0] <= 45.0 and c[1][1] >= 50.0],
+        )
+
+    def test_long_entries(self):
+        """
+        tests queries and loading with ranges over the whole plan next to many short entries
+        """
+        random.seed(23)
+        entries = [
+            ("range", (0.0, 10000.0), 0, 1, 3e8),
+            ("range", (0.0, 10000.0), 1, 2, 3e8),
+        ]
+        for i in range(20000):
+            start = i * 0.5
+            entries.append(("contact", (start, start + 1.0), 0, 1, 1000.0))
+            entries.append(("contact", (start, start + 0.2), 1, 2, 1000.0))
+        plan = IonContactPlan("long", entries)
+
+        for _ in range(50):
+            t = random.random() * 10000
+            active = [c for c in entries if c[1][0] <= t <= c[1][1]]
+            self.assertEqual(plan.get_entries(t), active)
+            self.assertEqual(
+                plan.get_ranges_for_node(t, 1), [c for c in active if c[0] == "range"]
+            )
+            contacts = [c for c in active if c[0] == "contact" and c[3] == 2]
+            if contacts:
+                self.assertEqual(
+                    plan.tx_time_for_contact(t, 2, 1, 500),
+                    500 / 1000.0 + 3e8 * 0.00000013,
+                )
+            else:
+                with self.assertRaises(Exception):
+                    plan.tx_time_for_contact(t, 2, 1, 500)
+
+        # an active search only visits the subtrees of the active entries
+        index = plan._entries
+        visited = []
+        max_end = index.max_end
+        index.max_end = _Counting(max_end, visited)
+        index.active(5000.25)
+        index.max_end = max_end
+        self.assertLess(len(visited), 200)
+
+        plan.remove_past_entries(9000.0)
+        self.assertEqual(len(plan.get_ranges(9500.0)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
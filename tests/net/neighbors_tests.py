@@ -0,0 +1,86 @@
+import random
+import unittest
+from copy import deepcopy
+
+import pons
+import pons.routing
+
+
+class NeighborServiceTests(unittest.TestCase):
+    """
+    tests for the neighbor service shared by all routers
+    """
+
+    def _netsim(self, num_nodes, duration, nets, position_store=False):
+        moves = pons.generate_randomwaypoint_movement(
+            duration, num_nodes, 400, 400, max_pause=5
+        )
+        nodes = pons.generate_nodes(
+            num_nodes, net=nets, router=pons.routing.EpidemicRouter()
+        )
+        config = {
+            "movement_logger": False,
+            "peers_logger": False,
+            "position_store": position_store,
+        }
+        return pons.NetSim(
+            duration, nodes, world_size=(400, 400), movements=moves, config=config
+        )
+
+    def _assert_full_scan_matches(self, netsim):
+        nodes = list(netsim.nodes.values())
+        for node in nodes:
+            expected = deepcopy(node.neighbors)
+            node.calc_neighbors(netsim.env.now, nodes)
+            self.assertEqual(expected, node.neighbors)
+
+    def test_incremental_updates(self):
+        """
+        tests that updating only moved nodes keeps the same neighbors as a full scan
+        """
+        random.seed(42)
+        netsim = self._netsim(80, 120, [pons.NetworkSettings("net", range=40)])
+        netsim.setup()
+        for until in range(10, 120, 10):
+            netsim.env.run(until=until)
+            self._assert_full_scan_matches(netsim)
+
+    def test_position_store(self):
+        """
+        tests that the vectorized range checks find the same neighbors as a full scan
+        """
+        random.seed(42)
+        nets = [
+            pons.NetworkSettings("short", range=20),
+            pons.NetworkSettings("long", range=60),
+        ]
+        netsim = self._netsim(80, 120, nets, position_store=True)
+        netsim.setup()
+        for until in range(10, 120, 10):
+            netsim.env.run(until=until)
+            self._assert_full_scan_matches(netsim)
+
+    def test_peers(self):
+        """
+        tests that every router gets the neighbors of its node as peers
+        """
+        random.seed(7)
+        nets = [
+            pons.NetworkSettings("short", range=20),
+            pons.NetworkSettings("long", range=60),
+        ]
+        nodes = pons.generate_nodes(40, net=nets, router=pons.routing.EpidemicRouter())
+        for node in nodes:
+            node.x = random.uniform(0, 400)
+            node.y = random.uniform(0, 400)
+        config = {"movement_logger": False, "peers_logger": False}
+        netsim = pons.NetSim(10, nodes, world_size=(400, 400), config=config)
+        netsim.setup()
+        netsim.env.run(until=5)
+        for node in netsim.nodes.values():
+            peers = set(node.neighbors["short"]) | set(node.neighbors["long"])
+            self.assertEqual(set(node.router.peers), peers)
+
+
+if __name__ == "__main__":
+    unittest.main()
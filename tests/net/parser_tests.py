@@ -0,0 +1,94 @@
+import json
+import os
+import tempfile
+import unittest
+
+from pons.net.plans import Contact
+from pons.net.plans.parser import read_ccp, read_csv, read_json
+
+MAPPING = {"a": 1, "b": 2, "c": 3}
+
+CONTACTS = [
+    Contact((0, -1), (1, 2), bw=100_000_000, delay=0.1, fixed=True),
+    Contact((0.0, 30.0), (2, 3), bw=2_000_000, loss=0.5, delay=0.01),
+    Contact((0.0, 30.0), (3, 2), bw=2_000_000, loss=0.5, delay=0.01),
+    Contact((60.0, 90.5), (1, 3), bw=5000, jitter=0.2),
+]
+
+
+class ParserTests(unittest.TestCase):
+    """
+    tests for reading contact plans
+    """
+
+    def read(self, name, content, reader, **kwargs):
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, name)
+            with open(filename, "w") as f:
+                f.write(content)
+            return reader(filename, **kwargs)
+
+    def test_formats(self):
+        """
+        tests that all formats give the same contacts and skip invalid ones
+        """
+        csv = (
+            "src,dst,start,end,bw,delay,loss,jitter\n"
+            "a,b,0,-1,100mbit,0.1,,\n"
+            "b,c,0,30,2mbit,0.01,0.5,0\n"
+            "c,b,0,30,2mbit,0.01,0.5,0\n"
+            "a,x,10,20,2mbit,0.01,0,0\n"
+            "a,c,60,90.5,5000,0,0,0.2\n"
+            "b,c,later,90,5000,0,0,0\n"
+        )
+        self.assertEqual(self.read("c.csv", csv, read_csv, mapping=MAPPING), CONTACTS)
+
+        items = [
+            {"src": "a", "dst": "b", "bw": "100mbit", "delay": 0.1, "fixed": True},
+            {"n1": "b", "n2": "c", "start": 0, "end": 30, "bw": "2mbit"},
+            {"src": "a", "dst": "x", "start": 10, "end": 20},
+            {"src": "a", "dst": "c", "begin": 60, "end": 90.5, "bandwidth": 5000},
+            {"src": "b", "dst": "c", "end": 90},
+        ]
+        items[1].update({"loss": 0.5, "delay": 0.01, "symmetric": True})
+        items[3]["jitter"] = 0.2
+        contacts = self.read("c.json", json.dumps(items), read_json, mapping=MAPPING)
+        self.assertEqual(contacts, CONTACTS)
+
+        ccp = (
+            "s loop 0\n"
+            "# comment\n"
+            "a fixed a b 100mbit 0 0.100 0\n"
+            "\n"
+            "a contact +0 +30 b c 2mbit 0.5 0.010 0 \n"
+            "a contact +60 +90.5 a c 5000 0 0 0.2\n"
+        )
+        contacts = self.read("c.ccp", ccp, read_ccp, mapping=MAPPING, symmetric=True)
+        self.assertEqual(
+            contacts,
+            CONTACTS[:1]
+            + [Contact((0, -1), (2, 1), bw=100_000_000, delay=0.1, fixed=True)]
+            + CONTACTS[1:]
+            + [Contact((60.0, 90.5), (3, 1), bw=5000, jitter=0.2)],
+        )
+        with self.assertRaises(ValueError):
+            self.read("c.ccp", "a contact 0 30 1 2\n", read_ccp)
+
+    def test_integer_nodes(self):
+        """
+        tests that integer node IDs need no mapping
+        """
+        csv = "n1,n2,start,end\n1,2,0,5\n3,1,5,10\n"
+        self.assertEqual(
+            self.read("c.csv", csv, read_csv),
+            [Contact((0.0, 5.0), (1, 2)), Contact((5.0, 10.0), (3, 1))],
+        )
+        items = [{"n1": 1, "n2": 2, "start": 0, "end": -1}]
+        self.assertEqual(
+            self.read("c.json", json.dumps(items), read_json),
+            [Contact((0.0, -1.0), (1, 2), fixed=True)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import random
+import unittest
+
+import pons
+
+
+class SpatialIndexTests(unittest.TestCase):
+    """
+    tests for the grid index used for range-based neighbor discovery
+    """
+
+    def _random_nodes(self, num_nodes, nets):
+        nodes = pons.generate_nodes(num_nodes, net=nets)
+        for node in nodes:
+            node.x = random.uniform(0, 500)
+            node.y = random.uniform(0, 500)
+        return nodes
+
+    def test_same_neighbors_as_full_scan(self):
+        """
+        tests that neighbor discovery with the index finds exactly the same neighbors
+        """
+        random.seed(42)
+        nets = [
+            pons.NetworkSettings("short", range=20),
+            pons.NetworkSettings("long", range=75),
+        ]
+        nodes = self._random_nodes(200, nets)
+        index = pons.net.SpatialIndex(nodes)
+        for step in range(5):
+            for node in nodes:
+                node.x += random.uniform(-30, 30)
+                node.y += random.uniform(-30, 30)
+                index.update(node)
+            for node in nodes:
+                node.calc_neighbors(step, nodes)
+                expected = {k: list(v) for k, v in node.neighbors.items()}
+                node.calc_neighbors(step, nodes, index)
+                self.assertEqual(expected, node.neighbors)
+
+    def test_range_border(self):
+        """
+        tests that nodes exactly at the range border are still found
+        """
+        nodes = pons.generate_nodes(2, net=[pons.NetworkSettings("net", range=10)])
+        nodes[0].x = 9.999999
+        nodes[1].x = 19.999999
+        index = pons.net.SpatialIndex(nodes)
+        nodes[0].calc_neighbors(0, nodes, index)
+        self.assertEqual(nodes[0].neighbors["net"], [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import random
+import tempfile
+import unittest
+
+from pons.net.plans import Contact, ContactPlan
+from pons.net.plans.parser import write_ccp
+from pons.net.plans.window import WindowedContactPlan
+
+
+def random_contacts(count, nodes=6, duration=100):
+    contacts = []
+    for _ in range(count):
+        start = random.choice([random.randint(0, duration), random.random() * duration])
+        end = start + random.choice([0, 1, 5, duration / 2, random.random() * 30])
+        contacts.append(
+            Contact((start, end), tuple(random.sample(range(nodes), 2)), bw=100)
+        )
+    return contacts
+
+
+class WindowTests(unittest.TestCase):
+    """
+    tests for windowed contact plans
+    """
+
+    def test_queries(self):
+        """
+        tests that a windowed plan answers queries moving forward in time like the full plan
+        """
+        random.seed(21)
+        contacts = random_contacts(300)
+        contacts.append(Contact((0, -1), (1, 4), bw=None, fixed=True))
+        contacts.append(Contact((500.0, 510.0), (2, 3)))
+        contacts.sort(key=lambda c: c.timespan[0])
+        plan = ContactPlan(list(contacts), symmetric=True)
+        windowed = WindowedContactPlan(contacts, 7.5, symmetric=True)
+        self.assertEqual(windowed.fixed_links(), plan.fixed_links())
+        times = sorted(random.random() * 550 for _ in range(500))
+        for t in times:
+            self.assertEqual(windowed.next_event(t), plan.next_event(t))
+            self.assertEqual(windowed.at(t), plan.at(t))
+            self.assertEqual(windowed.changed_links(t), plan.changed_links(t))
+            a, b = random.sample(range(6), 2)
+            self.assertEqual(windowed.has_contact(t, a, b), plan.has_contact(t, a, b))
+            self.assertEqual(
+                windowed.contact_between(t, a, b), plan.contact_between(t, a, b)
+            )
+        # only the windows around the latest query are kept
+        self.assertLessEqual(len(windowed.raw_contacts()), 3)
+        windowed.close()
+
+    def test_unsorted(self):
+        """
+        tests that contacts not sorted by start time are rejected
+        """
+        contacts = [Contact((10.0, 20.0), (1, 2)), Contact((0.0, 5.0), (2, 3))]
+        windowed = WindowedContactPlan(contacts, 100.0)
+        with self.assertRaises(ValueError):
+            windowed.at(50.0)
+
+    def test_file(self):
+        """
+        tests streaming a core contact plan
+        """
+        contacts = [
+            Contact((float(s), s + 5.0), (a, b), bw=1000)
+            for s, a, b in [(0, 1, 2), (3, 2, 3), (40, 1, 3)]
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, "contacts.ccp")
+            write_ccp(filename, contacts)
+            windowed = WindowedContactPlan.from_file(filename, 10.0)
+            self.assertEqual(windowed.at(4.0), contacts[:2])
+            self.assertEqual(windowed.next_event(8.0), 40.0)
+            self.assertEqual(windowed.at(42.0), contacts[2:])
+            self.assertIsNone(windowed.next_event(45.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+import argparse
+import logging
+import os
+import pathlib
+import random
+import sys
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format="%(asctime)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+SCRIPT_DIR = pathlib.Path(__file__).parent.parent.resolve()
+try:
+    import pons
+except ImportError:
+    sys.path.append(str(SCRIPT_DIR.parent.resolve()))
+    import pons
+
+from pons.net.plans.parser import write_ccp
+
+
+def load_movement(args: argparse.Namespace):
+    """
+    Loads the movement given on the command line and returns the moves and
+    the end time of the movement.
+    """
+    if args.rwp is not None:
+        if args.duration is None:
+            logger.error("Random waypoint movement needs a duration (-d).")
+            sys.exit(1)
+        num_nodes, width, height = args.rwp
+        if args.seed is not None:
+            random.seed(args.seed)
+        moves = pons.RandomWaypointMovement(
+            args.duration, num_nodes, width, height, max_pause=args.max_pause
+        )
+        return moves, args.duration
+
+    if args.movement is None:
+        logger.error("Either a movement file or --rwp has to be given.")
+        sys.exit(1)
+
+    movement_format = args.format
+    if movement_format is None:
+        movement_format = "one" if args.movement.endswith(".one") else "ns2"
+    logger.info(f"Loading {movement_format} movement from {args.movement}")
+    if movement_format == "one":
+        movement = pons.OneMovement.from_file(args.movement)
+        return movement.moves, movement.duration
+    movement = pons.Ns2Movement.from_file(args.movement)
+    return movement.moves, movement.end
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Extract a core contact plan from a node movement."
+    )
+    parser.add_argument(
+        "movement",
+        type=str,
+        nargs="?",
+        help="Path to the movement file (The ONE or ns2 format).",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=["one", "ns2"],
+        help="Format of the movement file (default: .one files are The ONE, others ns2).",
+    )
+    parser.add_argument(
+        "--rwp",
+        nargs=3,
+        type=int,
+        metavar=("NUM_NODES", "WIDTH", "HEIGHT"),
+        help="Generate a random waypoint movement instead of reading a file.",
+    )
+    parser.add_argument(
+        "--seed", type=int, help="Random seed for the random waypoint movement."
+    )
+    parser.add_argument(
+        "--max-pause",
+        type=int,
+        default=120,
+        help="Maximum pause of the random waypoint movement in seconds.",
+    )
+    parser.add_argument(
+        "-r", "--range", type=float, required=True, help="Radio range in meters."
+    )
+    parser.add_argument(
+        "-d",
+        "--duration",
+        type=float,
+        help="End time of the contact plan (default: end of the movement).",
+    )
+    parser.add_argument(
+        "-b",
+        "--bandwidth",
+        type=int,
+        default=54000000,
+        help="Bandwidth of the contacts in bytes per second.",
+    )
+    parser.add_argument(
+        "-l", "--loss", type=float, default=0.0, help="Loss of the contacts."
+    )
+    parser.add_argument(
+        "--delay",
+        type=float,
+        default=0.05,
+        help="Delay of the contacts in seconds.",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        default="contacts.ccp",
+        help="Output file for the core contact plan.",
+    )
+    args = parser.parse_args()
+
+    moves, end = load_movement(args)
+    if args.duration is not None:
+        end = args.duration
+
+    logger.info(f"Extracting contacts with range {args.range} until {end}")
+    plan = pons.extract_contact_plan(
+        moves,
+        args.range,
+        end,
+        bandwidth=args.bandwidth,
+        loss=args.loss,
+        delay=args.delay,
+    )
+    write_ccp(args.output, plan.contacts)
+    logger.info(f"Wrote {len(plan.contacts)} contacts to {args.output}")
+    logger.info("Read the plan with read_ccp(..., symmetric=True)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import logging
+import os
+import pathlib
+import sys
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format="%(asctime)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+SCRIPT_DIR = pathlib.Path(__file__).parent.parent.resolve()
+try:
+    import pons
+except ImportError:
+    sys.path.append(str(SCRIPT_DIR.parent.resolve()))
+    import pons
+
+from pons.net.plans import ContactPlan
+from pons.net.plans.binary import PLAN_SUFFIX, load_plan, write_plan
+from pons.net.plans.parser import write_ccp
+
+
+def link_changes(plan: ContactPlan) -> int:
+    """Returns the number of links going up or down in one run of the plan."""
+    return 2 * sum(1 for c in plan.contacts if not c.fixed)
+
+
+def reduction(before: int, after: int) -> str:
+    if before == 0:
+        return "%d -> %d" % (before, after)
+    return "%d -> %d (-%.1f%%)" % (before, after, 100.0 * (before - after) / before)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Normalize a contact plan by merging redundant contacts."
+    )
+    parser.add_argument(
+        "plan",
+        type=str,
+        help=f"Path to the contact plan (.csv, .json, .ccp or {PLAN_SUFFIX}).",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        help=f"Output file, a core contact plan (.ccp) or binary contact plan ({PLAN_SUFFIX}).",
+    )
+    parser.add_argument(
+        "-s",
+        "--symmetric",
+        action="store_true",
+        help="Contacts work in both directions, so both directions of a node pair are merged.",
+    )
+    parser.add_argument(
+        "-l", "--loop", action="store_true", help="The contact plan is looped."
+    )
+    parser.add_argument(
+        "-m",
+        "--mapping",
+        type=str,
+        help="JSON file mapping the node names in the plan to integer node IDs.",
+    )
+    args = parser.parse_args()
+
+    if args.output is not None:
+        extension = os.path.splitext(args.output)[1].lower()
+        if extension not in [".ccp", PLAN_SUFFIX]:
+            logger.error(f"Unsupported output format: {args.output}")
+            sys.exit(1)
+
+    mapping = None
+    if args.mapping is not None:
+        with open(args.mapping, "r") as f:
+            mapping = json.load(f)
+
+    plan = load_plan(
+        args.plan, mapping=mapping, loop=args.loop, symmetric=args.symmetric
+    )
+    if args.output is not None and extension == ".ccp" and plan.period is not None:
+        # core contact plans cannot store the period of a plan
+        logger.error(
+            f"The plan repeats every {plan.period}, please write it as binary contact plan ({PLAN_SUFFIX})."
+        )
+        sys.exit(1)
+    normalized = plan.normalize()
+    logger.info("Contacts: %s", reduction(len(plan.contacts), len(normalized.contacts)))
+    logger.info(
+        "Link events: %s", reduction(link_changes(plan), link_changes(normalized))
+    )
+
+    if args.output is None:
+        return
+    if extension == PLAN_SUFFIX:
+        write_plan(args.output, normalized)
+    else:
+        write_ccp(args.output, list(normalized.contacts), loop=normalized.loop)
+    logger.info(f"Wrote {len(normalized.contacts)} contacts to {args.output}")
+    if args.symmetric:
+        logger.info(
+            "Read the plan as symmetric plan, e.g. with load_plan(..., symmetric=True)"
+        )
+
+
+if __name__ == "__main__":
+    main()
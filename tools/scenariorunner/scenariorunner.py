@@ -27,7 +27,7 @@ except ImportError:
     import pons
 SCRIPT_DIR = str(SCRIPT_DIR)
 
-from pons.net.plans.parser import read_csv, read_json, read_ccp
+from pons.net.plans.binary import load_plan
 
 
 def visualize_events(event_log: str, args: argparse.Namespace = None):
@@ -86,15 +86,14 @@ def visualize_events(event_log: str, args: argparse.Namespace = None):
 
 def run_scenario(
     g: nx.Graph,
-    contacts: List[Dict[str, Any]],
+    parsed_contacts: pons.net.ContactPlan,
     flows: List[Dict[str, Any]],
     args: argparse.Namespace,
 ):
+    contacts = parsed_contacts.contacts
     logger.info(
         f"Running scenario with {len(g.nodes)} nodes, {len(g.edges)} links and {len(contacts)} contacts..."
     )
-    parsed_contacts = pons.net.ContactPlan(contacts=contacts, symmetric=False)
-
     # pons.net.CoreContactPlan(contacts=contacts, symmetric=False)
     plan = pons.net.NetworkPlan(g, contacts=parsed_contacts)
 
@@ -206,7 +205,7 @@ def main():
         "-c",
         type=str,
         required=True,
-        help="CSV/JSON/CCP file with contacts. Type is determined by the file extension (.csv, .json, .ccp).",
+        help="CSV/JSON/CCP file with contacts or a binary contact plan. Type is determined by the file extension (.csv, .json, .ccp, .pcp).",
     )
     parser.add_argument(
         "--nodes", "-n", type=str, help="Node mapping JSON file", required=True
@@ -265,23 +264,19 @@ def main():
     for k, v in node_mapping.items():
         mapping[k] = v["node_number"]
 
-    if args.contacts.endswith(".json"):
-        contacts = read_json(args.contacts, mapping=mapping)
-    elif args.contacts.endswith(".csv"):
-        contacts = read_csv(args.contacts, mapping=mapping)
-    elif args.contacts.endswith(".ccp"):
-        contacts = read_ccp(args.contacts, mapping=mapping, symmetric=False)
-    else:
-        logger.error(
-            f"Unsupported contacts file format: {args.contacts}. Please use .csv or .json or .ccp."
-        )
+    # repeated runs memory-map the plan from PONS_CACHE_DIR if it is set
+    try:
+        parsed_contacts = load_plan(args.contacts, mapping=mapping, symmetric=False)
+    except ValueError as e:
+        logger.error(e)
         sys.exit(1)
+    contacts = parsed_contacts.contacts
 
     g = scenariohelper.get_graph_from_contacts(contacts, node_mapping)
     g = nx.relabel_nodes(g, mapping)
 
     flows = scenariohelper.load_application_traffic(args.flows, node_mapping)
-    run_scenario(g, contacts, flows, args)
+    run_scenario(g, parsed_contacts, flows, args)
 
 
 if __name__ == "__main__":